@@ -0,0 +1,84 @@
+# src/account_state.py
+import time
+import threading
+from src.utils import logger
+
+
+class AccountSnapshot:
+    """Unveränderlicher Stand von /fapi/v2/account: Guthaben je Asset und Positionsgröße je Symbol."""
+
+    __slots__ = ("balances", "legs", "positions", "entry_prices", "fetched_at")
+
+    def __init__(self, account_info: dict, fetched_at: float):
+        self.balances = {asset["asset"]: float(asset["walletBalance"]) for asset in account_info.get("assets", [])}
+        # Im Hedge-Modus gibt es je Symbol mehrere Einträge (positionSide LONG/SHORT): legs je Seite, positions netto
+        self.legs = {}
+        self.positions = {}
+        self.entry_prices = {}
+        for position in account_info.get("positions", []):
+            amount = float(position.get("positionAmt", 0))
+            symbol = position["symbol"]
+            self.legs[(symbol, position.get("positionSide", "BOTH"))] = (amount, float(position.get("entryPrice", 0)))
+            self.positions[symbol] = self.positions.get(symbol, 0.0) + amount
+            if amount:
+                self.entry_prices[symbol] = float(position.get("entryPrice", 0))
+        self.fetched_at = fetched_at
+
+    def position(self, symbol: str) -> str:
+        amount = self.positions.get(symbol, 0.0)
+        return "LONG" if amount > 0 else "SHORT" if amount < 0 else "NONE"
+
+    def open_positions(self, symbols=None) -> list:
+        """[{"symbol", "position", "amount", "entry_price"}] aller offenen Positionen (optional nur symbols)."""
+        return [{"symbol": symbol, "position": self.position(symbol), "amount": amount,
+                 "entry_price": self.entry_prices.get(symbol)}
+                for symbol, amount in self.positions.items() if amount and (symbols is None or symbol in symbols)]
+
+
+class AccountStateCache:
+    """
+    Kontostand und Positionen eines Binance-Connectors aus einem einzigen /fapi/v2/account-Request.
+
+    Alle Leser eines Zyklus (Positionsabfrage je Symbol, Order-Sizing, Webapp /api/live_data) teilen denselben
+    Snapshot; das Request-Gewicht pro Zyklus hängt damit nicht mehr von der Anzahl der Symbole ab. Neu geladen wird
+    nach invalidate() (Zyklusbeginn, ausgeführte Order) oder wenn der Snapshot älter als max_age Sekunden ist.
+    Gleichzeitige Aufrufer warten auf denselben Request statt eigene zu senden.
+    """
+
+    def __init__(self, connector, max_age: float = 5.0, clock=time.monotonic):
+        self.connector = connector
+        self.max_age = max_age
+        self.clock = clock
+        self.fetches = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> AccountSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and self.clock() - snapshot.fetched_at <= self.max_age:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or self.clock() - snapshot.fetched_at > self.max_age:
+                snapshot = AccountSnapshot(self.connector.get_account_info(), self.clock())
+                self._snapshot = snapshot
+                self.fetches += 1
+            return snapshot
+
+    def invalidate(self, reason: str = None):
+        """Verwirft den Snapshot; der nächste Zugriff lädt neu (z. B. nach einer Order)."""
+        self._snapshot = None
+        if reason:
+            logger.debug(f"Konto-Snapshot verworfen: {reason}")
+
+    def position(self, symbol: str) -> str:
+        return self.snapshot().position(symbol)
+
+    def position_amount(self, symbol: str) -> float:
+        return self.snapshot().positions.get(symbol, 0.0)
+
+    def balance(self, asset: str = "USDT") -> float:
+        balances = self.snapshot().balances
+        if asset not in balances:
+            raise Exception(f"Kein Futures-Guthaben für {asset} gefunden!")
+        return balances[asset]
@@ -0,0 +1,455 @@
+# src/backtest_kernel.py
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba ist optional – ohne JIT läuft derselbe Code als reines Python/NumPy
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Positionskodierung in den Ergebnis-Arrays
+POSITION_NONE, POSITION_LONG, POSITION_SHORT = 0, 1, -1
+POSITION_LABELS = {POSITION_NONE: "NONE", POSITION_LONG: "LONG", POSITION_SHORT: "SHORT"}
+
+TRADE_DTYPE = np.dtype([
+    ("entry_index", np.int64),
+    ("exit_index", np.int64),
+    ("type", np.int8),
+    ("entry_price", np.float64),
+    ("exit_price", np.float64),
+    ("units", np.float64),
+    ("pips", np.float64),
+    ("profit", np.float64),
+    ("risk", np.float64),
+])
+
+# Trades des Portfolio-Backtests: zusätzlich die Spalte des Symbols in den Matrizen
+PORTFOLIO_TRADE_DTYPE = np.dtype(TRADE_DTYPE.descr + [("symbol", np.int32)])
+
+
+@njit(cache=True)
+def _simulate(close, atr, exit_atr, signal, trend, friday_close, ready, pip_size, pip_value,
+              initial_balance, leverage, atr_sl_multiplier, atr_tp_multiplier,
+              base_risk_amount, dynamic_risk_factor, min_units, max_units):
+    n = len(close)
+    balance_out = np.full(n, np.nan)
+    equity_out = np.full(n, np.nan)
+    position_out = np.zeros(n, dtype=np.int8)
+    t_entry = np.empty(n, dtype=np.int64)
+    t_exit = np.empty(n, dtype=np.int64)
+    t_type = np.empty(n, dtype=np.int8)
+    t_entry_price = np.empty(n)
+    t_exit_price = np.empty(n)
+    t_units = np.empty(n)
+    t_pips = np.empty(n)
+    t_profit = np.empty(n)
+    t_risk = np.empty(n)
+
+    balance = initial_balance
+    position = 0
+    entry_index = 0
+    entry_price = 0.0
+    units = 0.0
+    risk = 0.0
+    extreme_price = np.nan  # highest_price (LONG) bzw. lowest_price (SHORT) für den Trailing TP
+    n_trades = 0
+    bars = n
+
+    for i in range(1, n):
+        price = close[i]
+        if balance <= 0:
+            bars = i
+            break
+
+        if position == 1:
+            equity = balance + ((price - entry_price) / pip_size[i] * units * pip_value[i] * leverage)
+        elif position == -1:
+            equity = balance + ((entry_price - price) / pip_size[i] * units * pip_value[i] * leverage)
+        else:
+            equity = balance
+        balance_out[i] = balance
+        equity_out[i] = equity
+
+        action = 0  # 1 = BUY, -1 = SELL, 2 = Position schließen
+        if ready[i]:
+            if position == 0:
+                extreme_price = np.nan
+                action = signal[i]
+            elif friday_close[i]:
+                action = 2
+            elif position == 1:
+                stop_loss = entry_price - atr_sl_multiplier * exit_atr[i]
+                if np.isnan(extreme_price) or price > extreme_price:
+                    extreme_price = price
+                trailing_tp = extreme_price - atr_tp_multiplier * exit_atr[i]
+                if price <= trailing_tp or price <= stop_loss or trend[i] == -1:
+                    extreme_price = np.nan
+                    action = 2
+            else:
+                stop_loss = entry_price + atr_sl_multiplier * exit_atr[i]
+                if np.isnan(extreme_price) or price < extreme_price:
+                    extreme_price = price
+                trailing_tp = extreme_price + atr_tp_multiplier * exit_atr[i]
+                if price >= trailing_tp or price >= stop_loss or trend[i] == 1:
+                    extreme_price = np.nan
+                    action = 2
+
+        if (action == 1 or action == -1) and position == 0:
+            sl_pips = atr_sl_multiplier * atr[i] / pip_size[i]
+            risk = base_risk_amount + max(balance, 0.0) * dynamic_risk_factor
+            units = min(max(risk / (sl_pips * pip_value[i]), min_units), max_units)
+            position = action
+            entry_index = i
+            entry_price = price
+        elif action == 2 and position != 0:
+            if position == 1:
+                pips = (price - entry_price) / pip_size[i]
+            else:
+                pips = (entry_price - price) / pip_size[i]
+            profit = pips * units * pip_value[i] * leverage
+            balance += profit
+            t_entry[n_trades] = entry_index
+            t_exit[n_trades] = i
+            t_type[n_trades] = position
+            t_entry_price[n_trades] = entry_price
+            t_exit_price[n_trades] = price
+            t_units[n_trades] = units
+            t_pips[n_trades] = pips
+            t_profit[n_trades] = profit
+            t_risk[n_trades] = risk
+            n_trades += 1
+            position = 0
+            entry_price = 0.0
+            units = 0.0
+        position_out[i] = position
+
+    return (balance_out, equity_out, position_out, bars, n_trades, position, entry_index, entry_price, units, risk,
+            t_entry, t_exit, t_type, t_entry_price, t_exit_price, t_units, t_pips, t_profit, t_risk)
+
+
+def simulate_positions(close, atr, exit_atr, signal, trend, friday_close, ready, pip_size, pip_value,
+                       initial_balance, leverage=1, atr_sl_multiplier=1.5, atr_tp_multiplier=6.0,
+                       base_risk_amount=160.0, dynamic_risk_factor=0.001, min_units=0.0001, max_units=5.0) -> dict:
+    """
+    Positions- und PnL-Zustandsautomat des Backtests über zusammenhängende Arrays.
+
+    Bildet die Logik von run_backtest/CompositeStrategy (ATR-Sizing, Stop-Loss, Trailing TP über Höchst-/Tiefstkurs,
+    Trendwechsel, Freitags-Close) ohne Python-Objekte pro Bar ab. Mit numba wird der Kern kompiliert.
+
+    :param close: Schlusskurse
+    :param atr: ATR für die Positionsgröße (ohne NaN)
+    :param exit_atr: ATR der Strategie für SL/Trailing TP (NaN in der Warm-up-Phase)
+    :param signal: Einstiegssignale (SIGNAL_BUY/SIGNAL_SELL/SIGNAL_HOLD) aus CompositeStrategy.generate_signals
+    :param trend: Trend-Codes je Bar (TREND_BULLISH=1, TREND_BEARISH=-1)
+    :param friday_close: bool-Maske für Freitags-Close
+    :param ready: bool-Maske, ab wann die Strategie Signale liefert
+    :param pip_size: Pip-Größe je Bar
+    :param pip_value: Pip-Wert je Bar
+    :param base_risk_amount: fester Risikoanteil (initial_balance * base_risk der Strategie)
+    :return: dict mit balance/equity/position-Arrays, Anzahl verarbeiteter Bars, strukturiertem Trade-Array (TRADE_DTYPE)
+             und der am Ende noch offenen Position (oder None)
+    """
+    result = _simulate(
+        np.ascontiguousarray(close, dtype=np.float64), np.ascontiguousarray(atr, dtype=np.float64),
+        np.ascontiguousarray(exit_atr, dtype=np.float64), np.ascontiguousarray(signal, dtype=np.int8),
+        np.ascontiguousarray(trend, dtype=np.int8), np.ascontiguousarray(friday_close, dtype=np.bool_),
+        np.ascontiguousarray(ready, dtype=np.bool_), np.ascontiguousarray(pip_size, dtype=np.float64),
+        np.ascontiguousarray(pip_value, dtype=np.float64), float(initial_balance), float(leverage),
+        float(atr_sl_multiplier), float(atr_tp_multiplier), float(base_risk_amount), float(dynamic_risk_factor),
+        float(min_units), float(max_units)
+    )
+    balance, equity, position, bars, n_trades = result[:5]
+    open_type, open_entry_index, open_entry_price, open_units, open_risk = result[5:10]
+    trades = np.empty(n_trades, dtype=TRADE_DTYPE)
+    for name, values in zip(TRADE_DTYPE.names, result[10:]):
+        trades[name] = values[:n_trades]
+    open_position = None
+    if open_type != POSITION_NONE:
+        open_position = {"type": open_type, "entry_index": open_entry_index, "entry_price": open_entry_price,
+                         "units": open_units, "risk": open_risk}
+    return {"balance": balance, "equity": equity, "position": position, "bars": bars, "trades": trades,
+            "open_position": open_position}
+
+
+@njit(cache=True)
+def _simulate_batch(close, atr, exit_atr, signal, trend, friday_close, ready, pip_size, pip_value,
+                    initial_balance, leverage, atr_sl_multiplier, atr_tp_multiplier,
+                    base_risk_amount, dynamic_risk_factor, min_units, max_units, periods_per_year):
+    n = len(close)
+    m = len(atr_sl_multiplier)
+    # Zustand je Kombination (eine Spalte pro (sl, tp)-Paar)
+    balance = np.full(m, initial_balance)
+    position = np.zeros(m, dtype=np.int8)
+    entry_price = np.zeros(m)
+    units = np.zeros(m)
+    extreme_price = np.full(m, np.nan)
+    alive = np.ones(m, dtype=np.bool_)
+    # Kennzahlen, laufend mitgeführt statt einer Equity-Matrix n x m
+    prev_equity = np.full(m, np.nan)
+    peak = np.full(m, np.nan)
+    max_drawdown = np.zeros(m)
+    ret_count = np.zeros(m)
+    ret_mean = np.zeros(m)
+    ret_m2 = np.zeros(m)
+    downside_sq = np.zeros(m)
+    num_trades = np.zeros(m, dtype=np.int64)
+    num_wins = np.zeros(m, dtype=np.int64)
+    gross_win = np.zeros(m)
+    gross_loss = np.zeros(m)
+
+    for i in range(1, n):
+        price = close[i]
+        for k in range(m):
+            if alive[k] and balance[k] <= 0:
+                alive[k] = False
+            if not alive[k]:
+                # Wie das ffill der Equity in compute_metrics: nach dem Abbruch Rendite 0
+                if not np.isnan(prev_equity[k]):
+                    ret_count[k] += 1
+                    delta = -ret_mean[k]
+                    ret_mean[k] += delta / ret_count[k]
+                    ret_m2[k] += delta * (-ret_mean[k])
+                continue
+
+            if position[k] == 1:
+                equity = balance[k] + ((price - entry_price[k]) / pip_size[i] * units[k] * pip_value[i] * leverage)
+            elif position[k] == -1:
+                equity = balance[k] + ((entry_price[k] - price) / pip_size[i] * units[k] * pip_value[i] * leverage)
+            else:
+                equity = balance[k]
+            if not np.isnan(prev_equity[k]):
+                r = equity / prev_equity[k] - 1
+                ret_count[k] += 1
+                delta = r - ret_mean[k]
+                ret_mean[k] += delta / ret_count[k]
+                ret_m2[k] += delta * (r - ret_mean[k])
+                if r < 0:
+                    downside_sq[k] += r * r
+            prev_equity[k] = equity
+            if np.isnan(peak[k]) or equity > peak[k]:
+                peak[k] = equity
+            if peak[k] > 0 and (peak[k] - equity) / peak[k] > max_drawdown[k]:
+                max_drawdown[k] = (peak[k] - equity) / peak[k]
+
+            action = 0
+            if ready[i]:
+                if position[k] == 0:
+                    extreme_price[k] = np.nan
+                    action = signal[i]
+                elif friday_close[i]:
+                    action = 2
+                elif position[k] == 1:
+                    stop_loss = entry_price[k] - atr_sl_multiplier[k] * exit_atr[i]
+                    if np.isnan(extreme_price[k]) or price > extreme_price[k]:
+                        extreme_price[k] = price
+                    trailing_tp = extreme_price[k] - atr_tp_multiplier[k] * exit_atr[i]
+                    if price <= trailing_tp or price <= stop_loss or trend[i] == -1:
+                        extreme_price[k] = np.nan
+                        action = 2
+                else:
+                    stop_loss = entry_price[k] + atr_sl_multiplier[k] * exit_atr[i]
+                    if np.isnan(extreme_price[k]) or price < extreme_price[k]:
+                        extreme_price[k] = price
+                    trailing_tp = extreme_price[k] + atr_tp_multiplier[k] * exit_atr[i]
+                    if price >= trailing_tp or price >= stop_loss or trend[i] == 1:
+                        extreme_price[k] = np.nan
+                        action = 2
+
+            if (action == 1 or action == -1) and position[k] == 0:
+                sl_pips = atr_sl_multiplier[k] * atr[i] / pip_size[i]
+                risk = base_risk_amount + max(balance[k], 0.0) * dynamic_risk_factor
+                units[k] = min(max(risk / (sl_pips * pip_value[i]), min_units), max_units)
+                position[k] = action
+                entry_price[k] = price
+            elif action == 2 and position[k] != 0:
+                if position[k] == 1:
+                    pips = (price - entry_price[k]) / pip_size[i]
+                else:
+                    pips = (entry_price[k] - price) / pip_size[i]
+                profit = pips * units[k] * pip_value[i] * leverage
+                balance[k] += profit
+                num_trades[k] += 1
+                if profit > 0:
+                    num_wins[k] += 1
+                    gross_win[k] += profit
+                elif profit < 0:
+                    gross_loss[k] -= profit
+                position[k] = 0
+                entry_price[k] = 0.0
+                units[k] = 0.0
+
+    sharpe = np.zeros(m)
+    sortino = np.zeros(m)
+    for k in range(m):
+        if ret_count[k] > 1:
+            std = np.sqrt(ret_m2[k] / (ret_count[k] - 1))
+            if std > 0:
+                sharpe[k] = ret_mean[k] / std * np.sqrt(periods_per_year)
+            downside = np.sqrt(downside_sq[k] / ret_count[k])
+            if downside > 0:
+                sortino[k] = ret_mean[k] / downside * np.sqrt(periods_per_year)
+    return balance, num_trades, num_wins, gross_win, gross_loss, max_drawdown, sharpe, sortino
+
+
+def simulate_batch(close, atr, exit_atr, signal, trend, friday_close, ready, pip_size, pip_value,
+                   initial_balance, leverage, atr_sl_multiplier, atr_tp_multiplier,
+                   base_risk_amount=160.0, dynamic_risk_factor=0.001, min_units=0.0001, max_units=5.0,
+                   periods_per_year=252 * 24) -> dict:
+    """
+    Simuliert viele (atr_sl_multiplier, atr_tp_multiplier)-Paare in einem Durchlauf über dieselben Bars.
+
+    SL/TP ändern nur den Ausstieg, nicht den Signalstrom – daher teilen sich alle Paare Kurse, ATR und Signale, und
+    der Positionszustand wird je Paar in Arrays der Länge len(atr_sl_multiplier) geführt (Bars außen, Paare innen).
+    Jedes Paar verhält sich exakt wie simulate_positions mit denselben Parametern. Statt Equity-Kurven und
+    Trade-Listen werden die Kennzahlen laufend berechnet (wie compute_metrics), der Speicher wächst nur mit der
+    Anzahl der Paare.
+
+    :return: dict mit Arrays je Paar: final_balance, total_profit, num_trades, win_rate, profit_factor,
+             max_drawdown (negativ wie in calculate_performance), sharpe, sortino
+    """
+    atr_sl_multiplier = np.ascontiguousarray(atr_sl_multiplier, dtype=np.float64)
+    atr_tp_multiplier = np.ascontiguousarray(atr_tp_multiplier, dtype=np.float64)
+    if atr_sl_multiplier.shape != atr_tp_multiplier.shape:
+        raise ValueError("atr_sl_multiplier und atr_tp_multiplier müssen gleich lang sein")
+    balance, num_trades, num_wins, gross_win, gross_loss, max_drawdown, sharpe, sortino = _simulate_batch(
+        np.ascontiguousarray(close, dtype=np.float64), np.ascontiguousarray(atr, dtype=np.float64),
+        np.ascontiguousarray(exit_atr, dtype=np.float64), np.ascontiguousarray(signal, dtype=np.int8),
+        np.ascontiguousarray(trend, dtype=np.int8), np.ascontiguousarray(friday_close, dtype=np.bool_),
+        np.ascontiguousarray(ready, dtype=np.bool_), np.ascontiguousarray(pip_size, dtype=np.float64),
+        np.ascontiguousarray(pip_value, dtype=np.float64), float(initial_balance), float(leverage),
+        atr_sl_multiplier, atr_tp_multiplier, float(base_risk_amount), float(dynamic_risk_factor),
+        float(min_units), float(max_units), float(periods_per_year)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(num_trades > 0, num_wins / num_trades, 0.0)
+        profit_factor = np.where(num_trades == 0, 0.0, np.where(gross_loss > 0, gross_win / gross_loss, np.inf))
+    return {
+        "final_balance": balance,
+        "total_profit": gross_win - gross_loss,
+        "num_trades": num_trades,
+        "win_rate": win_rate,
+        "profit_factor": profit_factor,
+        "max_drawdown": -max_drawdown,
+        "sharpe": sharpe,
+        "sortino": sortino,
+    }
+
+
+def simulate_portfolio(close, atr, exit_atr, signal, trend, friday_close, ready, pip_size, pip_value,
+                       initial_balance, leverage, atr_sl_multiplier, atr_tp_multiplier, max_open_positions,
+                       base_risk_amount=160.0, dynamic_risk_factor=0.001, min_units=0.0001, max_units=5.0) -> dict:
+    """
+    Portfolio-Variante von simulate_positions: alle Symbole laufen auf einer gemeinsamen Zeitachse mit einer
+    gemeinsamen Balance, höchstens max_open_positions Positionen sind gleichzeitig offen.
+
+    Alle Bar-Eingaben sind Matrizen (Bars x Symbole), atr_sl_multiplier/atr_tp_multiplier Vektoren je Symbol. Pro
+    Bar wird die Symbol-Dimension vektorisiert verarbeitet: zuerst Ausstiege (SL, Trailing TP, Trendwechsel,
+    Freitags-Close) aller Symbole, dann Einstiege mit der danach verfügbaren Balance. Übersteigen die Einstiegssignale
+    die freien Plätze, gewinnen die Symbole in Spaltenreihenfolge. Bars, an denen ein Symbol keine Kerze hat, sind
+    über ready ausgeschlossen; close muss dort vorwärts aufgefüllt sein (Bewertung offener Positionen).
+
+    Mit einem Symbol und max_open_positions >= 1 entspricht das Ergebnis exakt simulate_positions.
+
+    :return: dict mit balance/equity/open_count (Anzahl offener Positionen) je Bar, position-Matrix, Anzahl verarbeiteter Bars,
+             Trade-Array (PORTFOLIO_TRADE_DTYPE, nach Ausstieg sortiert) und den am Ende offenen Positionen
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n, m = close.shape
+    atr_sl_multiplier = np.asarray(atr_sl_multiplier, dtype=np.float64)
+    atr_tp_multiplier = np.asarray(atr_tp_multiplier, dtype=np.float64)
+    balance_out = np.full(n, np.nan)
+    equity_out = np.full(n, np.nan)
+    open_out = np.zeros(n, dtype=np.int64)
+    position_out = np.zeros((n, m), dtype=np.int8)
+
+    balance = float(initial_balance)
+    position = np.zeros(m, dtype=np.int8)
+    entry_index = np.zeros(m, dtype=np.int64)
+    entry_price = np.zeros(m)
+    units = np.zeros(m)
+    risk = np.zeros(m)
+    extreme_price = np.full(m, np.nan)
+    closed = []
+    bars = n
+
+    for i in range(1, n):
+        price = close[i]
+        if balance <= 0:
+            bars = i
+            break
+        is_open = position != 0
+        with np.errstate(invalid="ignore"):
+            unrealized = np.where(is_open, position * (price - entry_price) / pip_size[i] * units * pip_value[i] * leverage, 0.0)
+        balance_out[i] = balance
+        equity_out[i] = balance + unrealized.sum()
+
+        active = ready[i]
+        flat = active & ~is_open
+        exiting = active & is_open & friday_close[i]
+        long_open = active & (position == 1) & ~friday_close[i]
+        short_open = active & (position == -1) & ~friday_close[i]
+        with np.errstate(invalid="ignore"):
+            extreme_price = np.where(long_open & (np.isnan(extreme_price) | (price > extreme_price)), price, extreme_price)
+            extreme_price = np.where(short_open & (np.isnan(extreme_price) | (price < extreme_price)), price, extreme_price)
+            exiting |= long_open & ((price <= extreme_price - atr_tp_multiplier * exit_atr[i]) |
+                                    (price <= entry_price - atr_sl_multiplier * exit_atr[i]) | (trend[i] == -1))
+            exiting |= short_open & ((price >= extreme_price + atr_tp_multiplier * exit_atr[i]) |
+                                     (price >= entry_price + atr_sl_multiplier * exit_atr[i]) | (trend[i] == 1))
+        extreme_price[flat] = np.nan
+
+        if exiting.any():
+            columns = np.flatnonzero(exiting)
+            pips = position[columns] * (price[columns] - entry_price[columns]) / pip_size[i, columns]
+            profit = pips * units[columns] * pip_value[i, columns] * leverage
+            balance += float(profit.sum())
+            trades = np.empty(len(columns), dtype=PORTFOLIO_TRADE_DTYPE)
+            trades["entry_index"] = entry_index[columns]
+            trades["exit_index"] = i
+            trades["type"] = position[columns]
+            trades["entry_price"] = entry_price[columns]
+            trades["exit_price"] = price[columns]
+            trades["units"] = units[columns]
+            trades["pips"] = pips
+            trades["profit"] = profit
+            trades["risk"] = risk[columns]
+            trades["symbol"] = columns
+            closed.append(trades)
+            position[columns] = 0
+            entry_price[columns] = 0.0
+            units[columns] = 0.0
+            extreme_price[columns] = np.nan
+
+        entering = flat & (signal[i] != 0)
+        if entering.any():
+            free = max_open_positions - int(np.count_nonzero(position))
+            entering &= np.cumsum(entering) <= free
+            columns = np.flatnonzero(entering)
+            if len(columns):
+                sl_pips = atr_sl_multiplier[columns] * atr[i, columns] / pip_size[i, columns]
+                risk[columns] = base_risk_amount + max(balance, 0.0) * dynamic_risk_factor
+                units[columns] = np.minimum(np.maximum(risk[columns] / (sl_pips * pip_value[i, columns]), min_units), max_units)
+                position[columns] = signal[i, columns]
+                entry_index[columns] = i
+                entry_price[columns] = price[columns]
+        position_out[i] = position
+        open_out[i] = np.count_nonzero(position)
+
+    trades = np.concatenate(closed) if closed else np.empty(0, dtype=PORTFOLIO_TRADE_DTYPE)
+    open_columns = np.flatnonzero(position)
+    open_positions = [{"symbol": int(k), "type": int(position[k]), "entry_index": int(entry_index[k]),
+                       "entry_price": entry_price[k], "units": units[k], "risk": risk[k]} for k in open_columns]
+    return {"balance": balance_out, "equity": equity_out, "open_count": open_out, "position": position_out,
+            "bars": bars, "trades": trades, "open_positions": open_positions}
+
+
+def pip_arrays(close, platform, symbol):
+    """Pip-Größe und Pip-Wert je Bar wie in run_backtest (Binance: relativ zum Kurs, MetaTrader: Forex-Pips)."""
+    close = np.asarray(close, dtype=np.float64)
+    if platform == "binance":
+        return close * 0.0001, np.full(len(close), 0.1)
+    pip_size = np.full(len(close), 0.0001 if symbol != "USDJPY" else 0.01)
+    if symbol.endswith("USD") and symbol != "USDJPY":
+        return pip_size, np.full(len(close), 10.0)
+    return pip_size, 1000 / close
@@ -4,14 +4,26 @@ import numpy as np
 import matplotlib.pyplot as plt
 import talib
 from src.utils import logger
-from src.strategy import CompositeStrategy
+from src.strategy import CompositeStrategy, SIGNAL_LABELS
+from src.timeframe_alignment import align_higher_timeframe
+from src.backtest_kernel import simulate_positions, simulate_batch, pip_arrays, POSITION_LABELS, POSITION_LONG, POSITION_SHORT
+from src.trade_ledger import TradeLedger
+from src.tracing import Tracer
+from src.metrics import compute_metrics, SIDE_LONG, SIDE_SHORT
 import logging
 
 logger.info("=== NEW VERSION LOADED: backtesting_improved.py with enforced unit limits v12 (2025-03-15) ===")
 
+# Logger ohne Ausgabe für den speicherinternen Modus (artifacts=False)
+silent_logger = logging.getLogger("backtest_silent")
+silent_logger.addHandler(logging.NullHandler())
+silent_logger.propagate = False
+silent_logger.disabled = True
+
 def setup_detailed_logger(symbol):
     detailed_logger = logging.getLogger(f"detailed_{symbol}")
     detailed_logger.setLevel(logging.DEBUG)
+    close_detailed_logger(detailed_logger)  # Handler eines früheren Laufs nicht weiter ansammeln
     os.makedirs("results", exist_ok=True)
     handler = logging.FileHandler(f"results/debug_detailed_{symbol}.log", mode='w')
     handler.setLevel(logging.DEBUG)
@@ -20,44 +32,152 @@ def setup_detailed_logger(symbol):
     detailed_logger.addHandler(handler)
     return detailed_logger
 
-def run_backtest(df, strategy, config, df_higher=None, symbol=None, platform=None):
+def close_detailed_logger(detailed_logger):
+    for handler in list(detailed_logger.handlers):
+        detailed_logger.removeHandler(handler)
+        handler.close()
+
+def export_backtest_artifacts(symbol, trades, debug_data, results_dir="results", tracers=()):
+    """Schreibt debug_log_{symbol}.csv, trades_{symbol}.csv und nicht leere Traces (trace_{name}.csv) nach results_dir."""
+    os.makedirs(results_dir, exist_ok=True)
+    debug_path = os.path.join(results_dir, f"debug_log_{symbol}.csv")
+    pd.DataFrame(debug_data).to_csv(debug_path, index=False)
+    logger.info(f"Debug-Daten für {symbol} gespeichert in {debug_path}")
+    
+    trades_path = os.path.join(results_dir, f"trades_{symbol}.csv")
+    trade_df = trades.to_frame(symbol)
+    trade_df = trade_df[["symbol", "type", "entry_time", "exit_time", "entry_price", "exit_price", "units", "pips", "profit"]]
+    trade_df.to_csv(trades_path, index=False)
+    logger.info(f"Trade-Details für {symbol} gespeichert in {trades_path}")
+    
+    for tracer in tracers:
+        if len(tracer):
+            trace_path = os.path.join(results_dir, f"trace_{tracer.name}.csv")
+            tracer.dump(trace_path)
+            logger.info(f"Trace {tracer.name} ({len(tracer)} Einträge) gespeichert in {trace_path}")
+
+def risk_atr(df, atr_period=14):
+    """ATR für die Positionsgröße (risk_management.atr_period), Warm-up-Lücke rückwärts aufgefüllt."""
+    atr = talib.ATR(df["high"], df["low"], df["close"], timeperiod=atr_period)
+    return atr.bfill().fillna(atr.mean())
+
+def run_backtest(df, strategy, config, df_higher=None, symbol=None, platform=None, engine=None, artifacts=None,
+                 context=None):
+    """
+    Simuliert die Strategie Bar für Bar.
+
+    engine="incremental" (Standard) berechnet RSI/ATR/H4-Trend einmalig vorab und wertet jede Bar
+    in O(1) aus. engine="loop" ruft generate_signal() wie im Live-Betrieb auf dem jeweiligen Präfix
+    auf (O(n²)) und dient als Referenz – beide liefern identische Trades.
+
+    artifacts=False (z. B. je Tuning-Auswertung) rechnet rein im Speicher: kein Detail-Log, keine Log-Zeilen pro
+    Trade, keine CSV-Dateien. Standard ist backtest.artifacts aus der Konfiguration (True).
+
+    context: vorab berechneter Signal-Kontext (strategy.prepare_signal_context, optional mit "risk_atr") für genau
+    die Bars von df – z. B. ein Ausschnitt aus der vollständigen Historie, den mehrere Läufe gemeinsam nutzen. Die
+    Indikatoren hängen nicht von SL/TP ab und werden dann nicht neu berechnet (nur engine="incremental").
+    """
+    engine = engine or config.get("backtest", {}).get("engine", "incremental")
+    if engine not in ["incremental", "loop"]:
+        raise ValueError(f"Ungültige Backtest-Engine: {engine}. Erwartet: 'incremental' oder 'loop'")
+    if artifacts is None:
+        artifacts = config.get("backtest", {}).get("artifacts", True)
+    initial_balance = config["risk_management"].get("initial_balance", 16000)
+    
+    if platform not in ["binance", "metatrader"]:
+        raise ValueError(f"Ungültige Plattform: {platform}. Erwartet: 'binance' oder 'metatrader'")
+    leverage = config["trading"][platform].get("leverage", 1)
+    atr_period = config["risk_management"].get("atr_period", 14)
+    
+    log = logger if artifacts else silent_logger
+    detailed_logger = setup_detailed_logger(symbol) if artifacts else silent_logger
+    try:
+        log.info(f"Starting backtest for {platform}/{symbol} with leverage {leverage}")
+        detailed_logger.debug(f"Platform: {platform}, Symbol: {symbol}, Leverage: {leverage}")
+        
+        # ATR für SL/TP verwenden, kein fixed_sl_pips mehr
+        if context is not None and "risk_atr" in context:
+            df["atr"] = context["risk_atr"]
+        else:
+            df["atr"] = risk_atr(df, atr_period)
+        
+        df_sim = df.copy()
+        df_sim["balance"] = pd.Series(initial_balance, dtype=float)
+        df_sim["equity"] = pd.Series(initial_balance, dtype=float)
+        df_sim["position"] = "NONE"
+        detailed_logger.debug(f"Dataframe initialized: {len(df_sim)} rows")
+        tracer = Tracer.from_config(config, f"backtest_{symbol}")
+        if engine == "incremental":
+            trades, debug_data = _run_incremental(df_sim, strategy, df_higher, symbol, platform, leverage, initial_balance, log,
+                                                  artifacts, tracer, context)
+        else:
+            trades, debug_data = _run_loop(df_sim, strategy, df_higher, symbol, platform, leverage, initial_balance,
+                                           detailed_logger, log, tracer, artifacts)
+        
+        if artifacts:
+            export_backtest_artifacts(symbol, trades, debug_data, tracers=(tracer, strategy.tracer))
+    finally:
+        if artifacts:
+            close_detailed_logger(detailed_logger)
+    
+    return df_sim, trades
+
+def run_backtest_batch(df, strategy, config, atr_sl_multipliers, atr_tp_multipliers, df_higher=None, symbol=None,
+                       platform=None, context=None):
+    """
+    Bewertet viele (atr_sl_multiplier, atr_tp_multiplier)-Paare in einem Durchlauf (src/backtest_kernel.simulate_batch).
+
+    Signale und Indikatoren kommen aus strategy bzw. context (wie bei run_backtest); SL/TP der Strategie werden durch
+    die übergebenen Paare ersetzt. Rein im Speicher, ohne Artefakte.
+
+    :return: DataFrame mit einer Zeile je Paar: atr_sl_multiplier, atr_tp_multiplier, final_balance, total_profit,
+             num_trades, win_rate, profit_factor, max_drawdown, sharpe, sortino – jeweils identisch zu
+             calculate_performance(run_backtest(...)) mit diesen Parametern
+    """
+    if platform not in ["binance", "metatrader"]:
+        raise ValueError(f"Ungültige Plattform: {platform}. Erwartet: 'binance' oder 'metatrader'")
     initial_balance = config["risk_management"].get("initial_balance", 16000)
+    leverage = config["trading"][platform].get("leverage", 1)
+    atr_period = config["risk_management"].get("atr_period", 14)
+    if context is None:
+        context = strategy.prepare_signal_context(df, df_higher)
+    atr = context["risk_atr"] if "risk_atr" in context else risk_atr(df, atr_period).to_numpy()
+    close = context["close"]
+    pip_size, pip_value = pip_arrays(close, platform, symbol)
+    min_units = 0.0001 if platform == "binance" else 0.01
+    atr_sl_multipliers = np.asarray(atr_sl_multipliers, dtype=float)
+    atr_tp_multipliers = np.asarray(atr_tp_multipliers, dtype=float)
+    metrics = simulate_batch(
+        close, atr, context["atr"], context["signal"], context["trend"], context["friday_close"], context["ready"],
+        pip_size, pip_value, initial_balance, leverage, atr_sl_multipliers, atr_tp_multipliers,
+        strategy.initial_balance * strategy.base_risk, strategy.dynamic_risk_factor, min_units, 5.0
+    )
+    return pd.DataFrame({"atr_sl_multiplier": atr_sl_multipliers, "atr_tp_multiplier": atr_tp_multipliers, **metrics})
+
+def _run_loop(df_sim, strategy, df_higher, symbol, platform, leverage, initial_balance, detailed_logger, log=logger,
+              tracer=None, collect_debug=True):
+    """Referenz-Engine: ruft generate_signal() pro Bar auf dem Präfix auf und bucht Positionen in Python."""
+    if tracer is None:
+        tracer = Tracer("backtest")
     balance = initial_balance
     equity = initial_balance
     position = "NONE"
     prev_position = "NONE"
     entry_price = 0
+    entry_index = None
     units = 0
-    trades = []
+    risk_per_trade = 0
+    trades = TradeLedger(df_sim.index)
     equity_curve = []
     debug_data = []
-    
-    if platform not in ["binance", "metatrader"]:
-        raise ValueError(f"Ungültige Plattform: {platform}. Erwartet: 'binance' oder 'metatrader'")
-    leverage = config["trading"][platform].get("leverage", 1)
-    atr_period = config["risk_management"].get("atr_period", 14)
-    
-    detailed_logger = setup_detailed_logger(symbol)
-    logger.info(f"Starting backtest for {platform}/{symbol} with leverage {leverage}")
-    detailed_logger.debug(f"Platform: {platform}, Symbol: {symbol}, Leverage: {leverage}")
-    
-    # ATR für SL/TP verwenden, kein fixed_sl_pips mehr
-    df["atr"] = talib.ATR(df["high"], df["low"], df["close"], timeperiod=atr_period)
-    df["atr"] = df["atr"].fillna(method="bfill").fillna(df["atr"].mean())
-    
-    df_sim = df.copy()
-    df_sim["balance"] = pd.Series(initial_balance, dtype=float)
-    df_sim["equity"] = pd.Series(initial_balance, dtype=float)
-    df_sim["position"] = "NONE"
-    detailed_logger.debug(f"Dataframe initialized: {len(df_sim)} rows")
+    # Position der letzten verwendbaren Higher-Bar je Bar, statt df_higher pro Bar zu maskieren
+    higher_pos = align_higher_timeframe(df_sim.index, df_higher.index, closed_only=strategy.higher_tf_closed_only)
     
     for i in range(1, len(df_sim)):
         current_time = df_sim.index[i]
         current_close = df_sim["close"].iloc[i]
         atr = df_sim["atr"].iloc[i]
         
-        detailed_logger.debug(f"Processing timestamp: {current_time}, Close: {current_close}, ATR: {atr}")
-        
         if balance <= 0:
             logger.error(f"{symbol}: Balance negativ ({balance}), Backtest abgebrochen.")
             detailed_logger.error(f"Balance negativ: {balance}, stopping backtest")
@@ -68,25 +188,21 @@ def run_backtest(df, strategy, config, df_higher=None, symbol=None, platform=Non
         pip_value = 0.1 if platform == "binance" else (10 if symbol.endswith("USD") and symbol != "USDJPY" else (1000 / current_close))
         
         if position != "NONE":
-            detailed_logger.debug(f"Position active - Pip Value: {pip_value}, Pip Size: {pip_size}, Units: {units}")
             if position == "LONG":
                 price_diff = (current_close - entry_price)
                 pips = price_diff / pip_size
                 equity = balance + (pips * units * pip_value * leverage)
-                detailed_logger.debug(f"LONG - Price Diff: {price_diff}, Pips: {pips}, Equity: {equity}")
             elif position == "SHORT":
                 price_diff = (entry_price - current_close)
                 pips = price_diff / pip_size
                 equity = balance + (pips * units * pip_value * leverage)
-                detailed_logger.debug(f"SHORT - Price Diff: {price_diff}, Pips: {pips}, Equity: {equity}")
         else:
             equity = balance
-            detailed_logger.debug(f"No position - Equity set to Balance: {equity}")
         
         df_sim.at[current_time, "balance"] = balance
         df_sim.at[current_time, "equity"] = equity
         
-        if prev_position != position:
+        if collect_debug and prev_position != position:  # Debug-Einträge nur für den Artefakt-Export
             debug_entry = {
                 "time": current_time,
                 "balance": balance,
@@ -98,51 +214,53 @@ def run_backtest(df, strategy, config, df_higher=None, symbol=None, platform=Non
                 "atr": atr,
                 "pip_value": pip_value if position != "NONE" or prev_position != "NONE" else 0,
                 "risk_per_trade": strategy.calculate_risk(),
-                "profit": trades[-1]["profit"] if trades and position == "NONE" else 0
+                "profit": trades["profit"][-1] if len(trades) and position == "NONE" else 0
             }
             debug_data.append(debug_entry)
-            detailed_logger.debug(f"Debug entry saved: {debug_entry}")
         
         prev_position = position
         df_sim.at[current_time, "position"] = position
         equity_curve.append(equity)
         
         strategy.balance = max(balance, 0)
-        detailed_logger.debug(f"Before signal - Balance: {balance}, Position: {position}")
         signal = strategy.generate_signal(
             df_sim.iloc[:i+1],
-            df_higher[df_higher.index <= current_time],
+            df_higher.iloc[:higher_pos[i] + 1],
             position,
             symbol,
             entry_price
         )
-        detailed_logger.debug(f"Signal generated: {signal}")
+        if tracer.enabled:
+            tracer.record("bar", time=current_time, close=current_close, atr=atr, pip_size=pip_size, pip_value=pip_value,
+                          balance=balance, equity=equity, position=position, units=units, signal=signal)
         
         if signal in ["BUY", "SELL"] and position == "NONE":
             # ATR-basierte SL-Berechnung
             sl_pips = strategy.atr_sl_multiplier * atr / pip_size
             risk_per_trade = strategy.calculate_risk()
             calculated_units = risk_per_trade / (sl_pips * pip_value)
-            detailed_logger.debug(f"{'BUY' if signal == 'BUY' else 'SELL'} - Pre-calc: risk_per_trade={risk_per_trade}, sl_pips={sl_pips}, pip_value={pip_value}, calculated_units={calculated_units}")
             
             if platform == "binance":
                 units = min(max(calculated_units, 0.0001), 5.0)  # Erhöhtes Maximum auf 5.0
                 if calculated_units > 5.0:
-                    logger.warning(f"{symbol} {'BUY' if signal == 'BUY' else 'SELL'}: Calculated units {calculated_units} exceeded 5.0, capped at {units}")
+                    log.warning(f"{symbol} {'BUY' if signal == 'BUY' else 'SELL'}: Calculated units {calculated_units} exceeded 5.0, capped at {units}")
                     detailed_logger.warning(f"{'BUY' if signal == 'BUY' else 'SELL'} - Calculated units {calculated_units} exceeded 5.0, capped at {units}")
             else:  # MetaTrader
                 units = min(max(calculated_units, 0.01), 5.0)  # Maximum 5.0 statt 100.0 für realistische Tests
                 if calculated_units > 5.0:
-                    logger.warning(f"{symbol} {'BUY' if signal == 'BUY' else 'SELL'}: Calculated units {calculated_units} exceeded 5.0, capped at {units}")
+                    log.warning(f"{symbol} {'BUY' if signal == 'BUY' else 'SELL'}: Calculated units {calculated_units} exceeded 5.0, capped at {units}")
                     detailed_logger.warning(f"{'BUY' if signal == 'BUY' else 'SELL'} - Calculated units {calculated_units} exceeded 5.0, capped at {units}")
             
-            detailed_logger.debug(f"{'BUY' if signal == 'BUY' else 'SELL'} - Post-calc: final_units={units}")
+            if tracer.enabled:
+                tracer.record("sizing", time=current_time, signal=signal, risk_per_trade=risk_per_trade, sl_pips=sl_pips,
+                              pip_value=pip_value, calculated_units=calculated_units, units=units)
             
             position = "LONG" if signal == "BUY" else "SHORT"
             entry_price = current_close
+            entry_index = i
             # Kein Balance-Abzug beim Öffnen
             df_sim.at[current_time, "position"] = position
-            logger.info(f"{symbol}-{'LONG' if signal == 'BUY' else 'SHORT'} eröffnet bei {entry_price}, Units: {units:.4f}, Risk: {risk_per_trade:.2f}")
+            log.info(f"{symbol}-{'LONG' if signal == 'BUY' else 'SHORT'} eröffnet bei {entry_price}, Units: {units:.4f}, Risk: {risk_per_trade:.2f}")
             detailed_logger.info(f"{'LONG' if signal == 'BUY' else 'SHORT'} opened - Entry Price: {entry_price}, Units: {units}, Balance after: {balance}")
         
         elif (signal == "CLOSE_LONG" and position == "LONG") or (signal == "CLOSE_SHORT" and position == "SHORT"):
@@ -151,114 +269,129 @@ def run_backtest(df, strategy, config, df_higher=None, symbol=None, platform=Non
                 pips = price_diff / pip_size
                 profit = pips * units * pip_value * leverage
                 balance += profit  # Balance nur hier aktualisieren
-                trades.append({
-                    "entry_time": trades[-1]["entry_time"] if trades else current_time,
-                    "exit_time": current_time,
-                    "entry_price": entry_price,
-                    "exit_price": current_close,
-                    "profit": profit,
-                    "type": "LONG",
-                    "units": units,
-                    "pips": pips
-                })
-                logger.info(f"{symbol}-LONG geschlossen bei {current_close}, Profit: {profit:.2f}")
+                trades.append(entry_index, i, POSITION_LONG, entry_price, current_close, units, pips, profit, risk_per_trade)
+                log.info(f"{symbol}-LONG geschlossen bei {current_close}, Profit: {profit:.2f}")
                 detailed_logger.info(f"LONG closed - Exit Price: {current_close}, Profit: {profit}, Units: {units}, Balance after: {balance}")
             elif position == "SHORT":
                 price_diff = (entry_price - current_close)
                 pips = price_diff / pip_size
                 profit = pips * units * pip_value * leverage
                 balance += profit  # Balance nur hier aktualisieren
-                trades.append({
-                    "entry_time": trades[-1]["entry_time"] if trades else current_time,
-                    "exit_time": current_time,
-                    "entry_price": entry_price,
-                    "exit_price": current_close,
-                    "profit": profit,
-                    "type": "SHORT",
-                    "units": units,
-                    "pips": pips
-                })
-                logger.info(f"{symbol}-SHORT geschlossen bei {current_close}, Profit: {profit:.2f}")
+                trades.append(entry_index, i, POSITION_SHORT, entry_price, current_close, units, pips, profit, risk_per_trade)
+                log.info(f"{symbol}-SHORT geschlossen bei {current_close}, Profit: {profit:.2f}")
                 detailed_logger.info(f"SHORT closed - Exit Price: {current_close}, Profit: {profit}, Units: {units}, Balance after: {balance}")
             
             position = "NONE"
             entry_price = 0
+            entry_index = None
             units = 0
             df_sim.at[current_time, "position"] = position
     
-    os.makedirs("results", exist_ok=True)
-    debug_df = pd.DataFrame(debug_data)
-    debug_df.to_csv(f"results/debug_log_{symbol}.csv", index=False)
-    logger.info(f"Debug-Daten für {symbol} gespeichert in results/debug_log_{symbol}.csv")
-    
-    trade_df = pd.DataFrame(trades)
-    trade_df["symbol"] = symbol
-    trade_df = trade_df[["symbol", "type", "entry_time", "exit_time", "entry_price", "exit_price", "units", "pips", "profit"]]
-    trade_df.to_csv(f"results/trades_{symbol}.csv", index=False)
-    logger.info(f"Trade-Details für {symbol} gespeichert in results/trades_{symbol}.csv")
-    
-    return df_sim, trades
+    return trades, debug_data
+
+def _run_incremental(df_sim, strategy, df_higher, symbol, platform, leverage, initial_balance, log=logger, collect_debug=True,
+                     tracer=None, context=None):
+    """Schnelle Engine: Signale einmalig vektorisiert, Positionen/PnL im Array-Kernel (src/backtest_kernel.py)."""
+    if context is None:
+        context = strategy.prepare_signal_context(df_sim, df_higher)
+    close = context["close"]
+    atr = df_sim["atr"].to_numpy(dtype=float)
+    pip_size, pip_value = pip_arrays(close, platform, symbol)
+    min_units = 0.0001 if platform == "binance" else 0.01
+    result = simulate_positions(
+        close, atr, context["atr"], context["signal"], context["trend"], context["friday_close"], context["ready"],
+        pip_size, pip_value, initial_balance, leverage, strategy.atr_sl_multiplier, strategy.atr_tp_multiplier,
+        strategy.initial_balance * strategy.base_risk, strategy.dynamic_risk_factor, min_units, 5.0
+    )
+    balance = result["balance"]
+    bars = result["bars"]
+    df_sim["balance"] = balance
+    df_sim["equity"] = result["equity"]
+    df_sim["position"] = np.array([POSITION_LABELS[p] for p in result["position"]], dtype=object)
+    if bars < len(df_sim):
+        logger.error(f"{symbol}: Balance negativ ({balance[bars - 1]}), Backtest abgebrochen.")
+    if bars > 1:
+        strategy.balance = max(balance[bars - 1], 0)
+
+    index = df_sim.index
+    if tracer is not None and tracer.enabled:
+        # Keine Python-Schleife pro Bar im Kernel: Bar-Einträge werden nachträglich aus den Arrays übernommen
+        for i in range(1, bars):
+            tracer.record("bar", time=index[i], close=close[i], atr=atr[i], pip_size=pip_size[i], pip_value=pip_value[i],
+                          balance=balance[i], equity=result["equity"][i], position=POSITION_LABELS[result["position"][i - 1]],
+                          signal=SIGNAL_LABELS[context["signal"][i]])
+    trades = TradeLedger.from_array(index, result["trades"])
+    debug_data = []
+    if not collect_debug:
+        return trades, debug_data  # Debug-Einträge und Log-Zeilen pro Trade nur für den Artefakt-Export
+
+    def add_debug_entry(i, position, entry_price, units, profit):
+        if i >= bars:
+            return
+        debug_data.append({
+            "time": index[i],
+            "balance": balance[i],
+            "equity": result["equity"][i],
+            "position": position,
+            "entry_price": entry_price,
+            "exit_price": close[i] if position == "NONE" else 0,
+            "units": units,
+            "atr": atr[i],
+            "pip_value": pip_value[i],
+            "risk_per_trade": strategy.initial_balance * strategy.base_risk + max(balance[i - 1], 0) * strategy.dynamic_risk_factor,
+            "profit": profit
+        })
+
+    def log_entry(side, i, entry_price, units, risk):
+        calculated_units = risk / (strategy.atr_sl_multiplier * atr[i] / pip_size[i] * pip_value[i])
+        if calculated_units > 5.0:
+            log.warning(f"{symbol} {'BUY' if side == 'LONG' else 'SELL'}: Calculated units {calculated_units} exceeded 5.0, capped at {units}")
+        log.info(f"{symbol}-{side} eröffnet bei {entry_price}, Units: {units:.4f}, Risk: {risk:.2f}")
+        add_debug_entry(i + 1, side, entry_price, units, 0)
+
+    for t in result["trades"]:
+        side = POSITION_LABELS[t["type"]]
+        entry_index, exit_index = int(t["entry_index"]), int(t["exit_index"])
+        log_entry(side, entry_index, t["entry_price"], t["units"], t["risk"])
+        log.info(f"{symbol}-{side} geschlossen bei {t['exit_price']}, Profit: {t['profit']:.2f}")
+        add_debug_entry(exit_index + 1, "NONE", 0, 0, t["profit"])
+
+    open_position = result["open_position"]
+    if open_position is not None:
+        log_entry(POSITION_LABELS[open_position["type"]], int(open_position["entry_index"]),
+                  open_position["entry_price"], open_position["units"], open_position["risk"])
+
+    return trades, debug_data
 
 # Rest des Codes (calculate_performance, visualize_backtest) bleibt unverändert
 
 def calculate_performance(df_sim, trades):
-    if not trades:
-        return {
-            "total_profit": 0,
-            "num_trades": 0,
-            "win_rate": 0,
-            "profit_factor": 0,
-            "max_drawdown": 0,
-            "sharpe": 0
-        }
-    
-    total_profit = sum(trade["profit"] for trade in trades)
-    num_trades = len(trades)
-    winning_trades = sum(1 for trade in trades if trade["profit"] > 0)
-    win_rate = winning_trades / num_trades if num_trades > 0 else 0
-    
-    gross_profit = sum(trade["profit"] for trade in trades if trade["profit"] > 0)
-    gross_loss = abs(sum(trade["profit"] for trade in trades if trade["profit"] < 0))
-    profit_factor = gross_profit / gross_loss if gross_loss > 0 else float("inf")
-    
-    equity_curve = df_sim["equity"].values
-    max_drawdown = 0
-    peak = equity_curve[0]
-    for equity in equity_curve:
-        if equity > peak:
-            peak = equity
-        drawdown = (peak - equity) / peak if peak > 0 else 0
-        max_drawdown = max(max_drawdown, drawdown)
-    
-    returns = df_sim["equity"].pct_change().dropna()
-    sharpe = (returns.mean() / returns.std()) * np.sqrt(252 * 24) if returns.std() > 0 else 0
-    
-    return {
-        "total_profit": total_profit,
-        "num_trades": num_trades,
-        "win_rate": win_rate,
-        "profit_factor": profit_factor,
-        "max_drawdown": -max_drawdown,
-        "sharpe": sharpe
-    }
+    """Kennzahlen über src/metrics.compute_metrics; trades als TradeLedger, strukturiertes Trade-Array oder Liste von Dicts."""
+    if isinstance(trades, TradeLedger):
+        trades = trades.trades
+    if isinstance(trades, np.ndarray):
+        profit, side = trades["profit"], trades["type"]
+        entry_index, exit_index = trades["entry_index"], trades["exit_index"]
+    else:
+        profit = np.array([trade["profit"] for trade in trades], dtype=float)
+        side = np.array([SIDE_LONG if trade["type"] == "LONG" else SIDE_SHORT for trade in trades], dtype=np.int8)
+        entry_index = df_sim.index.get_indexer([trade["entry_time"] for trade in trades])
+        exit_index = df_sim.index.get_indexer([trade["exit_time"] for trade in trades])
+    return compute_metrics(df_sim["equity"].to_numpy(dtype=float), profit, side, entry_index, exit_index)
 
 def visualize_backtest(df_sim, trades, title="Backtest"):
     plt.figure(figsize=(14, 7))
     plt.plot(df_sim.index, df_sim["close"], label="Schlusskurs", color="blue")
     
-    for trade in trades:
-        entry_time = trade["entry_time"]
-        exit_time = trade["exit_time"]
-        entry_price = trade["entry_price"]
-        exit_price = trade["exit_price"]
-        trade_type = trade["type"]
-        
-        if trade_type == "LONG":
-            plt.scatter(entry_time, entry_price, marker="^", color="green", label="LONG-OPEN" if "LONG-OPEN" not in plt.gca().get_legend_handles_labels()[1] else "", s=100)
-            plt.scatter(exit_time, exit_price, marker="v", color="black", label="LONG-CLOSE" if "LONG-CLOSE" not in plt.gca().get_legend_handles_labels()[1] else "", s=100)
-        elif trade_type == "SHORT":
-            plt.scatter(entry_time, entry_price, marker="^", color="red", label="SHORT-OPEN" if "SHORT-OPEN" not in plt.gca().get_legend_handles_labels()[1] else "", s=100)
-            plt.scatter(exit_time, exit_price, marker="v", color="darkred", label="SHORT-CLOSE" if "SHORT-CLOSE" not in plt.gca().get_legend_handles_labels()[1] else "", s=100)
+    # Eine scatter-Serie pro Marker statt zwei Aufrufen pro Trade
+    entry_time, exit_time = trades["entry_time"], trades["exit_time"]
+    entry_price, exit_price = trades["entry_price"], trades["exit_price"]
+    for side, open_color, close_color in ((POSITION_LONG, "green", "black"), (POSITION_SHORT, "red", "darkred")):
+        mask = trades.sides(side)
+        if mask.any():
+            label = POSITION_LABELS[side]
+            plt.scatter(entry_time[mask], entry_price[mask], marker="^", color=open_color, label=f"{label}-OPEN", s=100)
+            plt.scatter(exit_time[mask], exit_price[mask], marker="v", color=close_color, label=f"{label}-CLOSE", s=100)
     
     plt.title(title)
     plt.xlabel("Zeit")
@@ -2,10 +2,12 @@ import os
 import time
 import hmac
 import hashlib
-import requests
 import urllib.parse
 import pandas as pd
 from dotenv import load_dotenv
+from src.http_transport import HttpTransport
+from src.account_state import AccountStateCache
+from src.utils import logger
 
 load_dotenv()
 
@@ -13,7 +15,7 @@ load_dotenv()
 class BinanceConnector:
     """Hauptklasse für die Binance API (Live & Testnet)."""
 
-    def __init__(self, testnet=True):
+    def __init__(self, testnet=True, http_config=None, account_max_age=5.0):
         self.api_key = (
             os.getenv("BINANCE_TESTNET_API_KEY")
             if testnet
@@ -29,8 +31,11 @@ class BinanceConnector:
             if testnet
             else "https://api.binance.com"
         )
-        self.session = requests.Session()
-        self.session.headers.update({"X-MBX-APIKEY": self.api_key})
+        # Ein Transport (Connection-Pool, Keep-Alive, Timeouts, Retries, Latenzen) für alle Aufrufe des Connectors
+        self.transport = HttpTransport.from_config(self.base_url, http_config, headers={"X-MBX-APIKEY": self.api_key})
+        self.session = self.transport.session
+        # Kontostand und Positionen aller Symbole aus einem /fapi/v2/account-Request je Zyklus
+        self.account = AccountStateCache(self, max_age=account_max_age)
 
         # ✅ API-Schlüssel Überprüfung
         if not self.api_key or not self.secret_key:
@@ -44,26 +49,31 @@ class BinanceConnector:
             self.secret_key.encode(), query_string.encode(), hashlib.sha256
         ).hexdigest()
 
+    def signed_query(self, params: dict) -> str:
+        """Query-String mit aktuellem Zeitstempel und Signatur (bei jedem Versuch neu, siehe HttpTransport.request)."""
+        params["timestamp"] = int(time.time() * 1000)
+        query_string = urllib.parse.urlencode(params)
+        return f"{query_string}&signature={self.sign(query_string)}"
+
+    def signed_request(self, method: str, endpoint: str, params: dict = None):
+        """Signierter Aufruf über den gemeinsamen Transport; liefert die requests.Response."""
+        return self.transport.request(method, endpoint, params, prepare=self.signed_query)
+
+    def latency_stats(self) -> dict:
+        """Latenz-Perzentile je Endpunkt (siehe LatencyStats.summary)."""
+        return self.transport.stats.summary()
+
     def get_server_time(self):
         """Holt die aktuelle Serverzeit von Binance (Live & Testnet unterscheiden)."""
         endpoint = "/api/v3/time" if "binance.com" in self.base_url else "/fapi/v1/time"
-        url = f"{self.base_url}{endpoint}"
-        response = self.session.get(url)
+        response = self.transport.request("GET", endpoint)
         return response.json()
 
     def get_account_info(self):
         """Ruft die Kontoinformationen von Binance ab."""
-        endpoint = "/fapi/v2/account"
-        timestamp = int(time.time() * 1000)
-        params = {"timestamp": timestamp}
-        query_string = urllib.parse.urlencode(params)
-        query_string += f"&signature={self.sign(query_string)}"
-        url = f"{self.base_url}{endpoint}?{query_string}"
-
-        response = self.session.get(url)
+        response = self.signed_request("GET", "/fapi/v2/account")
         data = response.json()
-
-        print("🔍 API Response:", data)  # Debugging-Ausgabe
+        logger.debug(f"Kontoinformationen (HTTP {response.status_code}): {data}")
 
         if response.status_code != 200:
             raise Exception(f"API-Fehler: {data}")
@@ -78,20 +88,37 @@ class BinanceConnector:
                     return float(asset_data["walletBalance"])
         raise Exception(f"Kein Futures-Guthaben für {asset} gefunden!")
 
+    def get_position_risk(self, symbol: str) -> list:
+        """Positionsdaten (positionAmt, entryPrice, ...) eines Symbols."""
+        response = self.signed_request("GET", "/fapi/v2/positionRisk", {"symbol": symbol})
+        data = response.json()
+        if response.status_code != 200:
+            raise Exception(f"API-Fehler: {data}")
+        return data
+
+    def get_position_size(self, symbol: str) -> float:
+        """Betrag der offenen Position (positionAmt ohne Vorzeichen, aus dem Konto-Snapshot), 0 ohne Position."""
+        return abs(self.account.position_amount(symbol))
+
+    def create_listen_key(self) -> str:
+        """Legt den Listen-Key für den User-Data-Stream an (nur API-Key, keine Signatur)."""
+        response = self.transport.request("POST", "/fapi/v1/listenKey")
+        data = response.json()
+        if response.status_code != 200:
+            raise Exception(f"API-Fehler: {data}")
+        return data["listenKey"]
+
+    def keepalive_listen_key(self):
+        """Verlängert den Listen-Key um 60 Minuten."""
+        self.transport.request("PUT", "/fapi/v1/listenKey")
+
+    def close_listen_key(self):
+        self.transport.request("DELETE", "/fapi/v1/listenKey")
+
     def get_ohlcv(self, symbol: str, interval: str, limit: int = 500) -> pd.DataFrame:
         """Holt OHLCV-Daten als Pandas DataFrame."""
-        endpoint = "/fapi/v1/klines"
-        params = {
-            "symbol": symbol,
-            "interval": interval,
-            "limit": limit,
-            "timestamp": int(time.time() * 1000),
-        }
-        query_string = urllib.parse.urlencode(params)
-        query_string += f"&signature={self.sign(query_string)}"
-        url = f"{self.base_url}{endpoint}?{query_string}"
-
-        response = self.session.get(url)
+        params = {"symbol": symbol, "interval": interval, "limit": limit}
+        response = self.signed_request("GET", "/fapi/v1/klines", params)
         data = response.json()
         if isinstance(data, dict) and "msg" in data:
             raise Exception(f"API-Fehler: {data}")
@@ -121,23 +148,17 @@ class BinanceConnector:
 
     def create_market_order(self, symbol: str, side: str, quantity: float) -> dict:
         """Platziert eine Market Order."""
-        endpoint = "/fapi/v1/order"
-        timestamp = int(time.time() * 1000)
         params = {
             "symbol": symbol,
             "side": side.upper(),
             "type": "MARKET",
             "quantity": quantity,
-            "timestamp": timestamp,
         }
-        query_string = urllib.parse.urlencode(params)
-        query_string += f"&signature={self.sign(query_string)}"
-        url = f"{self.base_url}{endpoint}?{query_string}"
-
-        response = self.session.post(url, data=params)
+        response = self.signed_request("POST", "/fapi/v1/order", params)
         data = response.json()
         if response.status_code != 200:
             raise Exception(f"Order-Fehler: {data}")
+        self.account.invalidate(f"Order {symbol} {side.upper()}")
         return data
 
 
@@ -145,5 +166,5 @@ class BinanceConnector:
 class BinanceTestnetConnector(BinanceConnector):
     """Binance API Connector für das Testnet."""
 
-    def __init__(self):
-        super().__init__(testnet=True)
+    def __init__(self, http_config=None, account_max_age=5.0):
+        super().__init__(testnet=True, http_config=http_config, account_max_age=account_max_age)
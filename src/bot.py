@@ -1,19 +1,19 @@
 # src/bot.py
 import os
 import time
-import requests
 import pandas as pd
-import urllib.parse
-import hashlib
-import talib
-import hmac
 import yaml
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from src.utils import logger
 from src.strategy import CompositeStrategy
+from src.indicators import SymbolIndicators
 from src.order_execution import execute_order
 from src.binance_connector import BinanceConnector, BinanceTestnetConnector
 from src.metatrader_connector import MetaTraderConnector
+from src.kline_stream import KlineStream, FUTURES_WS_URL, TESTNET_WS_URL
+from src.user_data_stream import UserDataStream
 import MetaTrader5 as mt5
 
 load_dotenv()
@@ -31,6 +31,18 @@ class TradingBot:
         self.connectors = {}
         self.strategies = {}
         self.running = False  # Zustand des Bots
+        bot_config = config.get("bot", {})
+        self.poll_interval = bot_config.get("poll_interval", 60)
+        self.bar_close_delay = bot_config.get("bar_close_delay", 1.0)
+        self.max_workers = bot_config.get("max_workers", 8)
+        self.market_data = bot_config.get("market_data", "poll")  # "poll" (REST) oder "stream" (WebSocket, nur Binance)
+        self.stream_buffer = bot_config.get("stream_buffer", 500)
+        self.stream = None
+        self.user_data = bot_config.get("user_data", "poll")  # "stream": Positionen/Fills per User-Data-Stream (Binance)
+        self.user_stream = None
+        self.executor = None
+        self.last_cycle_stats = {}
+        self._mt5_lock = threading.Lock()  # MetaTrader5-API ist nicht für parallele Aufrufe ausgelegt
         
         # Initialisiere Plattformen und Symbole
         self.platforms = []
@@ -38,7 +50,11 @@ class TradingBot:
             self.platforms.append("binance")
             trade_conf = config["trading"]["binance"]
             use_testnet = trade_conf.get("use_testnet", True)
-            self.connectors["binance"] = BinanceTestnetConnector() if use_testnet else BinanceConnector()
+            http_config = config.get("http")
+            account_max_age = config.get("account", {}).get("max_age", 5.0)
+            self.connectors["binance"] = (BinanceTestnetConnector(http_config=http_config, account_max_age=account_max_age)
+                                          if use_testnet else BinanceConnector(http_config=http_config,
+                                                                               account_max_age=account_max_age))
             for symbol in trade_conf["symbols"].keys():
                 self.strategies[symbol] = CompositeStrategy(config, symbol=symbol)
         
@@ -49,6 +65,10 @@ class TradingBot:
             for symbol in trade_conf["symbols"].keys():
                 self.strategies[symbol] = CompositeStrategy(config, symbol=symbol)
 
+        # Ein Indikator-Zustand pro Symbol, den Strategie und Bot gemeinsam fortschreiben
+        for strategy in self.strategies.values():
+            strategy.indicators = SymbolIndicators.for_strategy(strategy)
+
     def _map_timeframe_mt(self, tf_str):
         mapping = {
             "M1": mt5.TIMEFRAME_M1, "M5": mt5.TIMEFRAME_M5, "M15": mt5.TIMEFRAME_M15,
@@ -63,43 +83,64 @@ class TradingBot:
             return connector.get_ohlcv(symbol, timeframe)
         elif platform == "metatrader":
             mt_tf = self._map_timeframe_mt(timeframe)
-            return connector.get_ohlcv(symbol, mt_tf, limit=100)
+            with self._mt5_lock:
+                return connector.get_ohlcv(symbol, mt_tf, limit=100)
+
+    def fetch_market_state(self, executor, platforms=None):
+        """Lädt Bars (Timeframe + Higher Timeframe) und Positionen aller Symbole parallel."""
+        futures = {}
+        for platform in platforms or self.platforms:
+            trade_conf = self.config["trading"][platform]
+            for symbol in trade_conf["symbols"].keys():
+                futures[(platform, symbol)] = (
+                    executor.submit(self.fetch_data, platform, symbol, trade_conf["timeframe"]),
+                    executor.submit(self.fetch_data, platform, symbol, trade_conf["higher_timeframe"]),
+                    executor.submit(self.get_current_position, platform, symbol),
+                )
+        states = {}
+        for key, (df_future, higher_future, position_future) in futures.items():
+            try:
+                states[key] = (df_future.result(), higher_future.result(), position_future.result())
+            except Exception as e:
+                logger.error(f"Fehler beim Abrufen der Daten für {key[0]}/{key[1]}: {e}")
+        return states
 
     def get_current_position(self, platform, symbol):
         connector = self.connectors[platform]
         if platform == "binance":
-            endpoint = "/fapi/v2/positionRisk"
-            timestamp = int(time.time() * 1000)
-            params = {"timestamp": timestamp, "symbol": symbol}
-            query_string = urllib.parse.urlencode(params)
-            signature = hmac.new(connector.secret_key.encode(), query_string.encode(), hashlib.sha256).hexdigest()
-            params["signature"] = signature
-            headers = {"X-MBX-APIKEY": connector.api_key}
-            url = f"{connector.base_url}{endpoint}?{urllib.parse.urlencode(params)}"
             try:
-                response = requests.get(url, headers=headers)
-                data = response.json()
-                pos_amt = float(data[0].get("positionAmt", 0))
-                if pos_amt > 0:
-                    return "LONG"
-                elif pos_amt < 0:
-                    return "SHORT"
-                return "NONE"
+                book = self.position_book()
+                if book is not None:
+                    return book.position(symbol)  # ohne Netzwerk, per Stream aktuell gehalten
+                # Ein gemeinsamer Konto-Snapshot je Zyklus statt positionRisk pro Symbol
+                return connector.account.position(symbol)
             except Exception as e:
                 logger.error(f"Fehler beim Abrufen der Position für {symbol}: {e}")
                 return "NONE"
         elif platform == "metatrader":
-            positions = mt5.positions_get(symbol=symbol)
+            with self._mt5_lock:
+                positions = mt5.positions_get(symbol=symbol)
             if positions:
                 pos = positions[0]
                 return "LONG" if pos.type == mt5.ORDER_TYPE_BUY else "SHORT"
             return "NONE"
 
-    def manage_trailing_tp(self, platform, symbol, position, entry_price, highest_price, lowest_price):
+    def position_book(self):
+        """PositionBook des verbundenen User-Data-Streams oder None (dann REST-Snapshot)."""
+        if self.user_stream is not None and self.user_stream.connected.is_set():
+            return self.user_stream.book
+        return None
+
+    def position_size(self, connector, symbol):
+        book = self.position_book()
+        return abs(book.position_amount(symbol)) if book is not None else connector.get_position_size(symbol)
+
+    def manage_trailing_tp(self, platform, symbol, position, entry_price, highest_price, lowest_price, df=None):
         connector = self.connectors[platform]
         strategy = self.strategies[symbol]
-        df = self.fetch_data(platform, symbol, self.config["trading"][platform]["timeframe"])
-        atr = talib.ATR(df['high'], df['low'], df['close'], timeperiod=strategy.atr_period).iloc[-1]
+        if df is None:
+            df = self.fetch_data(platform, symbol, self.config["trading"][platform]["timeframe"])
+        atr = strategy.current_atr(df)
         current_price = df['close'].iloc[-1]
 
         if position == "LONG":
@@ -111,13 +152,10 @@ class TradingBot:
                         "symbol": symbol,
                         "side": "SELL",
                         "type": "MARKET",
-                        "quantity": connector.get_position_size(symbol),
-                        "timestamp": int(time.time() * 1000)
+                        "quantity": self.position_size(connector, symbol),
                     }
-                    query = urllib.parse.urlencode(params)
-                    signature = hmac.new(connector.secret_key.encode(), query.encode(), hashlib.sha256).hexdigest()
-                    params["signature"] = signature
-                    requests.post(f"{connector.base_url}/fapi/v1/order", params=params, headers={"X-MBX-APIKEY": connector.api_key})
+                    connector.signed_request("POST", "/fapi/v1/order", params)
+                    connector.account.invalidate(f"Close {symbol}")
                 elif platform == "metatrader":
                     mt5.Close(symbol)
                 logger.info(f"{platform}/{symbol}: Position geschlossen bei {current_price}")
@@ -130,46 +168,136 @@ class TradingBot:
                         "symbol": symbol,
                         "side": "BUY",
                         "type": "MARKET",
-                        "quantity": connector.get_position_size(symbol),
-                        "timestamp": int(time.time() * 1000)
+                        "quantity": self.position_size(connector, symbol),
                     }
-                    query = urllib.parse.urlencode(params)
-                    signature = hmac.new(connector.secret_key.encode(), query.encode(), hashlib.sha256).hexdigest()
-                    params["signature"] = signature
-                    requests.post(f"{connector.base_url}/fapi/v1/order", params=params, headers={"X-MBX-APIKEY": connector.api_key})
+                    connector.signed_request("POST", "/fapi/v1/order", params)
+                    connector.account.invalidate(f"Close {symbol}")
                 elif platform == "metatrader":
                     mt5.Close(symbol)
                 logger.info(f"{platform}/{symbol}: Position geschlossen bei {current_price}")
 
+    def evaluate_symbol(self, platform, symbol, df, daily_df, current_position):
+        """Wertet die Strategie für ein Symbol aus und eröffnet bzw. verwaltet die Position."""
+        trade_conf = self.config["trading"][platform]
+        logger.info(f"Aktuelle Position ({platform}/{symbol}): {current_position}")
+
+        signal = self.strategies[symbol].generate_signal(df, daily_df, current_position, symbol)
+        logger.info(f"Generiertes Signal für {platform}/{symbol}: {signal}")
+
+        if signal in ["BUY", "SELL"] and current_position == "NONE":
+            entry_price = df['close'].iloc[-1]
+            atr = self.strategies[symbol].current_atr(df)
+            stop_loss_price = entry_price - atr * self.strategies[symbol].atr_sl_multiplier if signal == "BUY" else entry_price + atr * self.strategies[symbol].atr_sl_multiplier
+            execute_order(self.connectors[platform], symbol, signal, entry_price, stop_loss_price, None, trade_conf["leverage"])
+        elif current_position != "NONE":
+            highest_price = self.strategies[symbol].highest_price or df['close'].max()
+            lowest_price = self.strategies[symbol].lowest_price or df['close'].min()
+            book = self.position_book() if platform == "binance" else None
+            entry_price = book.entry_price(symbol) if book is not None else None
+            if entry_price is None:
+                entry_price = df['close'].iloc[0]
+            self.manage_trailing_tp(platform, symbol, current_position, entry_price, highest_price, lowest_price, df=df)
+
+    def run_cycle(self, executor, platforms=None):
+        """Ein Durchlauf über alle Symbole: Daten parallel abrufen, dann Signale auswerten und handeln."""
+        cycle_start = time.perf_counter()
+        self.refresh_account_state()
+        states = self.fetch_market_state(executor, platforms)
+        fetch_ms = (time.perf_counter() - cycle_start) * 1000
+
+        for (platform, symbol), (df, daily_df, current_position) in states.items():
+            self.evaluate_symbol(platform, symbol, df, daily_df, current_position)
+
+        total_ms = (time.perf_counter() - cycle_start) * 1000
+        self.last_cycle_stats = {"symbols": len(states), "fetch_ms": fetch_ms, "total_ms": total_ms, "finished_at": time.time(),
+                                 "http": self.http_latency()}
+        logger.info(f"Zyklus abgeschlossen: {len(states)} Symbole, Datenabruf {fetch_ms:.0f} ms, gesamt {total_ms:.0f} ms")
+        for endpoint, stats in self.last_cycle_stats["http"].items():
+            logger.info(f"HTTP {endpoint}: {stats['count']} Requests, {stats['errors']} Fehler, "
+                        f"p50 {stats['p50_ms']:.0f} ms, p90 {stats['p90_ms']:.0f} ms, p99 {stats['p99_ms']:.0f} ms")
+        return self.last_cycle_stats
+
+    def refresh_account_state(self):
+        """Zu Beginn eines Zyklus: Konto-Snapshot verwerfen, der erste Zugriff lädt alle Positionen mit einem Request."""
+        account = getattr(self.connectors.get("binance"), "account", None)
+        if account is not None:
+            account.invalidate()
+
+    def http_latency(self):
+        """Latenz-Perzentile je REST-Endpunkt des Binance-Connectors (leer ohne Binance)."""
+        latency_stats = getattr(self.connectors.get("binance"), "latency_stats", None)
+        return latency_stats() if latency_stats is not None else {}
+
+    def seconds_until_next_cycle(self, now=None):
+        """Wartezeit bis zum nächsten Vielfachen von poll_interval (z. B. volle Minute) plus bar_close_delay.
+
+        Da jeder Kerzenschluss auf ein solches Vielfaches fällt, startet direkt nach dem Schluss ein Zyklus.
+        """
+        now = now if now is not None else time.time()
+        return self.poll_interval - (now % self.poll_interval) + self.bar_close_delay
+
+    def on_candle_close(self, symbol, interval):
+        """
+        Callback des Kline-Streams: bei Schluss einer Timeframe-Kerze wird das Symbol im Thread-Pool ausgewertet.
+
+        Die Kerzen werden hier im Thread des WebSockets kopiert – später gelesen, könnte der Puffer schon die nächste,
+        noch laufende Kerze enthalten.
+        """
+        trade_conf = self.config["trading"]["binance"]
+        if interval == trade_conf["timeframe"]:
+            df = self.stream.frame(symbol, trade_conf["timeframe"])
+            daily_df = self.stream.frame(symbol, trade_conf["higher_timeframe"])
+            self.executor.submit(self.evaluate_streamed_symbol, symbol, df, daily_df)
+
+    def evaluate_streamed_symbol(self, symbol, df, daily_df):
+        try:
+            started = time.perf_counter()
+            current_position = self.get_current_position("binance", symbol)
+            self.evaluate_symbol("binance", symbol, df, daily_df, current_position)
+            logger.info(f"binance/{symbol}: Auswertung nach Kerzenschluss in {(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            logger.error(f"Fehler bei der Auswertung von binance/{symbol}: {e}")
+
+    def start_stream(self):
+        """Startet den Kline-Stream für alle Binance-Symbole (Timeframe + Higher Timeframe)."""
+        trade_conf = self.config["trading"]["binance"]
+        self.stream = KlineStream(
+            trade_conf["symbols"].keys(),
+            [trade_conf["timeframe"], trade_conf["higher_timeframe"]],
+            on_candle_close=self.on_candle_close,
+            seed=lambda symbol, interval: self.fetch_data("binance", symbol, interval),
+            base_url=TESTNET_WS_URL if trade_conf.get("use_testnet", True) else FUTURES_WS_URL,
+            maxlen=self.stream_buffer,
+        )
+        self.stream.start()
+
+    def start_user_stream(self):
+        """Startet den User-Data-Stream; Positionen und Guthaben kommen danach aus dem PositionBook."""
+        self.user_stream = UserDataStream(self.connectors["binance"])
+        self.user_stream.start()
+
     def start(self):
         self.running = True
         logger.info("TradingBot gestartet")
-        while self.running:
-            try:
-                for platform in self.platforms:
-                    trade_conf = self.config["trading"][platform]
-                    symbols = trade_conf["symbols"].keys()
-                    for symbol in symbols:
-                        df = self.fetch_data(platform, symbol, trade_conf["timeframe"])
-                        daily_df = self.fetch_data(platform, symbol, trade_conf["higher_timeframe"])
-                        current_position = self.get_current_position(platform, symbol)
-                        logger.info(f"Aktuelle Position ({platform}/{symbol}): {current_position}")
-
-                        signal = self.strategies[symbol].generate_signal(df, daily_df, current_position, symbol)
-                        logger.info(f"Generiertes Signal für {platform}/{symbol}: {signal}")
-
-                        if signal in ["BUY", "SELL"] and current_position == "NONE":
-                            entry_price = df['close'].iloc[-1]
-                            atr = talib.ATR(df['high'], df['low'], df['close'], timeperiod=self.strategies[symbol].atr_period).iloc[-1]
-                            stop_loss_price = entry_price - atr * self.strategies[symbol].atr_sl_multiplier if signal == "BUY" else entry_price + atr * self.strategies[symbol].atr_sl_multiplier
-                            execute_order(self.connectors[platform], symbol, signal, entry_price, stop_loss_price, None, trade_conf["leverage"])
-                        elif current_position != "NONE":
-                            highest_price = self.strategies[symbol].highest_price or df['close'].max()
-                            lowest_price = self.strategies[symbol].lowest_price or df['close'].min()
-                            self.manage_trailing_tp(platform, symbol, current_position, df['close'].iloc[0], highest_price, lowest_price)
-            except Exception as e:
-                logger.error(f"Fehler im Bot: {e}")
-            time.sleep(60)  # Warte 60 Sekunden vor der nächsten Iteration
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self.executor = executor
+            if self.user_data == "stream" and "binance" in self.platforms:
+                self.start_user_stream()
+            polled = self.platforms
+            if self.market_data == "stream" and "binance" in self.platforms:
+                self.start_stream()
+                polled = [p for p in self.platforms if p != "binance"]  # MetaTrader wird weiter abgefragt
+            while self.running:
+                if polled:
+                    try:
+                        self.run_cycle(executor, polled)
+                    except Exception as e:
+                        logger.error(f"Fehler im Bot: {e}")
+                time.sleep(self.seconds_until_next_cycle())  # bis kurz nach dem nächsten Minuten-/Kerzenschluss warten
+            if self.stream is not None:
+                self.stream.stop()
+            if self.user_stream is not None:
+                self.user_stream.stop()
 
     def stop(self):
         self.running = False
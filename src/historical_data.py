@@ -3,21 +3,19 @@ import os
 import yaml
 import pandas as pd
 from src.binance_connector import BinanceConnector
+from src.ohlcv_store import OHLCVStore, INTERVAL_MS
+from src.kline_downloader import download_klines_concurrent
+from src.utils import logger
 
-def download_historical_data(symbol: str, interval: str, start_str: str, limit: int = 500):
-    """
-    Lädt historische OHLCV-Daten von Binance herunter.
-    
-    :param symbol: Symbol, z. B. "BTCUSDT"
-    :param interval: Intervall, z. B. "1h" oder "1d"
-    :param start_str: Startdatum als String, z. B. "2024-01-01"
-    :param limit: Anzahl der Kerzen pro Abruf (Standard: 500)
-    :return: DataFrame mit den historischen Daten
-    """
-    connector = BinanceConnector(testnet=True)  # Passe testnet je nach Bedarf an
+KLINE_COLUMNS = [
+    "timestamp", "open", "high", "low", "close", "volume",
+    "close_time", "quote_asset_volume", "number_of_trades",
+    "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume", "ignore"
+]
+
+def fetch_klines(connector, symbol: str, interval: str, start_time: int, end_time: int = None, limit: int = 500) -> list:
+    """Lädt Klines seitenweise ab start_time (ms) bis end_time (ms, optional)."""
     all_data = []
-    start_time = int(pd.Timestamp(start_str).timestamp() * 1000)
-    
     while True:
         params = {
             "symbol": symbol,
@@ -25,6 +23,8 @@ def download_historical_data(symbol: str, interval: str, start_str: str, limit:
             "limit": limit,
             "startTime": start_time
         }
+        if end_time is not None:
+            params["endTime"] = end_time
         url = f"{connector.base_url}/fapi/v1/klines"
         response = connector.session.get(url, params=params)
         data = response.json()
@@ -38,25 +38,81 @@ def download_historical_data(symbol: str, interval: str, start_str: str, limit:
             break
         start_time = last_time + 1  # Nächste Runde beginnen
         time.sleep(0.5)  # Rate-Limit beachten
+    return all_data
 
-    # Konvertiere die abgerufenen Daten in ein DataFrame
-    df = pd.DataFrame(
-        all_data,
-        columns=[
-            "timestamp", "open", "high", "low", "close", "volume",
-            "close_time", "quote_asset_volume", "number_of_trades",
-            "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume", "ignore"
-        ]
-    )
+def klines_to_frame(data: list) -> pd.DataFrame:
+    """Konvertiert rohe Klines in ein DataFrame mit Zeitindex."""
+    df = pd.DataFrame(data, columns=KLINE_COLUMNS)
     df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
     df.set_index("timestamp", inplace=True)
     
     # Wandle numerische Spalten in Float um
     numeric_columns = ["open", "high", "low", "close", "volume"]
     df[numeric_columns] = df[numeric_columns].astype(float)
-    
     return df
 
+def fetch_kline_range(connector, symbol: str, interval: str, start_time: int, end_time: int, limit: int = 500, concurrent: bool = False) -> list:
+    """Lädt [start_time, end_time] seriell oder – für lange Zeiträume – parallel mit Gewichts-Limit (src/kline_downloader.py)."""
+    if concurrent:
+        return download_klines_concurrent(connector.base_url, symbol, interval, INTERVAL_MS[interval], start_time, end_time, limit=limit)
+    return fetch_klines(connector, symbol, interval, start_time, end_time, limit=limit)
+
+def download_historical_data(symbol: str, interval: str, start_str: str, limit: int = 500, store: OHLCVStore = None, connector=None,
+                             concurrent: bool = False):
+    """
+    Lädt historische OHLCV-Daten von Binance herunter.
+    
+    :param symbol: Symbol, z. B. "BTCUSDT"
+    :param interval: Intervall, z. B. "1h" oder "1d"
+    :param start_str: Startdatum als String, z. B. "2024-01-01"
+    :param limit: Anzahl der Kerzen pro Abruf (Standard: 500)
+    :param store: optionaler OHLCVStore – dann wird nur das fehlende Ende nachgeladen und von der Platte gelesen
+    :param connector: optionaler BinanceConnector (Standard: Testnet)
+    :param concurrent: Zeitraum in Fenster aufteilen und parallel laden (für lange Backfills)
+    :return: DataFrame mit den historischen Daten
+    """
+    connector = connector or BinanceConnector(testnet=True)  # Passe testnet je nach Bedarf an
+    if store is not None:
+        return sync_historical_data(store, connector, symbol, interval, start_str, limit, concurrent=concurrent)
+    start_time = int(pd.Timestamp(start_str).timestamp() * 1000)
+    if concurrent:
+        return klines_to_frame(fetch_kline_range(connector, symbol, interval, start_time, int(time.time() * 1000), limit, concurrent))
+    return klines_to_frame(fetch_klines(connector, symbol, interval, start_time, limit=limit))
+
+def sync_historical_data(store: OHLCVStore, connector, symbol: str, interval: str, start_str: str, limit: int = 500, now: int = None,
+                         concurrent: bool = False):
+    """
+    Bringt den lokalen Speicher auf den aktuellen Stand und liest die Daten ab start_str von der Platte.
+
+    Gespeichert werden nur abgeschlossene Kerzen. Ist seit der letzten gespeicherten Kerze noch keine weitere
+    abgeschlossen, erfolgt kein Netzwerkaufruf.
+
+    :param now: aktuelle Zeit in ms (Standard: Systemzeit)
+    """
+    interval_ms = INTERVAL_MS[interval]
+    now = now if now is not None else int(time.time() * 1000)
+    start = pd.Timestamp(start_str)
+    start_time = int(start.timestamp() * 1000)
+    first, last = store.bounds(symbol, interval)
+
+    new_data = []
+    if first is None:
+        new_data.extend(fetch_kline_range(connector, symbol, interval, start_time, now, limit, concurrent))
+    else:
+        first_time = int(first.timestamp() * 1000)
+        last_time = int(last.timestamp() * 1000)
+        if start_time < first_time:
+            new_data.extend(fetch_kline_range(connector, symbol, interval, start_time, first_time - 1, limit, concurrent))
+        if last_time + 2 * interval_ms <= now:
+            new_data.extend(fetch_kline_range(connector, symbol, interval, last_time + interval_ms, now, limit, concurrent))
+
+    if new_data:
+        df_new = klines_to_frame(new_data)
+        df_new = df_new[df_new["close_time"].astype("int64") < now]  # laufende Kerze nicht speichern
+        store.write(symbol, interval, df_new)
+        logger.info(f"{symbol} ({interval}): {len(df_new)} neue Kerzen im lokalen Speicher abgelegt")
+    return store.read(symbol, interval, start=start)
+
 def load_config(config_path="config/config.yaml"):
     """Lädt die Konfigurationsdatei."""
     with open(config_path, "r") as file:
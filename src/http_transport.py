@@ -0,0 +1,128 @@
+# src/http_transport.py
+import time
+import threading
+import collections
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from src.utils import logger
+
+# Antworten, nach denen ein idempotenter Request wiederholt wird (Rate-Limit, IP-Sperre auf Zeit, Gateway-Fehler)
+RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+
+class LatencyStats:
+    """
+    Latenzen der letzten `window` Requests je Endpunkt (thread-sicher, z. B. für den ThreadPool des Bots).
+
+    summary() liefert je Endpunkt Anzahl, Fehler und p50/p90/p99 in Millisekunden.
+    """
+
+    def __init__(self, window: int = 1000, quantiles=(50, 90, 99)):
+        self.window = window
+        self.quantiles = quantiles
+        self._latencies = {}
+        self._counts = collections.Counter()
+        self._errors = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, method: str, endpoint: str, status, seconds: float):
+        key = f"{method} {endpoint}"
+        with self._lock:
+            self._latencies.setdefault(key, collections.deque(maxlen=self.window)).append(seconds * 1000)
+            self._counts[key] += 1
+            if status is None or status >= 400:
+                self._errors[key] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            snapshot = {key: np.array(values) for key, values in self._latencies.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+        return {key: {"count": counts[key], "errors": errors.get(key, 0),
+                      **{f"p{q}_ms": float(np.percentile(values, q)) for q in self.quantiles}}
+                for key, values in snapshot.items()}
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self._counts.clear()
+            self._errors.clear()
+
+
+class HttpTransport:
+    """
+    Gemeinsamer HTTP-Transport eines Connectors: eine requests.Session mit Connection-Pool und Keep-Alive, Timeouts,
+    Wiederholung mit exponentiellem Backoff und Latenz-Messung je Endpunkt.
+
+    Wiederholt werden nur idempotente Requests (GET/PUT/DELETE) bei Verbindungsfehlern, Timeouts und RETRY_STATUS;
+    nicht idempotente (Orders) nur, wenn die Verbindung gar nicht zustande kam – sonst könnte eine Order doppelt
+    ausgeführt werden. `prepare` wird vor jedem Versuch aufgerufen (z. B. neuer Zeitstempel und Signatur).
+
+    on_request(method, endpoint, status, seconds) wird nach jedem Versuch aufgerufen (status None bei Fehlern);
+    Standard ist stats.record.
+    """
+
+    def __init__(self, base_url: str, headers: dict = None, pool_maxsize: int = 16, timeout=(3.05, 10), retries: int = 3,
+                 backoff: float = 0.5, on_request=None, sleep=time.sleep):
+        self.base_url = base_url
+        self.timeout = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.stats = LatencyStats()
+        self.on_request = on_request or self.stats.record
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers or {})
+
+    @classmethod
+    def from_config(cls, base_url: str, config: dict = None, headers: dict = None):
+        """Transport aus dem Abschnitt http der Konfiguration (pool_maxsize, timeout, retries, backoff)."""
+        options = {key: value for key, value in (config or {}).items() if key in ["pool_maxsize", "timeout", "retries", "backoff"]}
+        return cls(base_url, headers=headers, **options)
+
+    def _delay(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * 2 ** attempt
+
+    def request(self, method: str, endpoint: str, params=None, prepare=None, **kwargs) -> requests.Response:
+        """
+        Sendet method base_url+endpoint. params wird (nach prepare(params), falls angegeben) als Query-String
+        übergeben. Liefert die letzte Antwort; nach ausgeschöpften Versuchen wird der letzte Fehler geworfen.
+        """
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        url = f"{self.base_url}{endpoint}"
+        for attempt in range(self.retries + 1):
+            query = prepare(dict(params or {})) if prepare is not None else params
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, params=query, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.on_request(method, endpoint, None, time.perf_counter() - started)
+                not_sent = isinstance(e, requests.ConnectTimeout)
+                if attempt == self.retries or not (idempotent or not_sent):
+                    raise
+                delay = self._delay(attempt)
+                logger.warning(f"{method} {endpoint}: {type(e).__name__}, Versuch {attempt + 1}/{self.retries + 1}, "
+                               f"erneut in {delay:.2f}s")
+                self.sleep(delay)
+                continue
+            self.on_request(method, endpoint, response.status_code, time.perf_counter() - started)
+            if response.status_code not in RETRY_STATUS or not idempotent or attempt == self.retries:
+                return response
+            delay = self._delay(attempt, response)
+            logger.warning(f"{method} {endpoint}: HTTP {response.status_code}, Versuch {attempt + 1}/{self.retries + 1}, "
+                           f"erneut in {delay:.2f}s")
+            self.sleep(delay)
+
+    def close(self):
+        self.session.close()
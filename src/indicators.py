@@ -0,0 +1,176 @@
+# src/indicators.py
+from collections import deque
+import numpy as np
+import pandas as pd
+
+
+class StreamingIndicator:
+    """
+    Basisklasse für inkrementelle Indikatoren: update() übernimmt eine abgeschlossene Bar in O(1), peek() liefert den
+    Wert für eine (evtl. noch laufende) Bar, ohne den Zustand zu verändern. value ist der Wert der letzten übernommenen Bar.
+
+    sync(df) hält den Indikator mit einem OHLCV-DataFrame synchron: neue Bars bis auf die letzte werden übernommen,
+    die letzte Zeile wird nur per peek() ausgewertet – wie talib auf dem vollständigen DataFrame, dessen letzte Zeile
+    die laufende Kerze der Live-API sein kann. Passt df nicht zum bisherigen Zustand (Lücke, neu geladene Historie),
+    wird einmalig aus df neu aufgebaut.
+    """
+
+    columns = ("close",)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last_time = None
+        self.value = np.nan
+
+    def _next(self, *bar):
+        """Folgezustand nach Übernahme von bar als Tupel (..., value)."""
+        raise NotImplementedError
+
+    def _apply(self, state):
+        raise NotImplementedError
+
+    def update(self, *bar):
+        self._apply(self._next(*bar))
+        return self.value
+
+    def peek(self, *bar):
+        return self._next(*bar)[-1]
+
+    def _bar(self, df: pd.DataFrame, position: int):
+        return tuple(float(df[column].iat[position]) for column in self.columns)
+
+    def sync(self, df: pd.DataFrame):
+        """Wert des Indikators für die letzte Zeile von df."""
+        if df.empty:
+            return self.value
+        index = df.index
+        start = 0
+        if self.last_time is not None:
+            start = index.searchsorted(self.last_time, side="right")
+            if start == 0 or index[start - 1] != self.last_time:
+                self.reset()
+                start = 0
+        for position in range(start, len(df) - 1):
+            self.update(*self._bar(df, position))
+            self.last_time = index[position]
+        return self.peek(*self._bar(df, len(df) - 1))
+
+
+class RSI(StreamingIndicator):
+    """Relative Strength Index nach Wilder, identisch zu talib.RSI (erster Wert nach period + 1 Bars)."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.count = 0
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def _next(self, close):
+        if self.prev_close is None:
+            return 1, close, 0.0, 0.0, np.nan
+        diff = close - self.prev_close
+        gain, loss = (0.0, -diff) if diff < 0 else (diff, 0.0)
+        count = self.count + 1
+        if count <= self.period:  # Summen für den ersten Durchschnitt
+            return count, close, self.avg_gain + gain, self.avg_loss + loss, np.nan
+        if count == self.period + 1:
+            avg_gain = (self.avg_gain + gain) / self.period
+            avg_loss = (self.avg_loss + loss) / self.period
+        else:
+            avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        total = avg_gain + avg_loss
+        value = 100.0 * (avg_gain / total) if not -1e-14 < total < 1e-14 else 0.0
+        return count, close, avg_gain, avg_loss, value
+
+    def _apply(self, state):
+        self.count, self.prev_close, self.avg_gain, self.avg_loss, self.value = state
+
+
+class ATR(StreamingIndicator):
+    """Average True Range nach Wilder, identisch zu talib.ATR (erster Wert nach period + 1 Bars)."""
+
+    columns = ("high", "low", "close")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.count = 0
+        self.prev_close = None
+        self.atr = 0.0
+
+    def _next(self, high, low, close):
+        if self.prev_close is None:
+            return 1, close, 0.0, np.nan
+        true_range = max(high - low, abs(self.prev_close - high), abs(low - self.prev_close))
+        count = self.count + 1
+        if self.period == 1:
+            return count, close, true_range, true_range
+        if count <= self.period:  # Summe für den ersten Durchschnitt
+            return count, close, self.atr + true_range, np.nan
+        if count == self.period + 1:
+            atr = (self.atr + true_range) / self.period
+        else:
+            atr = (self.atr * (self.period - 1) + true_range) / self.period
+        return count, close, atr, atr
+
+    def _apply(self, state):
+        self.count, self.prev_close, self.atr, self.value = state
+
+
+class GradientTrend(StreamingIndicator):
+    """Inkrementelle Variante von get_higher_trend_with_gradient: mittlere Kursänderung der letzten lookback Bars."""
+
+    def __init__(self, lookback: int = 5, threshold: float = 0.00005):
+        self.lookback = lookback
+        self.threshold = threshold
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.count = 0
+        self.window = deque(maxlen=self.lookback)
+        self.value = "UNKNOWN"
+
+    def _classify(self, count, closes):
+        if count < self.lookback + 1 or np.isnan(closes).any():
+            return "UNKNOWN"
+        if self.lookback < 2:
+            return "NEUTRAL"
+        trend_score = np.mean(np.diff(closes))
+        if trend_score > self.threshold:
+            return "BULLISH"
+        if trend_score < -self.threshold:
+            return "BEARISH"
+        return "NEUTRAL"
+
+    def _next(self, close):
+        closes = list(self.window)[1 - self.lookback:] + [close] if self.lookback > 1 else [close]
+        return self.count + 1, close, self._classify(self.count + 1, closes)
+
+    def _apply(self, state):
+        self.count, close, self.value = state
+        self.window.append(close)
+
+
+class SymbolIndicators:
+    """Indikator-Zustand eines Symbols (RSI, ATR, Higher-Timeframe-Trend), gemeinsam genutzt von Strategie und Bot."""
+
+    def __init__(self, rsi_period: int = 5, atr_period: int = 14, lookback: int = 5):
+        self.rsi = RSI(rsi_period)
+        self.atr = ATR(atr_period)
+        self.trend = GradientTrend(lookback)
+
+    @classmethod
+    def for_strategy(cls, strategy):
+        return cls(strategy.rsi_period, strategy.atr_period, strategy.lookback)
@@ -0,0 +1,114 @@
+# src/kline_downloader.py
+import time
+import asyncio
+import aiohttp
+from src.utils import logger
+
+# Binance Futures: Gewicht von /fapi/v1/klines abhängig vom limit-Parameter
+def kline_request_weight(limit: int) -> int:
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class WeightRateLimiter:
+    """
+    Hält das Request-Gewicht pro Minute unter dem Binance-Limit.
+
+    Vor jedem Request wird das erwartete Gewicht reserviert; die Antwort-Header (X-MBX-USED-WEIGHT-1M) korrigieren den
+    Zählerstand auf den Wert des Servers. Ist das Budget erschöpft, wird bis zum Beginn der nächsten Minute gewartet.
+    """
+
+    def __init__(self, max_weight: int = 2400, safety_margin: float = 0.9, clock=time.time, sleep=asyncio.sleep):
+        self.max_weight = int(max_weight * safety_margin)
+        self.clock = clock
+        self.sleep = sleep
+        self.used = 0
+        self.window = int(self.clock() // 60)
+        self._lock = asyncio.Lock()
+
+    def _roll_window(self):
+        window = int(self.clock() // 60)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    async def acquire(self, weight: int):
+        async with self._lock:
+            while True:
+                self._roll_window()
+                if self.used + weight <= self.max_weight:
+                    self.used += weight
+                    return
+                wait = (self.window + 1) * 60 - self.clock()
+                logger.info(f"Request-Gewicht {self.used}/{self.max_weight} erreicht – warte {wait:.1f}s")
+                await self.sleep(max(wait, 0.05))
+
+    def update(self, headers):
+        used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("X-MBX-USED-WEIGHT")
+        if used is not None:
+            self._roll_window()
+            self.used = max(self.used, int(used))
+
+
+def split_windows(start_time: int, end_time: int, interval_ms: int, limit: int) -> list:
+    """Teilt [start_time, end_time] in Fenster zu je höchstens limit Kerzen (Zeiten in ms)."""
+    span = interval_ms * limit
+    return [(t, min(t + span - 1, end_time)) for t in range(start_time, end_time + 1, span)]
+
+
+async def _fetch_window(session, url, params, limiter, weight, retries=5):
+    for attempt in range(retries):
+        await limiter.acquire(weight)
+        async with session.get(url, params=params) as response:
+            limiter.update(response.headers)
+            if response.status in (418, 429):
+                retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+                logger.warning(f"Rate-Limit ({response.status}) für {params['symbol']} – neuer Versuch in {retry_after}s")
+                await limiter.sleep(retry_after)
+                continue
+            response.raise_for_status()
+            return await response.json()
+    raise Exception(f"Klines für {params['symbol']} ab {params['startTime']} nach {retries} Versuchen nicht geladen")
+
+
+async def fetch_klines_async(base_url: str, symbol: str, interval: str, interval_ms: int, start_time: int, end_time: int,
+                             limit: int = 1000, concurrency: int = 8, limiter: WeightRateLimiter = None) -> list:
+    """
+    Lädt alle Klines zwischen start_time und end_time (ms) parallel in Fenstern und fügt sie sortiert zusammen.
+
+    :param concurrency: maximale Anzahl gleichzeitiger Requests
+    :param limiter: WeightRateLimiter (Standard: 2400 Gewicht/Minute)
+    :return: Liste roher Klines, aufsteigend nach Eröffnungszeit, ohne doppelte Zeitstempel
+    """
+    limiter = limiter or WeightRateLimiter()
+    url = f"{base_url}/fapi/v1/klines"
+    weight = kline_request_weight(limit)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession() as session:
+        async def fetch(window):
+            params = {"symbol": symbol, "interval": interval, "limit": limit, "startTime": window[0], "endTime": window[1]}
+            async with semaphore:
+                return await _fetch_window(session, url, params, limiter, weight)
+
+        pages = await asyncio.gather(*(fetch(w) for w in split_windows(start_time, end_time, interval_ms, limit)))
+
+    klines = {}
+    for page in pages:
+        for kline in page:
+            klines[kline[0]] = kline
+    return [klines[t] for t in sorted(klines)]
+
+
+def download_klines_concurrent(base_url: str, symbol: str, interval: str, interval_ms: int, start_time: int, end_time: int,
+                               limit: int = 1000, concurrency: int = 8, max_weight: int = 2400) -> list:
+    """Synchroner Einstieg für fetch_klines_async (z. B. aus sync_historical_data)."""
+    return asyncio.run(fetch_klines_async(
+        base_url, symbol, interval, interval_ms, start_time, end_time, limit=limit, concurrency=concurrency,
+        limiter=WeightRateLimiter(max_weight=max_weight)
+    ))
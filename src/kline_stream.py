@@ -0,0 +1,152 @@
+# src/kline_stream.py
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+import websocket
+from src.utils import logger
+
+FUTURES_WS_URL = "wss://fstream.binance.com"
+TESTNET_WS_URL = "wss://stream.binancefuture.com"
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class KlineBuffer:
+    """
+    Ringpuffer der letzten maxlen Kerzen eines Symbols/Timeframes.
+
+    Updates der laufenden Kerze überschreiben den letzten Eintrag, eine neue Eröffnungszeit hängt an und verdrängt
+    bei vollem Puffer die älteste Kerze – ohne DataFrame-Operationen pro Nachricht.
+    """
+
+    def __init__(self, maxlen: int = 500):
+        self.maxlen = maxlen
+        self.times = np.zeros(maxlen, dtype=np.int64)
+        self.values = np.zeros((maxlen, len(OHLCV_COLUMNS)))
+        self.size = 0
+        self.head = 0  # Position der ältesten Kerze im Ring
+        self._lock = threading.Lock()
+
+    def _last_slot(self) -> int:
+        return (self.head + self.size - 1) % self.maxlen
+
+    def update(self, open_time: int, values):
+        """Übernimmt eine Kerze (open_time in ms, values = open/high/low/close/volume)."""
+        with self._lock:
+            if self.size and open_time == self.times[self._last_slot()]:
+                slot = self._last_slot()
+            elif self.size and open_time < self.times[self._last_slot()]:
+                return  # veraltete Nachricht
+            elif self.size < self.maxlen:
+                self.size += 1
+                slot = self._last_slot()
+            else:
+                slot = self.head
+                self.head = (self.head + 1) % self.maxlen
+            self.times[slot] = open_time
+            self.values[slot] = values
+
+    def seed(self, df: pd.DataFrame):
+        """Füllt den Puffer neu aus einem OHLCV-DataFrame (z. B. REST-Abruf beim (Re-)Connect)."""
+        df = df.iloc[-self.maxlen:]
+        with self._lock:
+            self.size = len(df)
+            self.head = 0
+            self.times[:self.size] = df.index.asi8 // 1_000_000
+            self.values[:self.size] = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+
+    def to_frame(self) -> pd.DataFrame:
+        """OHLCV-DataFrame im Format von BinanceConnector.get_ohlcv (Index timestamp, älteste Kerze zuerst)."""
+        with self._lock:
+            order = (self.head + np.arange(self.size)) % self.maxlen
+            times = self.times[order]
+            values = self.values[order]
+        index = pd.DatetimeIndex(pd.to_datetime(times, unit="ms"), name="timestamp")
+        return pd.DataFrame(values, index=index, columns=OHLCV_COLUMNS)
+
+
+class KlineStream:
+    """
+    Abonniert Binance-Kline-Streams (kombinierter Stream) und hält je Symbol/Timeframe einen KlineBuffer aktuell.
+
+    on_candle_close(symbol, interval) wird genau einmal pro abgeschlossener Kerze aufgerufen (Feld "x" der
+    Kline-Nachricht), und zwar im Thread des WebSockets – längere Arbeit sollte der Aufrufer auslagern. seed(symbol,
+    interval) liefert beim Verbinden und nach jedem Reconnect die Historie per REST, damit Lücken geschlossen werden.
+    """
+
+    def __init__(self, symbols, intervals, on_candle_close=None, seed=None, base_url: str = FUTURES_WS_URL,
+                 maxlen: int = 500, reconnect_delay: float = 5.0):
+        self.buffers = {(symbol, interval): KlineBuffer(maxlen) for symbol in symbols for interval in intervals}
+        self.on_candle_close = on_candle_close
+        self.seed = seed
+        self.base_url = base_url
+        self.reconnect_delay = reconnect_delay
+        self.running = False
+        self.connected = threading.Event()
+        self._ws = None
+        self._thread = None
+        self._last_closed = {}
+
+    def stream_url(self) -> str:
+        streams = "/".join(f"{symbol.lower()}@kline_{interval}" for symbol, interval in self.buffers)
+        return f"{self.base_url}/stream?streams={streams}"
+
+    def frame(self, symbol: str, interval: str) -> pd.DataFrame:
+        return self.buffers[(symbol, interval)].to_frame()
+
+    def handle_message(self, message: str):
+        data = json.loads(message)
+        data = data.get("data", data)  # kombinierter Stream: {"stream": ..., "data": {...}}
+        if data.get("e") != "kline":
+            return
+        kline = data["k"]
+        key = (kline["s"], kline["i"])
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            return
+        buffer.update(kline["t"], [float(kline["o"]), float(kline["h"]), float(kline["l"]), float(kline["c"]), float(kline["v"])])
+        if kline["x"] and self._last_closed.get(key) != kline["t"]:
+            self._last_closed[key] = kline["t"]
+            if self.on_candle_close is not None:
+                try:
+                    self.on_candle_close(*key)
+                except Exception as e:
+                    logger.error(f"Fehler bei der Auswertung von {key[0]}/{key[1]}: {e}")
+
+    def _on_open(self, ws):
+        if self.seed is not None:
+            for (symbol, interval), buffer in self.buffers.items():
+                try:
+                    buffer.seed(self.seed(symbol, interval))
+                except Exception as e:
+                    logger.error(f"Historie für {symbol}/{interval} konnte nicht geladen werden: {e}")
+        self.connected.set()
+        logger.info(f"Kline-Stream verbunden ({len(self.buffers)} Streams)")
+
+    def _run(self):
+        while self.running:
+            self._ws = websocket.WebSocketApp(
+                self.stream_url(),
+                on_open=self._on_open,
+                on_message=lambda ws, message: self.handle_message(message),
+                on_error=lambda ws, error: logger.error(f"Kline-Stream Fehler: {error}"),
+            )
+            self._ws.run_forever(ping_interval=180, ping_timeout=10)
+            self.connected.clear()
+            if self.running:
+                logger.warning(f"Kline-Stream getrennt – neuer Verbindungsversuch in {self.reconnect_delay}s")
+                time.sleep(self.reconnect_delay)
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="KlineStream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._ws is not None:
+            self._ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,125 @@
+# src/market_data.py
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from src.shared_arrays import SharedArrays
+
+# Spalten je Symbol/Intervall; "timestamp" sind int64-Nanosekunden (DatetimeIndex.asi8)
+MARKET_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+PRICE_COLUMNS = MARKET_COLUMNS[1:]
+
+
+def timeframes(config, platform):
+    """Signal- und Trend-Zeitrahmen der Plattform (Schlüssel in der MarketDataPlane)."""
+    trade_config = config["trading"][platform]
+    return trade_config.get("timeframe", "1h"), trade_config.get("higher_timeframe", "1d")
+
+
+class MarketDataPlane:
+    """
+    OHLCV-Daten, einmal im Hauptprozess geladen und von Worker-Prozessen ohne Kopie gelesen.
+
+    Je Symbol/Intervall liegen timestamp (int64) sowie open/high/low/close/volume (float64) entweder in
+    multiprocessing.shared_memory (backend="shm") oder als memory-mapped .npy-Dateien (backend="npy", z. B. wenn
+    die Daten größer als /dev/shm sind). An Worker wird nur `spec` übergeben – ein kleines dict, dessen Größe nicht
+    von der Länge der Historie abhängt; dort liefert MarketDataView.attach(spec) die Views.
+
+        with MarketDataPlane() as plane:
+            plane.add("BTCUSDT", "1h", df_hourly)
+            executor.submit(worker, plane.spec)
+
+        def worker(spec):
+            with MarketDataView.attach(spec) as market:
+                df_hourly = market.frame("BTCUSDT", "1h")
+    """
+
+    def __init__(self, backend: str = "shm", directory: str = None):
+        if backend not in ["shm", "npy"]:
+            raise ValueError(f"Ungültiges Backend: {backend}. Erwartet: 'shm' oder 'npy'")
+        self.backend = backend
+        self._own_directory = backend == "npy" and directory is None
+        self.directory = tempfile.mkdtemp(prefix="market_data_") if self._own_directory else directory
+        self.spec = {}
+        self._shared = []
+
+    def add(self, symbol: str, interval: str, df: pd.DataFrame):
+        """Übernimmt die OHLCV-Spalten von df (DatetimeIndex) für symbol/interval."""
+        arrays = {"timestamp": df.index.asi8}
+        arrays.update({column: df[column].to_numpy(dtype=np.float64) for column in PRICE_COLUMNS})
+        if self.backend == "shm":
+            shared = SharedArrays(arrays)
+            self._shared.append(shared)
+            self.spec[(symbol, interval)] = ("shm", shared.spec)
+        else:
+            folder = os.path.join(self.directory, symbol, interval)
+            os.makedirs(folder, exist_ok=True)
+            paths = {}
+            for column, values in arrays.items():
+                paths[column] = os.path.join(folder, f"{column}.npy")
+                np.save(paths[column], values)
+            self.spec[(symbol, interval)] = ("npy", paths)
+
+    def __contains__(self, key):
+        return key in self.spec
+
+    def close(self):
+        """Gibt den Shared Memory frei bzw. löscht selbst angelegte .npy-Dateien."""
+        for shared in self._shared:
+            shared.close()
+        self._shared = []
+        if self._own_directory and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        self.spec = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MarketDataView:
+    """Lesender Zugriff eines Workers auf eine MarketDataPlane (siehe MarketDataPlane.spec)."""
+
+    def __init__(self, spec: dict):
+        self._arrays = {}
+        self._shared = []
+        for key, (backend, arrays) in spec.items():
+            if backend == "shm":
+                shared = SharedArrays.attach(arrays)
+                self._shared.append(shared)
+                self._arrays[key] = {column: shared[column] for column in MARKET_COLUMNS}
+            else:
+                self._arrays[key] = {column: np.load(path, mmap_mode="r") for column, path in arrays.items()}
+
+    @classmethod
+    def attach(cls, spec: dict):
+        return cls(spec)
+
+    def arrays(self, symbol: str, interval: str) -> dict:
+        """Read-only-Views auf timestamp/open/high/low/close/volume."""
+        return self._arrays[(symbol, interval)]
+
+    def frame(self, symbol: str, interval: str, start: int = None, stop: int = None) -> pd.DataFrame:
+        """
+        DataFrame über den Bars [start, stop) mit DatetimeIndex "timestamp". Die Spalten sind Views und nur bis close()
+        gültig; der Index wird kopiert, weil pandas ihn an abgeleitete Objekte (Ergebnisse, Kopien) weiterreicht.
+        """
+        arrays = self.arrays(symbol, interval)
+        window = slice(start, stop)
+        index = pd.DatetimeIndex(np.array(arrays["timestamp"][window]).view("M8[ns]"), name="timestamp")
+        return pd.DataFrame({column: arrays[column][window] for column in PRICE_COLUMNS}, index=index, copy=False)
+
+    def close(self):
+        self._arrays = {}
+        for shared in self._shared:
+            shared.close()
+        self._shared = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,111 @@
+# src/metrics.py
+import numpy as np
+
+# Annualisierung wie bisher in calculate_performance (Stundenbars, 252 Handelstage)
+PERIODS_PER_YEAR = 252 * 24
+
+SIDE_LONG, SIDE_SHORT = 1, -1
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-Fill für NaN (führende NaN bleiben NaN) – wie pandas ffill, ohne Series-Overhead."""
+    valid = ~np.isnan(values)
+    positions = np.maximum.accumulate(np.where(valid, np.arange(len(values)), 0))
+    return values[positions]
+
+
+def drawdown_stats(equity: np.ndarray):
+    """
+    Maximaler Drawdown (relativ zum laufenden Hoch) und längste Drawdown-Phase in Bars.
+
+    NaN-Werte (z. B. erste Zeile von df_sim) werden beim laufenden Hoch über np.fmax.accumulate übersprungen.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) == 0:
+        return 0.0, 0
+    peak = np.fmax.accumulate(equity)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    max_drawdown = float(np.nanmax(drawdown)) if not np.isnan(drawdown).all() else 0.0
+
+    # Dauer: Abstand zum letzten neuen Hoch, über alle Bars unterhalb des Hochs
+    at_peak = ~(equity < peak)
+    last_peak = np.maximum.accumulate(np.where(at_peak, np.arange(len(equity)), 0))
+    max_duration = int((np.arange(len(equity)) - last_peak).max())
+    return max_drawdown, max_duration
+
+
+def _side_stats(profit: np.ndarray, prefix: str) -> dict:
+    count = len(profit)
+    return {
+        f"{prefix}_num_trades": count,
+        f"{prefix}_profit": float(profit.sum()),
+        f"{prefix}_win_rate": float((profit > 0).sum() / count) if count else 0,
+    }
+
+
+def compute_metrics(equity, profit, side, entry_index, exit_index, periods_per_year: int = PERIODS_PER_YEAR) -> dict:
+    """
+    Kennzahlen eines Backtests aus Equity-Kurve und spaltenweisen Trade-Daten (alles NumPy, keine Schleife pro Bar/Trade).
+
+    :param equity: Equity je Bar (NaN erlaubt)
+    :param profit: Gewinn je Trade
+    :param side: SIDE_LONG/SIDE_SHORT je Trade
+    :param entry_index: Bar-Position des Einstiegs je Trade
+    :param exit_index: Bar-Position des Ausstiegs je Trade
+    :return: dict mit den bisherigen Kennzahlen (total_profit, num_trades, win_rate, profit_factor, max_drawdown,
+             sharpe) sowie max_drawdown_bars, sortino, calmar, expectancy, avg_win, avg_loss, exposure und
+             long_*/short_*-Statistiken
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    profit = np.asarray(profit, dtype=np.float64)
+    side = np.asarray(side)
+    num_trades = len(profit)
+
+    wins = profit[profit > 0]
+    losses = profit[profit < 0]
+    total_profit = float(profit.sum())
+    gross_loss = abs(float(losses.sum()))
+    if num_trades:
+        profit_factor = float(wins.sum()) / gross_loss if gross_loss > 0 else float("inf")
+    else:
+        profit_factor = 0
+
+    max_drawdown, max_drawdown_bars = drawdown_stats(equity)
+
+    filled = _ffill(equity)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = filled[1:] / filled[:-1] - 1
+    returns = returns[~np.isnan(returns)]
+    sharpe = sortino = calmar = 0
+    if len(returns) > 1:
+        std = returns.std(ddof=1)
+        if std > 0:
+            sharpe = float(returns.mean() / std * np.sqrt(periods_per_year))
+        downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+        if downside > 0:
+            sortino = float(returns.mean() / downside * np.sqrt(periods_per_year))
+        valid = filled[~np.isnan(filled)]
+        if max_drawdown > 0 and valid[0] > 0 and valid[-1] > 0:
+            annual_return = (valid[-1] / valid[0]) ** (periods_per_year / len(returns)) - 1
+            calmar = float(annual_return / max_drawdown)
+
+    in_market = np.asarray(exit_index) - np.asarray(entry_index)
+    metrics = {
+        "total_profit": total_profit,
+        "num_trades": num_trades,
+        "win_rate": len(wins) / num_trades if num_trades else 0,
+        "profit_factor": profit_factor,
+        "max_drawdown": -max_drawdown,
+        "sharpe": sharpe,
+        "max_drawdown_bars": max_drawdown_bars,
+        "sortino": sortino,
+        "calmar": calmar,
+        "expectancy": total_profit / num_trades if num_trades else 0,
+        "avg_win": float(wins.mean()) if len(wins) else 0,
+        "avg_loss": float(losses.mean()) if len(losses) else 0,
+        "exposure": float(in_market.sum() / len(equity)) if len(equity) else 0,
+    }
+    metrics.update(_side_stats(profit[side == SIDE_LONG], "long"))
+    metrics.update(_side_stats(profit[side == SIDE_SHORT], "short"))
+    return metrics
@@ -1,12 +1,17 @@
 import os
+import copy
 import yaml
 import datetime
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from src.backtesting_improved import run_backtest, calculate_performance, visualize_backtest
 from src.strategy import CompositeStrategy
 from src.utils import logger
 from src.historical_data import download_historical_data
+from src.ohlcv_store import OHLCVStore, DEFAULT_STORE_PATH
+from src.ohlcv_binary import OHLCVFile, binary_path, DEFAULT_BINARY_PATH
 from src.metatrader_connector import MetaTraderConnector
+from src.portfolio import run_portfolio_backtest
 import MetaTrader5 as mt5
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
@@ -81,13 +86,39 @@ def generate_web_snippet(summaries, config):
     logger.info("HTML-Snippet in 'results/backtest_results.html' gespeichert.")
      
 # Nur der relevante Teil von multi_backtesting.py
-def load_data(platform, symbol, config):
+def load_local_data(symbol, timeframe, higher_tf, config):
+    """Lädt beide Zeitrahmen aus den .ohlcv-Dateien in data.binary_path (siehe src/ohlcv_binary.py), ohne Netzwerk."""
+    root = config.get("data", {}).get("binary_path", DEFAULT_BINARY_PATH)
+    frames = []
+    for interval in [timeframe, higher_tf]:
+        path = binary_path(root, symbol, interval)
+        if not os.path.exists(path):
+            logger.error(f"Lokale Daten für {symbol}/{interval} fehlen: {path} (Konvertierung: python -m src.ohlcv_binary)")
+            return None, None
+        frames.append(OHLCVFile(path).frame())
+    logger.info(f"Lokale Daten geladen: {len(frames[0])} {timeframe}-Bars, {len(frames[1])} {higher_tf}-Bars")
+    return frames[0], frames[1]
+
+def load_data(platform, symbol, config, source=None):
+    """
+    Lädt Signal- und Trend-Zeitrahmen eines Symbols.
+
+    source="local" liest die memory-mapped .ohlcv-Dateien (schnell, ohne Netzwerk/Terminal), sonst werden die Daten
+    von Binance bzw. MetaTrader geholt. Standard ist data.source aus der Konfiguration ("download").
+    """
+    source = source or config.get("data", {}).get("source", "download")
+    if source == "local":
+        trade_conf = config['trading'][platform]
+        return load_local_data(symbol, trade_conf["timeframe"], trade_conf.get("higher_timeframe", "1d"), config)
     if platform == "binance":
         timeframe = config['trading']['binance']['timeframe']
         higher_tf = config['trading']['binance'].get("higher_timeframe", "1d")
         start_date = "2024-07-01"  # Zurück auf aktuelleren Zeitraum für Konsistenz
-        df_hourly = download_historical_data(symbol, timeframe, start_date)
-        df_higher = download_historical_data(symbol, higher_tf, start_date)
+        data_config = config.get("data", {})
+        store = OHLCVStore(data_config.get("store_path", DEFAULT_STORE_PATH))  # lädt nur fehlende Kerzen nach
+        concurrent = data_config.get("concurrent_download", False)
+        df_hourly = download_historical_data(symbol, timeframe, start_date, store=store, concurrent=concurrent)
+        df_higher = download_historical_data(symbol, higher_tf, start_date, store=store, concurrent=concurrent)
         if df_hourly is None or df_higher is None:
             logger.error(f"Datenabruf für {symbol} (Binance) fehlgeschlagen.")
             return None, None
@@ -114,6 +145,124 @@ def load_data(platform, symbol, config):
     
     return df_hourly, df_higher
 
+def save_portfolio_results(platform, result, results_dir="results"):
+    """Schreibt Equity, Trades und Kennzahlen je Symbol eines Portfolio-Backtests nach results_dir/portfolio_{platform}_*.csv."""
+    os.makedirs(results_dir, exist_ok=True)
+    result["equity"].to_csv(os.path.join(results_dir, f"portfolio_{platform}_equity.csv"))
+    result["trades"].to_csv(os.path.join(results_dir, f"portfolio_{platform}_trades.csv"), index=False)
+    result["symbols"].to_csv(os.path.join(results_dir, f"portfolio_{platform}_symbols.csv"))
+    logger.info(f"Portfolio-Ergebnisse für {platform} in {results_dir}/portfolio_{platform}_*.csv gespeichert.")
+
+def apply_best_params(config, platform, symbol, best_params) -> bool:
+    """
+    Übernimmt die Tuning-Ergebnisse eines Symbols in dessen Abschnitt trading.<platform>.symbols (in-place).
+
+    Dort haben sie Vorrang vor dem Abschnitt strategy (siehe CompositeStrategy) – Einzel- und Portfolio-Backtest
+    verwenden damit dieselben Parameter. :return: True, wenn Parameter vorlagen
+    """
+    params = best_params.get(platform, {}).get(symbol)
+    if not params:
+        return False
+    symbols = config["trading"][platform]["symbols"]
+    symbols[symbol] = {**(symbols.get(symbol) or {}), **params}
+    logger.info(f"{platform}/{symbol}: Verwende optimierte Parameter - SL: {params['atr_sl_multiplier']}, "
+                f"TP: {params['atr_tp_multiplier']}")
+    return True
+
+def run_portfolio(config, platform, best_params):
+    """Alle Symbole der Plattform mit gemeinsamem Kapital und trading.max_open_positions (src/portfolio.py)."""
+    temp_config = copy.deepcopy(config)
+    data = {}
+    for symbol in config["trading"][platform]["symbols"]:
+        df_hourly, df_higher = load_data(platform, symbol, config)
+        if df_hourly is None or df_higher is None:
+            logger.error(f"{platform}/{symbol} wird im Portfolio ausgelassen – fehlende Daten.")
+            continue
+        data[symbol] = (df_hourly, df_higher)
+        apply_best_params(temp_config, platform, symbol, best_params)
+    if not data:
+        return None
+    result = run_portfolio_backtest(temp_config, platform, data)
+    logger.info(f"Portfolio-Performance für {platform} ({len(data)} Symbole, max. "
+                f"{config['trading'].get('max_open_positions', len(data))} Positionen): {result['performance']}")
+    save_portfolio_results(platform, result)
+    return {"platform": platform, "symbol": "PORTFOLIO", **result["performance"],
+            "timestamp": datetime.datetime.now().isoformat()}
+
+def backtest_symbol(config, platform, symbol, best_params):
+    """
+    Worker für den Prozess-Pool: Daten laden, beste Parameter anwenden, Backtest und Kennzahlen eines Symbols.
+
+    :return: (summary, (df_sim, trades)) für die Chart-Stufe oder None, wenn Daten oder Trades fehlen
+    """
+    logger.info(f"Backtesting für {platform}/{symbol} wird gestartet...")
+    df_hourly, df_higher = load_data(platform, symbol, config)
+    if df_hourly is None or df_higher is None:
+        logger.error(f"Backtest für {platform}/{symbol} abgebrochen wegen fehlender Daten.")
+        return None
+    
+    # Beste Parameter anwenden, falls verfügbar
+    temp_config = copy.deepcopy(config)
+    apply_best_params(temp_config, platform, symbol, best_params)
+    
+    strategy = CompositeStrategy(temp_config, symbol=symbol)
+    df_sim, trades = run_backtest(df_hourly, strategy, temp_config, df_higher=df_higher, symbol=symbol, platform=platform)
+    if df_sim.empty or not trades:
+        logger.warning(f"Kein Ergebnis für {platform}/{symbol} – keine Trades generiert.")
+        return None
+    
+    perf = calculate_performance(df_sim, trades)
+    logger.info(f"Performance für {platform}/{symbol}: {perf}")
+    summary = {
+        "platform": platform,
+        "symbol": symbol,
+        **perf,  # inkl. Sortino, Calmar, Expectancy, Exposure, Long/Short-Statistiken
+        "timestamp": datetime.datetime.now().isoformat()
+    }
+    # Für den Chart genügt der Schlusskurs; die übrigen Spalten werden nicht zurück an den Hauptprozess gepickelt
+    return summary, (df_sim[["close"]], trades)
+
+def render_chart(df_sim, trades, title):
+    """Worker der Chart-Stufe (PNG in results/)."""
+    visualize_backtest(df_sim, trades, title=title)
+    return title
+
+def run_backtests(config, platforms, best_params, max_workers=None, charts=None):
+    """
+    Backtestet alle Symbole der Plattformen parallel in einem Prozess-Pool (ein Task je Symbol) und liefert
+    (summary, chart_future) in der Reihenfolge der Fertigstellung – die Laufzeit richtet sich nach dem langsamsten
+    Symbol statt nach der Summe. Charts (backtest.charts) werden in einem eigenen Pool gerendert und blockieren die
+    Backtests nicht; die zurückgegebenen Futures sind beim Ende des Generators abgeschlossen.
+    """
+    backtest_config = config.get("backtest", {})
+    max_workers = max_workers or backtest_config.get("max_workers") or os.cpu_count() or 1
+    charts = backtest_config.get("charts", True) if charts is None else charts
+    jobs = [(platform, symbol) for platform in platforms for symbol in config["trading"][platform]["symbols"]]
+    if not jobs:
+        return
+    chart_executor = ProcessPoolExecutor(max_workers=backtest_config.get("chart_workers", 1)) if charts else None
+    try:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            futures = {executor.submit(backtest_symbol, config, platform, symbol, best_params): (platform, symbol)
+                       for platform, symbol in jobs}
+            for future in as_completed(futures):
+                platform, symbol = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Backtest für {platform}/{symbol} fehlgeschlagen: {e}")
+                    continue
+                if result is None:
+                    continue
+                summary, (df_sim, trades) = result
+                chart = None
+                if chart_executor is not None:
+                    chart = chart_executor.submit(render_chart, df_sim, trades, f"Backtest: {platform}/{symbol}")
+                yield summary, chart
+    finally:
+        if chart_executor is not None:
+            chart_executor.shutdown(wait=True)
+
 def main():
     config = load_config()
     best_params = load_best_params()
@@ -124,45 +273,20 @@ def main():
     if config["platforms"]["metatrader"]:
         platforms.append("metatrader")
     
+    if config.get("backtest", {}).get("mode", "isolated") == "portfolio":
+        summaries = [summary for summary in (run_portfolio(config, platform, best_params) for platform in platforms) if summary]
+        if summaries:
+            save_simplified_log(summaries)
+        return
+    
     summaries = []
-    for platform in platforms:
-        symbols = config["trading"][platform]["symbols"].keys()
-        for symbol in symbols:
-            logger.info(f"Backtesting für {platform}/{symbol} wird gestartet...")
-            df_hourly, df_higher = load_data(platform, symbol, config)
-            if df_hourly is None or df_higher is None:
-                logger.error(f"Backtest für {platform}/{symbol} abgebrochen wegen fehlender Daten.")
-                continue
-            
-            # Beste Parameter anwenden, falls verfügbar
-            temp_config = config.copy()
-            if platform in best_params and symbol in best_params[platform]:
-                temp_config["strategy"]["atr_sl_multiplier"] = best_params[platform][symbol]["atr_sl_multiplier"]
-                temp_config["strategy"]["atr_tp_multiplier"] = best_params[platform][symbol]["atr_tp_multiplier"]
-                logger.info(f"{platform}/{symbol}: Verwende optimierte Parameter - SL: {best_params[platform][symbol]['atr_sl_multiplier']}, TP: {best_params[platform][symbol]['atr_tp_multiplier']}")
-            
-            strategy = CompositeStrategy(temp_config, symbol=symbol)
-            df_sim, trades = run_backtest(df_hourly, strategy, temp_config, df_higher=df_higher, symbol=symbol, platform=platform)
-            if df_sim.empty or not trades:
-                logger.warning(f"Kein Ergebnis für {platform}/{symbol} – keine Trades generiert.")
-                continue
-            
-            perf = calculate_performance(df_sim, trades)
-            logger.info(f"Performance für {platform}/{symbol}: {perf}")
-            visualize_backtest(df_sim, trades, title=f"Backtest: {platform}/{symbol}")
-            
-            summary = {
-                "platform": platform,
-                "symbol": symbol,
-                "total_profit": perf["total_profit"],
-                "num_trades": perf["num_trades"],
-                "win_rate": perf["win_rate"],
-                "profit_factor": perf["profit_factor"],
-                "max_drawdown": perf["max_drawdown"],
-                "sharpe": perf["sharpe"],
-                "timestamp": datetime.datetime.now().isoformat()
-            }
-            summaries.append(summary)
+    for summary, _ in run_backtests(config, platforms, best_params):
+        logger.info(f"{summary['platform']}/{summary['symbol']} fertig: Profit {summary['total_profit']:.2f}, "
+                    f"Trades {summary['num_trades']} ({len(summaries) + 1} Symbole abgeschlossen)")
+        summaries.append(summary)
+    # Zusammenfassung in Konfigurationsreihenfolge, unabhängig von der Fertigstellung
+    order = [(platform, symbol) for platform in platforms for symbol in config["trading"][platform]["symbols"]]
+    summaries.sort(key=lambda summary: order.index((summary["platform"], summary["symbol"])))
     
     if summaries:
         save_backtest_summary(summaries)
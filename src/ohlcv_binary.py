@@ -0,0 +1,189 @@
+# src/ohlcv_binary.py
+"""
+Binäres OHLCV-Format für schnelles Laden per Memory-Mapping (Endung .ohlcv, eine Datei pro Symbol/Intervall).
+
+Aufbau (little-endian, alle Abschnitte auf 64 Byte ausgerichtet):
+
+    Header       HEADER_DTYPE: Magic, Version, Zeilen, Zeilen pro Chunk, Anzahl Chunks
+    Chunk-Index  INDEX_DTYPE je Chunk: erster und letzter Zeitstempel (ns) der Zeilen
+                 [i * chunk_rows, (i + 1) * chunk_rows)
+    Spalten      timestamp (int64, ns), open/high/low/close/volume (float64) – jeweils zusammenhängend
+
+Der Chunk-Index erlaubt Zeitbereichs-Abfragen, ohne die Zeitstempel-Spalte komplett zu lesen; die Spalten werden
+nur gemappt, nicht geparst – read_ohlcv() liefert einen DataFrame aus Views in wenigen Millisekunden.
+
+Konvertierung der vorhandenen Dateien:
+
+    python -m src.ohlcv_binary data/historical/*.csv -o data/binary
+"""
+import os
+import re
+import argparse
+import numpy as np
+import pandas as pd
+from src.market_data import MARKET_COLUMNS, PRICE_COLUMNS
+from src.ohlcv_store import OHLCVStore
+from src.utils import logger
+
+DEFAULT_BINARY_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'binary')
+MAGIC = b"OHLCV\x00\x00\x01"
+VERSION = 1
+CHUNK_ROWS = 4096
+ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("chunk_rows", "<u4"), ("rows", "<u8"), ("chunks", "<u8")])
+INDEX_DTYPE = np.dtype([("start", "<i8"), ("end", "<i8")])
+COLUMN_DTYPES = {column: np.dtype("<i8") if column == "timestamp" else np.dtype("<f8") for column in MARKET_COLUMNS}
+
+# z. B. BTCUSDT_1h_2024_data.csv → ("BTCUSDT", "1h")
+SOURCE_NAME_PATTERN = re.compile(r"^(?P<symbol>[A-Za-z0-9]+)_(?P<interval>[A-Za-z0-9]+)")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def binary_path(root: str, symbol: str, interval: str) -> str:
+    return os.path.join(root, f"{symbol}_{interval}.ohlcv")
+
+
+def write_ohlcv(path: str, df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+    """
+    Schreibt die OHLCV-Spalten von df (DatetimeIndex) im Binärformat. Zeitstempel werden sortiert, Duplikate durch
+    den letzten Wert ersetzt (wie OHLCVStore.write). Die Datei wird atomar ersetzt.
+    """
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    rows = len(df)
+    timestamps = df.index.asi8
+    chunks = -(-rows // chunk_rows)
+    index = np.empty(chunks, dtype=INDEX_DTYPE)
+    starts = np.arange(chunks) * chunk_rows
+    index["start"] = timestamps[starts] if rows else []
+    index["end"] = timestamps[np.minimum(starts + chunk_rows, rows) - 1] if rows else []
+    header = np.array([(MAGIC, VERSION, chunk_rows, rows, chunks)], dtype=HEADER_DTYPE)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(header.tobytes())
+        file.write(index.tobytes())
+        for column in MARKET_COLUMNS:
+            values = timestamps if column == "timestamp" else df[column].to_numpy()
+            file.write(b"\x00" * (_aligned(file.tell()) - file.tell()))
+            file.write(np.ascontiguousarray(values, dtype=COLUMN_DTYPES[column]).tobytes())
+    os.replace(temp_path, path)
+
+
+class OHLCVFile:
+    """Gemappte .ohlcv-Datei: Header, Chunk-Index und Spalten als read-only NumPy-Views."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        header = self._map[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{path} ist keine OHLCV-Binärdatei (Version {VERSION})")
+        self.rows = int(header["rows"])
+        self.chunk_rows = int(header["chunk_rows"])
+        offset = HEADER_DTYPE.itemsize
+        chunks = int(header["chunks"])
+        self.index = self._map[offset:offset + chunks * INDEX_DTYPE.itemsize].view(INDEX_DTYPE)
+        offset += chunks * INDEX_DTYPE.itemsize
+        self.columns = {}
+        for column in MARKET_COLUMNS:
+            offset = _aligned(offset)
+            size = self.rows * COLUMN_DTYPES[column].itemsize
+            self.columns[column] = self._map[offset:offset + size].view(COLUMN_DTYPES[column])
+            offset += size
+
+    def bounds(self):
+        """Erster und letzter Zeitstempel (None, None wenn leer) – nur aus dem Chunk-Index."""
+        if not self.rows:
+            return None, None
+        return pd.Timestamp(self.index["start"][0]), pd.Timestamp(self.index["end"][-1])
+
+    def locate(self, timestamp, side: str = "left") -> int:
+        """Zeilenposition wie np.searchsorted auf der Zeitstempel-Spalte, aber nur innerhalb eines Chunks."""
+        value = pd.Timestamp(timestamp).value
+        key = self.index["end"] if side == "left" else self.index["start"]
+        chunk = int(np.searchsorted(key, value, side=side)) - (side == "right")
+        if chunk < 0:
+            return 0
+        if chunk >= len(self.index):
+            return self.rows
+        start = chunk * self.chunk_rows
+        stop = min(start + self.chunk_rows, self.rows)
+        return start + int(np.searchsorted(self.columns["timestamp"][start:stop], value, side=side))
+
+    def frame(self, start=None, end=None) -> pd.DataFrame:
+        """DataFrame mit DatetimeIndex "timestamp" für start <= t <= end; alle Spalten sind Views auf die Datei."""
+        first = self.locate(start, "left") if start is not None else 0
+        last = self.locate(end, "right") if end is not None else self.rows
+        window = slice(first, max(first, last))
+        index = pd.DatetimeIndex(self.columns["timestamp"][window].view("M8[ns]"), name="timestamp")
+        return pd.DataFrame({column: self.columns[column][window] for column in PRICE_COLUMNS}, index=index, copy=False)
+
+
+def read_ohlcv(path: str, start=None, end=None) -> pd.DataFrame:
+    """Lädt eine .ohlcv-Datei (optional nur den Zeitbereich start bis end, inklusive)."""
+    return OHLCVFile(path).frame(start, end)
+
+
+def read_source(path: str) -> pd.DataFrame:
+    """Liest eine vorhandene CSV- (Spalte timestamp) oder Parquet-Datei als OHLCV-DataFrame."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+        if "timestamp" in df.columns:
+            df = df.set_index("timestamp")
+    else:
+        df = pd.read_csv(path, index_col="timestamp", parse_dates=True)
+    df.index = pd.DatetimeIndex(df.index, name="timestamp")
+    if "volume" not in df.columns:
+        # MetaTrader-Exporte (tick_volume) bzw. ältere Dateien mit Basis-Volumen (z. B. volume_btc)
+        aliases = [column for column in df.columns if column == "tick_volume" or column.startswith("volume_")]
+        if aliases:
+            df = df.rename(columns={aliases[0]: "volume"})
+    return df[PRICE_COLUMNS]
+
+
+def convert_to_binary(source: str, output_dir: str = DEFAULT_BINARY_PATH, symbol: str = None, interval: str = None) -> str:
+    """
+    Konvertiert eine CSV-/Parquet-Datei nach output_dir/{symbol}_{interval}.ohlcv. Symbol und Intervall werden, wenn
+    nicht angegeben, aus dem Dateinamen gelesen (BTCUSDT_1h_2024_data.csv → BTCUSDT, 1h).
+    """
+    if symbol is None or interval is None:
+        match = SOURCE_NAME_PATTERN.match(os.path.basename(source))
+        if match is None:
+            raise ValueError(f"Symbol/Intervall nicht aus {source} ableitbar, bitte angeben")
+        symbol, interval = symbol or match["symbol"], interval or match["interval"]
+    path = binary_path(output_dir, symbol, interval)
+    write_ohlcv(path, read_source(source))
+    logger.info(f"{source} → {path}")
+    return path
+
+
+def convert_store(store: OHLCVStore, symbol: str, interval: str, output_dir: str = DEFAULT_BINARY_PATH) -> str:
+    """Konvertiert alle Monatsdateien eines Symbols/Intervalls aus dem Parquet-Store in eine .ohlcv-Datei."""
+    df = store.read(symbol, interval)
+    if df is None:
+        raise FileNotFoundError(f"Keine Daten für {symbol}/{interval} in {store.root}")
+    path = binary_path(output_dir, symbol, interval)
+    write_ohlcv(path, df[PRICE_COLUMNS])
+    logger.info(f"{store.root}/{symbol}/{interval} → {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Konvertiert CSV-/Parquet-OHLCV-Dateien in das Binärformat (.ohlcv).")
+    parser.add_argument("sources", nargs="+", help="CSV- oder Parquet-Dateien, z. B. data/historical/*.csv")
+    parser.add_argument("-o", "--output", default=DEFAULT_BINARY_PATH, help="Zielverzeichnis (Standard: data/binary)")
+    args = parser.parse_args()
+    for source in args.sources:
+        try:
+            convert_to_binary(source, args.output)
+        except Exception as e:
+            logger.error(f"Konvertierung von {source} fehlgeschlagen: {e}")
+
+
+if __name__ == "__main__":
+    main()
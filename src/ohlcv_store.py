@@ -0,0 +1,69 @@
+# src/ohlcv_store.py
+import os
+import glob
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'store')
+
+# Binance-Kline-Intervalle in Millisekunden
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000,
+    "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+
+
+class OHLCVStore:
+    """Lokaler OHLCV-Speicher: eine Parquet-Datei pro Symbol/Intervall/Monat (z. B. BTCUSDT/1h/2024-07.parquet)."""
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH):
+        self.root = root
+
+    def _partition_dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol, interval)
+
+    def _partition_path(self, symbol: str, interval: str, month: str) -> str:
+        return os.path.join(self._partition_dir(symbol, interval), f"{month}.parquet")
+
+    def partitions(self, symbol: str, interval: str) -> list:
+        """Alle Monatsdateien eines Symbols/Intervalls, chronologisch sortiert."""
+        return sorted(glob.glob(os.path.join(self._partition_dir(symbol, interval), "*.parquet")))
+
+    def bounds(self, symbol: str, interval: str):
+        """Erster und letzter gespeicherter Zeitstempel (None, None wenn leer)."""
+        files = self.partitions(symbol, interval)
+        if not files:
+            return None, None
+        first = pd.read_parquet(files[0]).index.min()
+        last = pd.read_parquet(files[-1]).index.max()
+        return first, last
+
+    def read(self, symbol: str, interval: str, start=None, end=None):
+        """Liest die Daten zwischen start und end (inklusive) – nur die betroffenen Monatsdateien werden geöffnet."""
+        files = self.partitions(symbol, interval)
+        if start is not None:
+            start = pd.Timestamp(start)
+            files = [f for f in files if os.path.basename(f)[:7] >= start.strftime("%Y-%m")]
+        if end is not None:
+            end = pd.Timestamp(end)
+            files = [f for f in files if os.path.basename(f)[:7] <= end.strftime("%Y-%m")]
+        if not files:
+            return None
+        df = pd.concat([pd.read_parquet(f) for f in files])
+        if start is not None:
+            df = df[df.index >= start]
+        if end is not None:
+            df = df[df.index <= end]
+        return df
+
+    def write(self, symbol: str, interval: str, df: pd.DataFrame):
+        """Fügt neue Bars in die Monatsdateien ein; doppelte Zeitstempel werden durch die neuen Werte ersetzt."""
+        if df is None or df.empty:
+            return
+        os.makedirs(self._partition_dir(symbol, interval), exist_ok=True)
+        for period, part in df.groupby(df.index.to_period("M")):
+            path = self._partition_path(symbol, interval, str(period))
+            if os.path.exists(path):
+                part = pd.concat([pd.read_parquet(path), part])
+                part = part[~part.index.duplicated(keep="last")]
+            part.sort_index().to_parquet(path)
@@ -0,0 +1,102 @@
+# src/portfolio.py
+import numpy as np
+import pandas as pd
+from src.backtest_kernel import simulate_portfolio, pip_arrays, POSITION_LABELS, POSITION_LONG, POSITION_SHORT
+from src.backtesting_improved import risk_atr
+from src.metrics import compute_metrics
+from src.strategy import CompositeStrategy
+
+# Eingaben von simulate_portfolio als Matrix (Bars x Symbole); Bars ohne Kerze eines Symbols bleiben NaN bzw. 0/False
+MATRIX_DTYPES = {"close": np.float64, "atr": np.float64, "exit_atr": np.float64, "signal": np.int8, "trend": np.int8,
+                 "friday_close": np.bool_, "ready": np.bool_}
+
+
+def portfolio_inputs(config, platform, data: dict) -> dict:
+    """
+    Richtet die Signal-Kontexte aller Symbole auf die gemeinsame Zeitachse (Vereinigung der Zeitstempel) aus.
+
+    :param data: {symbol: (df_hourly, df_higher)}
+    :return: dict mit "index", "symbols", den Matrizen aus MATRIX_DTYPES plus pip_size/pip_value und den SL/TP-Vektoren
+    """
+    symbols = list(data)
+    index = data[symbols[0]][0].index
+    for symbol in symbols[1:]:
+        index = index.union(data[symbol][0].index)
+    n, m = len(index), len(symbols)
+    inputs = {name: np.full((n, m), np.nan) if dtype == np.float64 else np.zeros((n, m), dtype=dtype)
+              for name, dtype in MATRIX_DTYPES.items()}
+    inputs["pip_size"] = np.full((n, m), np.nan)
+    inputs["pip_value"] = np.full((n, m), np.nan)
+    atr_sl_multiplier, atr_tp_multiplier = np.empty(m), np.empty(m)
+    atr_period = config["risk_management"].get("atr_period", 14)
+
+    for column, symbol in enumerate(symbols):
+        df_hourly, df_higher = data[symbol]
+        strategy = CompositeStrategy(config, symbol=symbol)
+        context = strategy.prepare_signal_context(df_hourly, df_higher)
+        rows = index.get_indexer(df_hourly.index)
+        inputs["close"][rows, column] = context["close"]
+        inputs["atr"][rows, column] = risk_atr(df_hourly, atr_period).to_numpy()
+        inputs["exit_atr"][rows, column] = context["atr"]
+        for name in ["signal", "trend", "friday_close", "ready"]:
+            inputs[name][rows, column] = context[name]
+        # Offene Positionen werden auch an Bars ohne eigene Kerze mit dem letzten Kurs bewertet
+        inputs["close"][:, column] = pd.Series(inputs["close"][:, column]).ffill().to_numpy()
+        inputs["pip_size"][:, column], inputs["pip_value"][:, column] = pip_arrays(inputs["close"][:, column], platform, symbol)
+        atr_sl_multiplier[column] = strategy.atr_sl_multiplier
+        atr_tp_multiplier[column] = strategy.atr_tp_multiplier
+
+    inputs.update({"index": index, "symbols": symbols, "atr_sl_multiplier": atr_sl_multiplier,
+                   "atr_tp_multiplier": atr_tp_multiplier})
+    return inputs
+
+
+def run_portfolio_backtest(config, platform, data: dict, max_open_positions: int = None) -> dict:
+    """
+    Backtest aller Symbole einer Plattform mit gemeinsamem Kapital (risk_management.initial_balance) und höchstens
+    trading.max_open_positions gleichzeitig offenen Positionen (src/backtest_kernel.simulate_portfolio).
+
+    :param data: {symbol: (df_hourly, df_higher)}, z. B. aus load_data je Symbol
+    :return: dict mit "equity" (DataFrame: balance, equity, open_positions), "trades" (DataFrame mit Spalte symbol),
+             "performance" (compute_metrics über die Portfolio-Equity) und "symbols" (Kennzahlen je Symbol)
+    """
+    if platform not in ["binance", "metatrader"]:
+        raise ValueError(f"Ungültige Plattform: {platform}. Erwartet: 'binance' oder 'metatrader'")
+    if max_open_positions is None:
+        max_open_positions = config["trading"].get("max_open_positions", len(data))
+    initial_balance = config["risk_management"].get("initial_balance", 16000)
+    leverage = config["trading"][platform].get("leverage", 1)
+    strategy = CompositeStrategy(config)
+    inputs = portfolio_inputs(config, platform, data)
+    result = simulate_portfolio(
+        inputs["close"], inputs["atr"], inputs["exit_atr"], inputs["signal"], inputs["trend"], inputs["friday_close"],
+        inputs["ready"], inputs["pip_size"], inputs["pip_value"], initial_balance, leverage,
+        inputs["atr_sl_multiplier"], inputs["atr_tp_multiplier"], max_open_positions,
+        strategy.initial_balance * strategy.base_risk, strategy.dynamic_risk_factor,
+        0.0001 if platform == "binance" else 0.01, 5.0
+    )
+
+    index, symbols, trades = inputs["index"], np.array(inputs["symbols"], dtype=object), result["trades"]
+    equity = pd.DataFrame({"balance": result["balance"], "equity": result["equity"],
+                           "open_positions": result["open_count"]}, index=index)
+    trade_df = pd.DataFrame({
+        "symbol": symbols[trades["symbol"]],
+        "type": np.where(trades["type"] == POSITION_LONG, POSITION_LABELS[POSITION_LONG], POSITION_LABELS[POSITION_SHORT]),
+        "entry_time": index[trades["entry_index"]],
+        "exit_time": index[trades["exit_index"]],
+        "entry_price": trades["entry_price"],
+        "exit_price": trades["exit_price"],
+        "units": trades["units"],
+        "pips": trades["pips"],
+        "profit": trades["profit"],
+    })
+    performance = compute_metrics(result["equity"], trades["profit"], trades["type"], trades["entry_index"],
+                                  trades["exit_index"])
+    by_symbol = trade_df.groupby("symbol")["profit"]
+    symbol_stats = pd.DataFrame({
+        "total_profit": by_symbol.sum(),
+        "num_trades": by_symbol.size(),
+        "win_rate": by_symbol.apply(lambda profit: (profit > 0).mean()),
+    }).reindex(inputs["symbols"], fill_value=0)
+    return {"equity": equity, "trades": trade_df, "performance": performance, "symbols": symbol_stats,
+            "open_positions": result["open_positions"]}
@@ -0,0 +1,83 @@
+# src/shared_arrays.py
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class SharedArrays:
+    """
+    Benannte NumPy-Arrays in multiprocessing.shared_memory, damit Worker-Prozesse dieselben Daten lesen, ohne sie
+    zu pickeln oder neu zu berechnen.
+
+    Der Hauptprozess legt die Blöcke an und gibt `spec` (nur Namen, Shapes, dtypes – klein und picklebar) an die
+    Worker weiter; diese öffnen die Arrays mit SharedArrays.attach(spec). Nur der Besitzer gibt den Speicher mit
+    close() bzw. beim Verlassen des with-Blocks frei.
+
+        with SharedArrays({"close": closes}) as shared:
+            executor.submit(worker, shared.spec)
+
+        def worker(spec):
+            with SharedArrays.attach(spec) as shared:
+                closes = shared["close"]  # View, nur lesen
+
+    Die Views sind nur bis close() gültig – Ergebnisse, die den Worker verlassen, dürfen keine Views enthalten.
+    """
+
+    def __init__(self, arrays: dict = None):
+        self.spec = {}
+        self._blocks = {}
+        self._arrays = {}
+        self._owner = True
+        try:
+            for name, values in (arrays or {}).items():
+                self._create(name, np.ascontiguousarray(values))
+        except Exception:
+            self.close()
+            raise
+
+    def _create(self, name: str, values: np.ndarray):
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self._blocks[name] = block
+        array = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+        array[...] = values
+        self._arrays[name] = array
+        self.spec[name] = (block.name, values.shape, values.dtype.str)
+
+    @classmethod
+    def attach(cls, spec: dict):
+        """Öffnet die Arrays eines bestehenden SharedArrays (z. B. im Worker) anhand seiner spec."""
+        shared = cls.__new__(cls)
+        shared.spec = dict(spec)
+        shared._blocks = {}
+        shared._arrays = {}
+        shared._owner = False
+        for name, (block_name, shape, dtype) in spec.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            shared._blocks[name] = block
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            shared._arrays[name] = array
+        return shared
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def __contains__(self, name: str):
+        return name in self._arrays
+
+    def keys(self):
+        return self._arrays.keys()
+
+    def close(self):
+        """Löst die Views; der Besitzer gibt den Shared Memory zusätzlich frei (unlink)."""
+        self._arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            if self._owner:
+                block.unlink()
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -5,6 +5,9 @@ import os
 import pandas as pd
 import numpy as np
 from src.utils import logger
+from src.timeframe_alignment import align_higher_timeframe, infer_bar_duration
+from src.tracing import Tracer
+import logging
 from datetime import timedelta
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
@@ -15,6 +18,12 @@ def load_config():
 
 config = load_config()
 
+# Numerische Kodierung für die vektorisierte Signalberechnung
+SIGNAL_HOLD, SIGNAL_BUY, SIGNAL_SELL = 0, 1, -1
+SIGNAL_LABELS = {SIGNAL_HOLD: "HOLD", SIGNAL_BUY: "BUY", SIGNAL_SELL: "SELL"}
+TREND_NEUTRAL, TREND_BULLISH, TREND_BEARISH, TREND_UNKNOWN = 0, 1, -1, 2
+TREND_LABELS = {TREND_NEUTRAL: "NEUTRAL", TREND_BULLISH: "BULLISH", TREND_BEARISH: "BEARISH", TREND_UNKNOWN: "UNKNOWN"}
+
 def get_higher_trend_with_gradient(df_higher: pd.DataFrame, lookback: int = 5) -> str:
     if df_higher.empty or len(df_higher) < lookback + 1:
         logger.warning("Nicht genug H4-Daten für Trendbestimmung")
@@ -25,15 +34,47 @@ def get_higher_trend_with_gradient(df_higher: pd.DataFrame, lookback: int = 5) -
         return "UNKNOWN"
     price_changes = np.diff(closes)
     trend_score = np.mean(price_changes)
-    if trend_score > 0.00005:
-        logger.debug(f"BULLISH: Closes {list(closes)}, Trend Score {trend_score:.5f}")
-        return "BULLISH"
-    elif trend_score < -0.00005:
-        logger.debug(f"BEARISH: Closes {list(closes)}, Trend Score {trend_score:.5f}")
-        return "BEARISH"
+    trend = "BULLISH" if trend_score > 0.00005 else "BEARISH" if trend_score < -0.00005 else "NEUTRAL"
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: Closes %s, Trend Score %.5f", trend, list(closes), trend_score)
+    return trend
+
+def higher_trend_codes(df_higher: pd.DataFrame, lookback: int = 5) -> np.ndarray:
+    """
+    Vektorisierte Variante von get_higher_trend_with_gradient für jede Higher-Timeframe-Bar.
+
+    Element k entspricht get_higher_trend_with_gradient(df_higher.iloc[:k+1], lookback) als TREND_*-Code.
+    """
+    closes = df_higher['close'].to_numpy(dtype=float)
+    codes = np.full(len(closes), TREND_UNKNOWN, dtype=np.int8)
+    if len(closes) < lookback + 1:
+        return codes
+    windows = np.lib.stride_tricks.sliding_window_view(closes, lookback)[1:]
+    if lookback > 1:
+        trend_score = np.diff(windows, axis=1).mean(axis=1)
     else:
-        logger.debug(f"NEUTRAL: Closes {list(closes)}, Trend Score {trend_score:.5f}")
-        return "NEUTRAL"
+        trend_score = np.full(len(windows), np.nan)
+    trend = np.full(len(windows), TREND_NEUTRAL, dtype=np.int8)
+    trend[trend_score > 0.00005] = TREND_BULLISH
+    trend[trend_score < -0.00005] = TREND_BEARISH
+    trend[np.isnan(windows).any(axis=1)] = TREND_UNKNOWN
+    codes[lookback:] = trend
+    return codes
+
+def higher_trend_per_bar(df_1h: pd.DataFrame, df_higher: pd.DataFrame, lookback: int = 5, closed_only: bool = True) -> pd.Series:
+    """Trend-Label (BULLISH/BEARISH/NEUTRAL/UNKNOWN) der letzten abgeschlossenen Higher-Timeframe-Bar je Lower-Bar."""
+    higher_pos = align_higher_timeframe(df_1h.index, df_higher.index, closed_only=closed_only)
+    codes = np.where(higher_pos >= 0, higher_trend_codes(df_higher, lookback)[higher_pos], TREND_UNKNOWN)
+    return pd.Series(codes, index=df_1h.index).map(TREND_LABELS)
+
+def weekend_masks(index: pd.DatetimeIndex, block_hours=4):
+    """Vektorisierte Variante von detect_friday_close_or_monday_pause: (friday_close, monday_block) als bool-Arrays."""
+    weekday = index.weekday.to_numpy()
+    hour = index.hour.to_numpy()
+    hours_since_midnight = (index - index.normalize()).total_seconds().to_numpy() / 3600
+    friday_close = (weekday == 4) & (hour >= 20)
+    monday_block = (weekday == 0) & (hours_since_midnight <= block_hours)
+    return friday_close, monday_block
 
 def detect_friday_close_or_monday_pause(current_time, df_1h, block_hours=4):
     if current_time.weekday() == 4 and current_time.hour >= 20:
@@ -47,9 +88,56 @@ def detect_friday_close_or_monday_pause(current_time, df_1h, block_hours=4):
             return "BLOCK"
     return None
 
+class IndicatorCache:
+    """
+    Vektorisierte Indikator-Reihen eines Datensatzes, je Indikator und Parameter nur einmal berechnet – z. B. für
+    Parameter-Sweeps, in denen viele Konfigurationen dieselbe RSI-Periode teilen.
+
+    Die Reihen liegen unter Schlüsseln wie "rsi:5" in `series`; ein Sweep kann sie vorab berechnen, per Shared Memory
+    an Worker geben und dort mit IndicatorCache(df_1h, df_higher, series=...) wieder einsetzen.
+    """
+
+    def __init__(self, df_1h: pd.DataFrame, df_higher: pd.DataFrame, series: dict = None):
+        self.df_1h = df_1h
+        self.df_higher = df_higher
+        self.series = dict(series) if series is not None else {}
+
+    def _get(self, key, compute):
+        if key not in self.series:
+            self.series[key] = compute()
+        return self.series[key]
+
+    def rsi(self, period: int) -> np.ndarray:
+        return self._get(f"rsi:{period}", lambda: talib.RSI(self.df_1h['close'], timeperiod=period).to_numpy())
+
+    def atr(self, period: int) -> np.ndarray:
+        df = self.df_1h
+        return self._get(f"atr:{period}", lambda: talib.ATR(df['high'], df['low'], df['close'], timeperiod=period).to_numpy())
+
+    def higher_pos(self, closed_only: bool) -> np.ndarray:
+        """Position der zugeordneten Kerze des höheren Zeitrahmens je Bar (-1 = noch keine)."""
+        return self._get(f"higher_pos:{int(closed_only)}",
+                         lambda: align_higher_timeframe(self.df_1h.index, self.df_higher.index, closed_only=closed_only))
+
+    def trend(self, lookback: int, closed_only: bool) -> np.ndarray:
+        """Trend-Code des höheren Zeitrahmens je Bar (TREND_UNKNOWN vor der ersten zugeordneten Kerze)."""
+        def compute():
+            higher_pos = self.higher_pos(closed_only)
+            return np.where(higher_pos >= 0, higher_trend_codes(self.df_higher, lookback)[higher_pos], TREND_UNKNOWN)
+        return self._get(f"trend:{lookback}:{int(closed_only)}", compute)
+
+    def weekend(self, block_hours) -> tuple:
+        if f"friday_close:{block_hours}" not in self.series:
+            friday_close, monday_block = weekend_masks(self.df_1h.index, block_hours)
+            self.series[f"friday_close:{block_hours}"] = friday_close
+            self.series[f"monday_block:{block_hours}"] = monday_block
+        return self.series[f"friday_close:{block_hours}"], self.series[f"monday_block:{block_hours}"]
+
+
 class CompositeStrategy:
-    def __init__(self, config, symbol=None, balance=None):
+    def __init__(self, config, symbol=None, balance=None, indicators=None):
         self.config = config
+        self.indicators = indicators  # SymbolIndicators für den Live-Betrieb (inkrementell statt talib auf dem ganzen DataFrame)
         strategy_config = config.get("strategy", {})
         risk_config = config.get("risk_management", {})
         self.rsi_period = strategy_config.get("rsi_period", 5)
@@ -60,8 +148,12 @@ class CompositeStrategy:
         self.volume_filter = strategy_config.get("volume_filter", False)
         self.volume_threshold = strategy_config.get("volume_threshold", None)
         self.extended_debug = strategy_config.get("extended_debug", True)
+        # extended_debug schreibt die Entscheidungsdetails pro Bar in den Trace-Ringpuffer (früher print)
+        self.tracer = Tracer.from_config(config, f"strategy_{symbol}",
+                                         enabled=self.extended_debug or config.get("tracing", {}).get("enabled", False))
         self.gap_threshold = strategy_config.get("gap_threshold", 0.005)
         self.gap_block_hours = strategy_config.get("gap_block_hours", 4)
+        self.higher_tf_closed_only = strategy_config.get("higher_tf_closed_only", False)
         self.volume_weight = strategy_config.get("volume_weight", 0.5)
         self.initial_balance = risk_config.get("initial_balance", 16000)
         self.base_risk = risk_config.get("base_risk", 0.01)
@@ -70,12 +162,13 @@ class CompositeStrategy:
         
         # Plattform-spezifische Parameter laden
         if symbol:
-            if config["platforms"]["metatrader"] and "metatrader" in config["trading"]:
-                symbol_params = config["trading"]["metatrader"]["symbols"].get(symbol, {})
-            elif config["platforms"]["binance"] and "binance" in config["trading"]:
-                symbol_params = config["trading"]["binance"]["symbols"].get(symbol, {})
-            else:
-                symbol_params = {}
+            # Abschnitt der Plattform, die das Symbol handelt (bei beiden aktiven Plattformen nicht immer MetaTrader)
+            symbol_params = {}
+            for platform in ["metatrader", "binance"]:
+                platform_symbols = config["trading"].get(platform, {}).get("symbols") or {}
+                if config["platforms"].get(platform) and symbol in platform_symbols:
+                    symbol_params = platform_symbols[symbol] or {}
+                    break
             self.atr_tp_multiplier = symbol_params.get("atr_tp_multiplier", strategy_config.get("atr_tp_multiplier", 6.0))
             self.atr_sl_multiplier = symbol_params.get("atr_sl_multiplier", strategy_config.get("atr_sl_multiplier", 1.5))
         else:
@@ -91,19 +184,92 @@ class CompositeStrategy:
         return self.initial_balance * self.base_risk + self.balance * self.dynamic_risk_factor
 
     def generate_signal(self, df_1h: pd.DataFrame, df_higher: pd.DataFrame, current_position: str = "NONE", symbol: str = None, entry_price: float = None) -> str:
+        if self.higher_tf_closed_only and len(df_1h) > 1:
+            # Noch laufende H4-Kerze (z. B. letzte Kline der Live-API) nicht für den Trend verwenden
+            higher_pos = align_higher_timeframe(df_1h.index[-1:], df_higher.index, lower_duration=infer_bar_duration(df_1h.index))
+            df_higher = df_higher.iloc[:higher_pos[0] + 1]
         if df_1h.empty or df_higher.empty or len(df_1h) < max(self.rsi_period, self.atr_period) + 1:
             logger.warning("Daten leer oder nicht genug Daten – Signal: HOLD")
             return "HOLD"
 
-        rsi_series = talib.RSI(df_1h['close'], timeperiod=self.rsi_period)
-        current_rsi = rsi_series.iloc[-1]
-        prev_rsi = rsi_series.iloc[-2] if len(rsi_series) > 1 else None
+        if self.indicators is not None:
+            current_rsi = self.indicators.rsi.sync(df_1h)
+            prev_rsi = self.indicators.rsi.value
+            higher_trend = self.indicators.trend.sync(df_higher)
+        else:
+            rsi_series = talib.RSI(df_1h['close'], timeperiod=self.rsi_period)
+            current_rsi = rsi_series.iloc[-1]
+            prev_rsi = rsi_series.iloc[-2] if len(rsi_series) > 1 else None
+            higher_trend = get_higher_trend_with_gradient(df_higher, lookback=self.lookback)
+
+        atr = None
+        if current_position in ("LONG", "SHORT") and entry_price is not None:
+            atr = self.current_atr(df_1h)
+
+        return self._decide_signal(df_1h.index[-1], df_1h['close'].iloc[-1], current_rsi, prev_rsi,
+                                   higher_trend, atr, current_position, symbol, entry_price)
+
+    def current_atr(self, df_1h: pd.DataFrame) -> float:
+        """ATR der letzten Bar – inkrementell über self.indicators, sonst talib über den ganzen DataFrame."""
+        if self.indicators is not None:
+            return self.indicators.atr.sync(df_1h)
+        return talib.ATR(df_1h['high'], df_1h['low'], df_1h['close'], timeperiod=self.atr_period).iloc[-1]
+
+    def generate_signals(self, df_1h: pd.DataFrame, df_higher: pd.DataFrame) -> np.ndarray:
+        """
+        Einstiegssignale (SIGNAL_BUY/SIGNAL_SELL/SIGNAL_HOLD) für alle Bars in einem Durchlauf.
+
+        Entspricht generate_signal() bei flacher Position; Ausstiege (SL, Trailing TP, Trendwechsel,
+        Freitags-Close) hängen von der Position ab und werden im Backtest-Kernel (simulate_positions) geprüft.
+        """
+        return self.prepare_signal_context(df_1h, df_higher)["signal"]
+
+    def prepare_signal_context(self, df_1h: pd.DataFrame, df_higher: pd.DataFrame, cache: IndicatorCache = None) -> dict:
+        """
+        Berechnet RSI, ATR, H4-Trend, Wochenend-Masken und Einstiegssignale einmalig als NumPy-Arrays.
+
+        Alle Indikatoren sind kausal (Wert bei Bar i hängt nur von Bars <= i ab), daher entspricht das Signal bei Bar i
+        dem von generate_signal() auf dem Präfix df_1h.iloc[:i+1]. Der Backtest übergibt den Kontext an
+        simulate_positions (src/backtest_kernel.py), der die Positionen mit O(1) Aufwand pro Bar fortschreibt;
+        generate_signal() bleibt für den Live-Bot.
+
+        cache: IndicatorCache über denselben Daten – bereits berechnete Reihen werden übernommen statt neu berechnet.
+        """
+        if cache is None:
+            cache = IndicatorCache(df_1h, df_higher)
+        closes = df_1h['close']
+        rsi = cache.rsi(self.rsi_period)
+        atr = cache.atr(self.atr_period)
+        trend = cache.trend(self.lookback, self.higher_tf_closed_only)
+        friday_close, monday_block = cache.weekend(self.gap_block_hours)
+        higher_pos = cache.higher_pos(self.higher_tf_closed_only)
+        ready = (higher_pos >= 0) & (np.arange(len(df_1h)) >= max(self.rsi_period, self.atr_period))
+
+        prev_rsi = np.concatenate(([np.nan], rsi[:-1]))
+        rsi_buy = (prev_rsi <= self.rsi_oversold) & (rsi > self.rsi_oversold)
+        rsi_sell = (prev_rsi >= self.rsi_overbought) & (rsi < self.rsi_overbought)
+        signal = np.where(rsi_buy & (trend == TREND_BULLISH), SIGNAL_BUY,
+                          np.where(~rsi_buy & rsi_sell & (trend == TREND_BEARISH), SIGNAL_SELL, SIGNAL_HOLD)).astype(np.int8)
+        signal[friday_close | monday_block | ~ready] = SIGNAL_HOLD
+
+        return {
+            "index": df_1h.index,
+            "close": closes.to_numpy(dtype=float),
+            "rsi": rsi,
+            "atr": atr,
+            "trend": trend,
+            "friday_close": friday_close,
+            "monday_block": monday_block,
+            "ready": ready,
+            "signal": signal,
+        }
+
+    def _decide_signal(self, current_time, current_price, current_rsi, prev_rsi, higher_trend, atr,
+                       current_position: str, symbol: str, entry_price: float) -> str:
         rsi_buy = prev_rsi is not None and prev_rsi <= self.rsi_oversold and current_rsi > self.rsi_oversold
         rsi_sell = prev_rsi is not None and prev_rsi >= self.rsi_overbought and current_rsi < self.rsi_overbought
         initial_signal = "BUY" if rsi_buy else "SELL" if rsi_sell else "HOLD"
 
-        higher_trend = get_higher_trend_with_gradient(df_higher, lookback=self.lookback)
-
         trend_condition = True
         if higher_trend == "NEUTRAL":
             trend_condition = False
@@ -112,8 +278,7 @@ class CompositeStrategy:
         elif initial_signal == "SELL" and higher_trend != "BEARISH":
             trend_condition = False
 
-        current_time = df_1h.index[-1]
-        weekend_action = detect_friday_close_or_monday_pause(current_time, df_1h, self.gap_block_hours)
+        weekend_action = detect_friday_close_or_monday_pause(current_time, None, self.gap_block_hours)
         if weekend_action == "CLOSE_ALL":
             if current_position == "LONG":
                 return "CLOSE_LONG"
@@ -125,26 +290,26 @@ class CompositeStrategy:
             logger.info("Signale blockiert wegen Montag-Pause")
 
         if current_position == "LONG" and entry_price is not None:
-            atr = talib.ATR(df_1h['high'], df_1h['low'], df_1h['close'], timeperiod=self.atr_period).iloc[-1]
-            current_price = df_1h['close'].iloc[-1]
             stop_loss = entry_price - self.atr_sl_multiplier * atr
             if self.highest_price is None or current_price > self.highest_price:
                 self.highest_price = current_price
             trailing_tp = self.highest_price - self.atr_tp_multiplier * atr
-            if self.extended_debug:
-                print(f"[DEBUG] ATR: {atr:.5f}, Trailing TP: {trailing_tp:.5f}, SL: {stop_loss:.5f}, Current: {current_price:.5f}, Highest: {self.highest_price:.5f}")
+            if self.tracer.enabled:
+                self.tracer.record("exit_check", time=current_time, symbol=symbol, position=current_position, atr=atr,
+                                   trailing_tp=trailing_tp, stop_loss=stop_loss, close=current_price,
+                                   extreme_price=self.highest_price)
             if current_price <= trailing_tp or current_price <= stop_loss or (higher_trend == "BEARISH" and current_position == "LONG"):
                 self.highest_price = None
                 return "CLOSE_LONG"
         elif current_position == "SHORT" and entry_price is not None:
-            atr = talib.ATR(df_1h['high'], df_1h['low'], df_1h['close'], timeperiod=self.atr_period).iloc[-1]
-            current_price = df_1h['close'].iloc[-1]
             stop_loss = entry_price + self.atr_sl_multiplier * atr
             if self.lowest_price is None or current_price < self.lowest_price:
                 self.lowest_price = current_price
             trailing_tp = self.lowest_price + self.atr_tp_multiplier * atr
-            if self.extended_debug:
-                print(f"[DEBUG] ATR: {atr:.5f}, Trailing TP: {trailing_tp:.5f}, SL: {stop_loss:.5f}, Current: {current_price:.5f}, Lowest: {self.lowest_price:.5f}")
+            if self.tracer.enabled:
+                self.tracer.record("exit_check", time=current_time, symbol=symbol, position=current_position, atr=atr,
+                                   trailing_tp=trailing_tp, stop_loss=stop_loss, close=current_price,
+                                   extreme_price=self.lowest_price)
             if current_price >= trailing_tp or current_price >= stop_loss or (higher_trend == "BULLISH" and current_position == "SHORT"):
                 self.lowest_price = None
                 return "CLOSE_SHORT"
@@ -157,18 +322,9 @@ class CompositeStrategy:
         if (current_position == "LONG" and initial_signal == "BUY") or (current_position == "SHORT" and initial_signal == "SELL"):
             duplicate_condition = False
 
-        if self.extended_debug:
-            current_time = df_1h.index[-1]
-            current_close = df_1h['close'].iloc[-1]
-            print(f"[DEBUG] Zeit: {current_time}, RSI: {current_rsi:.2f}, Close: {current_close:.2f}")
-            print(f"[DEBUG] Tagestrend (Gradient Lookback {self.lookback}): {higher_trend}")
-            print(f"[DEBUG] Requested symbol: {symbol}")
-            print(f"[DEBUG] RSI values: {current_rsi:.2f}")
-            print(f"[DEBUG] Initial signal based on RSI: {initial_signal}")
-            print(f"[DEBUG] Trend condition: {trend_condition}")
-            print(f"[DEBUG] Current position: {current_position} | Duplicate condition: {duplicate_condition}")
-
         final_signal = initial_signal if (trend_condition and duplicate_condition) else "HOLD"
-        if self.extended_debug:
-            print(f"[DEBUG] Final signal: {final_signal}")
-        return final_signal
\ No newline at end of file
+        if self.tracer.enabled:
+            self.tracer.record("signal", time=current_time, symbol=symbol, close=current_price, rsi=current_rsi,
+                               higher_trend=higher_trend, initial_signal=initial_signal, trend_condition=trend_condition,
+                               position=current_position, duplicate_condition=duplicate_condition, signal=final_signal)
+        return final_signal
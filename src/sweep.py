@@ -0,0 +1,137 @@
+# src/sweep.py
+import os
+import copy
+import itertools
+import yaml
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.backtesting_improved import run_backtest_batch, risk_atr
+from src.market_data import MarketDataPlane, MarketDataView, timeframes
+from src.shared_arrays import SharedArrays
+from src.strategy import CompositeStrategy, IndicatorCache
+from src.utils import logger
+
+# Ausstiegsparameter: ändern nur SL/Trailing TP, nicht den Signalstrom
+EXIT_PARAMS = ["atr_sl_multiplier", "atr_tp_multiplier"]
+SUMMARY_METRICS = ["total_profit", "num_trades", "win_rate", "profit_factor", "max_drawdown", "sharpe"]
+
+
+def expand_grid(grid: dict, prefix: str = "grid") -> list:
+    """Kartesisches Produkt eines Grids {parameter: [werte]} als Liste von Konfigurationen mit Namen."""
+    keys = list(grid)
+    values = [grid[key] if isinstance(grid[key], list) else [grid[key]] for key in keys]
+    return [{"name": f"{prefix}_{i:05d}", **dict(zip(keys, combo))} for i, combo in enumerate(itertools.product(*values))]
+
+
+def load_sweep(path: str = "config/tuning.yaml") -> list:
+    """Benannte Presets (Abschnitt tuning) plus alle Kombinationen des optionalen Abschnitts grid."""
+    with open(path, "r") as file:
+        sweep_config = yaml.safe_load(file) or {}
+    params_list = [dict(tune) for tune in sweep_config.get("tuning") or []]
+    if sweep_config.get("grid"):
+        params_list.extend(expand_grid(sweep_config["grid"]))
+    return params_list
+
+
+def apply_sweep_params(config, platform, symbol, params) -> dict:
+    """Konfiguration mit den Strategie-Parametern einer Sweep-Konfiguration (SL/TP auch als Symbol-Override)."""
+    temp_config = copy.deepcopy(config)
+    for key, value in params.items():
+        if key == "name":
+            continue
+        temp_config["strategy"][key] = value
+        if key in EXIT_PARAMS:
+            temp_config["trading"][platform]["symbols"].setdefault(symbol, {})[key] = value
+    return temp_config
+
+
+def signal_key(params: dict) -> tuple:
+    """Alle Parameter außer SL/TP – Konfigurationen mit gleichem Schlüssel teilen denselben Signalstrom."""
+    return tuple(sorted((key, value) for key, value in params.items() if key not in EXIT_PARAMS and key != "name"))
+
+
+def group_by_signal(params_list: list) -> dict:
+    """Gruppiert (Position, Parameter) nach signal_key, in der Reihenfolge des ersten Auftretens."""
+    groups = {}
+    for position, params in enumerate(params_list):
+        groups.setdefault(signal_key(params), []).append((position, params))
+    return groups
+
+
+def build_indicator_cache(config, platform, symbol, df_hourly, df_higher, groups: dict) -> IndicatorCache:
+    """Berechnet jede RSI-/ATR-/Trend-Reihe, die eine der Signalgruppen braucht, genau einmal."""
+    cache = IndicatorCache(df_hourly, df_higher)
+    for group in groups.values():
+        temp_config = apply_sweep_params(config, platform, symbol, group[0][1])
+        CompositeStrategy(temp_config, symbol=symbol).prepare_signal_context(df_hourly, df_higher, cache=cache)
+        atr_period = temp_config["risk_management"].get("atr_period", 14)
+        if f"risk_atr:{atr_period}" not in cache.series:
+            cache.series[f"risk_atr:{atr_period}"] = risk_atr(df_hourly, atr_period).to_numpy()
+    return cache
+
+
+def evaluate_group(config, platform, symbol, market_spec, cache_spec, tasks):
+    """
+    Worker-Funktion für den Prozess-Pool: bewertet Konfigurationen einer Signalgruppe auf den geteilten Kursdaten und
+    Indikator-Reihen. Der Signal-Kontext wird einmal aus dem Cache gebaut, alle SL/TP-Paare der Gruppe laufen in einem
+    gemeinsamen Kernel-Durchlauf (run_backtest_batch).
+    """
+    market = MarketDataView.attach(market_spec)
+    shared = SharedArrays.attach(cache_spec)
+    try:
+        return _evaluate_group(config, platform, symbol, market, shared, tasks)
+    finally:
+        shared.close()
+        market.close()
+
+
+def _evaluate_group(config, platform, symbol, market, shared, tasks):
+    timeframe, higher_tf = timeframes(config, platform)
+    df_hourly = market.frame(symbol, timeframe)
+    df_higher = market.frame(symbol, higher_tf)
+    cache = IndicatorCache(df_hourly, df_higher, series={key: shared[key] for key in shared.keys()})
+    # Alle Konfigurationen eines Tasks teilen die Signal-Parameter, sie unterscheiden sich nur in SL/TP
+    temp_config = apply_sweep_params(config, platform, symbol, tasks[0][1])
+    strategy = CompositeStrategy(temp_config, symbol=symbol)
+    context = strategy.prepare_signal_context(df_hourly, df_higher, cache=cache)
+    context["risk_atr"] = cache.series[f"risk_atr:{temp_config['risk_management'].get('atr_period', 14)}"]
+    exits = [(params.get("atr_sl_multiplier", strategy.atr_sl_multiplier),
+              params.get("atr_tp_multiplier", strategy.atr_tp_multiplier)) for _, params in tasks]
+    metrics = run_backtest_batch(df_hourly, strategy, temp_config, [sl for sl, _ in exits], [tp for _, tp in exits],
+                                 df_higher=df_higher, symbol=symbol, platform=platform, context=context)
+    return [(position, {**params, **{key: metrics[key].iloc[row] for key in SUMMARY_METRICS}})
+            for row, (position, params) in enumerate(tasks)]
+
+
+def run_sweep(config, platform, symbol, df_hourly, df_higher, params_list: list, max_workers: int = None) -> pd.DataFrame:
+    """
+    Bewertet alle Konfigurationen von params_list (z. B. load_sweep()) für ein Symbol.
+
+    Konfigurationen werden nach ihren Signal-Parametern gruppiert; jede benötigte RSI-/ATR-/Trend-Reihe wird einmal
+    im Hauptprozess berechnet und wie die Kursdaten per Shared Memory an die Worker gegeben. Die SL/TP-Paare einer
+    Gruppe laufen gemeinsam durch den Batch-Kernel; große Gruppen werden in Blöcke geteilt, damit alle Worker
+    ausgelastet sind.
+
+    :return: DataFrame mit einer Zeile je Konfiguration (Parameter und SUMMARY_METRICS) in der Reihenfolge von params_list
+    """
+    groups = group_by_signal(params_list)
+    cache = build_indicator_cache(config, platform, symbol, df_hourly, df_higher, groups)
+    logger.info(f"{platform}/{symbol}: {len(params_list)} Konfigurationen, {len(groups)} Signalgruppen, "
+                f"{len(cache.series)} Indikator-Reihen im Cache")
+
+    max_workers = max_workers or config.get("tuning", {}).get("max_workers") or os.cpu_count() or 1
+    chunk = max(1, -(-len(params_list) // (max_workers * 4)))
+    tasks = [group[i:i + chunk] for group in groups.values() for i in range(0, len(group), chunk)]
+
+    timeframe, higher_tf = timeframes(config, platform)
+    rows = []
+    with MarketDataPlane() as market, SharedArrays(cache.series) as shared:
+        market.add(symbol, timeframe, df_hourly)
+        market.add(symbol, higher_tf, df_higher)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(evaluate_group, config, platform, symbol, market.spec, shared.spec, task)
+                       for task in tasks]
+            for future in futures:
+                rows.extend(future.result())
+    rows.sort(key=lambda row: row[0])
+    return pd.DataFrame([row for _, row in rows])
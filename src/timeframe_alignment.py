@@ -0,0 +1,36 @@
+# src/timeframe_alignment.py
+import numpy as np
+import pandas as pd
+
+
+def infer_bar_duration(index: pd.DatetimeIndex):
+    """Ermittelt die Bar-Dauer als Median der Zeitabstände (robust gegen Wochenend-Lücken)."""
+    if len(index) < 2:
+        return None
+    return pd.Timedelta(np.median(np.diff(index.asi8)), unit="ns")
+
+
+def align_higher_timeframe(lower_index: pd.DatetimeIndex, higher_index: pd.DatetimeIndex, closed_only: bool = True,
+                           lower_duration=None, higher_duration=None) -> np.ndarray:
+    """
+    Ordnet jeder Lower-Timeframe-Bar die Position der letzten verwendbaren Higher-Timeframe-Bar zu (-1 = keine).
+
+    Zeitstempel sind Eröffnungszeiten. Mit closed_only=True gilt eine Higher-Bar erst dann als verwendbar, wenn sie
+    spätestens mit dem Schluss der Lower-Bar abgeschlossen ist (open + Dauer <= lower open + Dauer). So fließt eine
+    noch laufende H4-/D1-Kerze nicht in die Entscheidung ein. closed_only=False entspricht dem bisherigen Filter
+    df_higher.index <= current_time.
+
+    :param lower_duration: Dauer einer Lower-Bar (Standard: aus lower_index geschätzt)
+    :param higher_duration: Dauer einer Higher-Bar (Standard: aus higher_index geschätzt)
+    :return: int64-Array mit einer Position in higher_index pro Lower-Bar
+    """
+    lower = lower_index.asi8
+    higher = higher_index.asi8
+    if closed_only:
+        lower_duration = lower_duration if lower_duration is not None else infer_bar_duration(lower_index)
+        higher_duration = higher_duration if higher_duration is not None else infer_bar_duration(higher_index)
+        if lower_duration is None or higher_duration is None:
+            return np.full(len(lower), -1, dtype=np.int64)
+        lower = lower + pd.Timedelta(lower_duration).value
+        higher = higher + pd.Timedelta(higher_duration).value
+    return np.searchsorted(higher, lower, side="right").astype(np.int64) - 1
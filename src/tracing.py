@@ -0,0 +1,57 @@
+# src/tracing.py
+import itertools
+from collections import deque
+import pandas as pd
+
+
+class Tracer:
+    """
+    Strukturierter Trace für Hot Paths (Strategie-Entscheidungen, Backtest-Bars).
+
+    Einträge werden als rohe Werte in einem Ringpuffer (die letzten capacity Einträge) abgelegt und erst bei dump()
+    formatiert. Aufrufer prüfen vorher tracer.enabled, damit ein abgeschalteter Trace nur ein Attribut-Lookup kostet:
+
+        if self.tracer.enabled:
+            self.tracer.record("signal", time=current_time, rsi=current_rsi)
+
+    sample_every=n übernimmt nur jeden n-ten Eintrag.
+    """
+
+    __slots__ = ("name", "enabled", "sample_every", "_buffer", "_calls")
+
+    def __init__(self, name: str, enabled: bool = False, capacity: int = 10000, sample_every: int = 1):
+        self.name = name
+        self.enabled = enabled
+        self.sample_every = max(int(sample_every), 1)
+        self._buffer = deque(maxlen=capacity)
+        self._calls = itertools.count()
+
+    @classmethod
+    def from_config(cls, config: dict, name: str, enabled: bool = None):
+        """Tracer mit den Einstellungen aus dem Abschnitt tracing der Konfiguration."""
+        tracing_config = config.get("tracing", {})
+        if enabled is None:
+            enabled = tracing_config.get("enabled", False)
+        return cls(name, enabled=enabled, capacity=tracing_config.get("capacity", 10000),
+                   sample_every=tracing_config.get("sample_every", 1))
+
+    def record(self, event: str, **fields):
+        if next(self._calls) % self.sample_every == 0:
+            self._buffer.append((event, fields))
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def clear(self):
+        self._buffer.clear()
+
+    def records(self) -> list:
+        """Einträge als Liste von Dicts (event + Felder), älteste zuerst."""
+        return [{"event": event, **fields} for event, fields in self._buffer]
+
+    def dump(self, path: str = None) -> pd.DataFrame:
+        """Trace als DataFrame; mit path zusätzlich als CSV gespeichert."""
+        df = pd.DataFrame(self.records())
+        if path is not None:
+            df.to_csv(path, index=False)
+        return df
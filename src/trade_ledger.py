@@ -0,0 +1,77 @@
+# src/trade_ledger.py
+import numpy as np
+import pandas as pd
+from src.backtest_kernel import TRADE_DTYPE, POSITION_LABELS, POSITION_LONG, POSITION_SHORT
+
+# Spalten der bisherigen Trade-Dicts bzw. von results/trades_{symbol}.csv
+TRADE_COLUMNS = ["entry_time", "exit_time", "entry_price", "exit_price", "profit", "type", "units", "pips"]
+
+
+class TradeLedger:
+    """
+    Spaltenweises Trade-Journal eines Backtests: ein vorallokiertes strukturiertes Array (TRADE_DTYPE) plus der
+    Bar-Index, über den entry_index/exit_index in Zeitstempel übersetzt werden.
+
+    ledger["profit"] liefert eine Spalte als NumPy-View, ledger["entry_time"]/["exit_time"] die Zeitstempel und
+    ledger["type"] die Codes POSITION_LONG/POSITION_SHORT. to_frame() erzeugt den DataFrame für CSV/Webapp.
+    """
+
+    __slots__ = ("index", "_data", "_size")
+
+    def __init__(self, index: pd.DatetimeIndex, capacity: int = 64):
+        self.index = index
+        self._data = np.empty(max(capacity, 1), dtype=TRADE_DTYPE)
+        self._size = 0
+
+    @classmethod
+    def from_array(cls, index: pd.DatetimeIndex, trades: np.ndarray):
+        """Übernimmt ein fertiges Trade-Array (z. B. aus simulate_positions) ohne Kopie."""
+        ledger = cls.__new__(cls)
+        ledger.index = index
+        ledger._data = trades
+        ledger._size = len(trades)
+        return ledger
+
+    def append(self, entry_index, exit_index, position_type, entry_price, exit_price, units, pips, profit, risk=np.nan):
+        if self._size == len(self._data):
+            grown = np.empty(2 * len(self._data), dtype=TRADE_DTYPE)
+            grown[:self._size] = self._data
+            self._data = grown
+        self._data[self._size] = (entry_index, exit_index, position_type, entry_price, exit_price, units, pips, profit, risk)
+        self._size += 1
+
+    @property
+    def trades(self) -> np.ndarray:
+        """Strukturiertes Array der gebuchten Trades (View, keine Kopie)."""
+        return self._data[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, name: str):
+        if name == "entry_time":
+            return self.index[self.trades["entry_index"]]
+        if name == "exit_time":
+            return self.index[self.trades["exit_index"]]
+        return self.trades[name]
+
+    def sides(self, position_type: int) -> np.ndarray:
+        """bool-Maske der Trades einer Seite (POSITION_LONG/POSITION_SHORT)."""
+        return self.trades["type"] == position_type
+
+    def to_frame(self, symbol: str = None) -> pd.DataFrame:
+        """Trades als DataFrame mit den Spalten der bisherigen Trade-Dicts (type als "LONG"/"SHORT")."""
+        trades = self.trades
+        df = pd.DataFrame({
+            "entry_time": self["entry_time"],
+            "exit_time": self["exit_time"],
+            "entry_price": trades["entry_price"],
+            "exit_price": trades["exit_price"],
+            "profit": trades["profit"],
+            "type": np.where(trades["type"] == POSITION_LONG, POSITION_LABELS[POSITION_LONG], POSITION_LABELS[POSITION_SHORT]),
+            "units": trades["units"],
+            "pips": trades["pips"],
+        }, columns=TRADE_COLUMNS)
+        if symbol is not None:
+            df.insert(0, "symbol", symbol)
+        return df
@@ -1,34 +1,88 @@
 import os
+import copy
 import yaml
 import pandas as pd
 import numpy as np
-from src.backtesting_improved import run_backtest, calculate_performance
+from src.backtesting_improved import run_backtest, run_backtest_batch, calculate_performance
 from src.strategy import CompositeStrategy
 from src.utils import logger
 from src.multi_backtesting import load_data
+from src.market_data import MarketDataPlane, MarketDataView, timeframes
 import logging
-from skopt import gp_minimize
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from skopt import Optimizer
 from skopt.space import Real
 
 def load_config(config_path="config/config.yaml"):
     with open(config_path, "r") as file:
         return yaml.safe_load(file)
 
-def objective(params, config, platform, symbol, df_hourly, df_higher):
-    atr_sl, atr_tp = params
-    temp_config = config.copy()
+def apply_params(config, platform, symbol, atr_sl, atr_tp):
+    temp_config = copy.deepcopy(config)
     temp_config["strategy"]["atr_sl_multiplier"] = float(atr_sl)
     temp_config["strategy"]["atr_tp_multiplier"] = float(atr_tp)
     temp_config["trading"][platform]["symbols"][symbol]["atr_sl_multiplier"] = float(atr_sl)
     temp_config["trading"][platform]["symbols"][symbol]["atr_tp_multiplier"] = float(atr_tp)
+    return temp_config
+
+def batch_objective(points, config, platform, symbol, df_hourly, df_higher, context):
+    """Zielfunktion des Tunings: negativer Profit je (SL, TP)-Punkt, alle in einem Kernel-Durchlauf (run_backtest_batch)."""
+    strategy = CompositeStrategy(config, symbol=symbol)
+    metrics = run_backtest_batch(df_hourly, strategy, config, [p[0] for p in points], [p[1] for p in points],
+                                 df_higher=df_higher, symbol=symbol, platform=platform, context=context)
+    for atr_sl, atr_tp, profit in zip(metrics["atr_sl_multiplier"], metrics["atr_tp_multiplier"], metrics["total_profit"]):
+        logger.info(f"{platform}/{symbol}: Teste SL: {atr_sl:.2f}, TP: {atr_tp:.2f}, Profit: {profit:.2f}")
+    return list(-metrics["total_profit"])
+
+def parameter_grid(value_range, default_step):
+    """Werte eines Bereichs [start, stop(, step)] inklusive stop."""
+    start, stop = value_range[0], value_range[1]
+    step = value_range[2] if len(value_range) > 2 else default_step
+    return np.round(np.arange(start, stop + step / 2, step), 10)
+
+def grid_search(config, platform, symbol, atr_sl_range, atr_tp_range, df_hourly, df_higher, context=None, artifacts=None):
+    """
+    Bewertet alle Kombinationen von atr_sl_range x atr_tp_range (mit der Schrittweite aus dem dritten Element) in einem
+    Kernel-Durchlauf – ein volles Grid kostet damit etwa so viel wie ein einzelner Backtest.
+    """
+    if context is None:
+        context = CompositeStrategy(config, symbol=symbol).prepare_signal_context(df_hourly, df_higher)
+    sl, tp = np.meshgrid(parameter_grid(atr_sl_range, 0.1), parameter_grid(atr_tp_range, 0.5), indexing="ij")
+    points = list(zip(sl.ravel(), tp.ravel()))
+    values = batch_objective(points, config, platform, symbol, df_hourly, df_higher, context)
+    best = points[int(np.argmin(values))]
+    best_params = {"atr_sl_multiplier": float(best[0]), "atr_tp_multiplier": float(best[1])}
+    return best_params, _evaluate_best(config, platform, symbol, best_params, df_hourly, df_higher, context, artifacts)
+
+def optimize(config, platform, symbol, atr_sl_range, atr_tp_range, df_hourly, df_higher, context=None, artifacts=None):
+    """SL/TP-Optimierung nach tuning.method: "bayesian" (Standard) oder "grid"."""
+    method = config.get("tuning", {}).get("method", "bayesian")
+    if method == "grid":
+        return grid_search(config, platform, symbol, atr_sl_range, atr_tp_range, df_hourly, df_higher, context, artifacts)
+    if method != "bayesian":
+        raise ValueError(f"Ungültige Tuning-Methode: {method}. Erwartet: 'bayesian' oder 'grid'")
+    return bayesian_optimization(config, platform, symbol, atr_sl_range, atr_tp_range, df_hourly, df_higher, context,
+                                 artifacts)
+
+def _evaluate_best(config, platform, symbol, best_params, df_hourly, df_higher, context, artifacts):
+    temp_config = apply_params(config, platform, symbol, best_params["atr_sl_multiplier"], best_params["atr_tp_multiplier"])
     strategy = CompositeStrategy(temp_config, symbol=symbol)
-    df_sim, trades = run_backtest(df_hourly, strategy, temp_config, df_higher=df_higher, symbol=symbol, platform=platform)
-    perf = calculate_performance(df_sim, trades)
-    profit = perf["total_profit"]
-    logger.info(f"{platform}/{symbol}: Teste SL: {atr_sl:.2f}, TP: {atr_tp:.2f}, Profit: {profit:.2f}")
-    return -profit  # Negativ, da gp_minimize minimiert
+    # Nur der Lauf mit den besten Parametern schreibt Detail-Log und CSVs
+    df_sim, trades = run_backtest(df_hourly, strategy, temp_config, df_higher=df_higher, symbol=symbol, platform=platform,
+                                  artifacts=artifacts, context=context)
+    return calculate_performance(df_sim, trades)
+
+def bayesian_optimization(config, platform, symbol, atr_sl_range, atr_tp_range, df_hourly, df_higher, context=None,
+                          artifacts=None):
+    """
+    context: vorab berechneter Signal-Kontext für df_hourly (siehe run_backtest), den alle Bewertungen gemeinsam nutzen.
+    artifacts: ob der Abschlusslauf mit den besten Parametern Detail-Log und CSVs schreibt (Standard wie run_backtest).
+    """
+    tuning_config = config.get("tuning", {})
+    n_calls = tuning_config.get("n_calls", 20)
+    if n_calls < 1:
+        raise ValueError(f"Ungültiger Wert für tuning.n_calls: {n_calls}. Erwartet: mindestens 1")
 
-def bayesian_optimization(config, platform, symbol, atr_sl_range, atr_tp_range, df_hourly, df_higher):
     # Logging auf INFO setzen
     original_level = logger.getEffectiveLevel()
     logger.setLevel(logging.INFO)
@@ -42,25 +96,22 @@ def bayesian_optimization(config, platform, symbol, atr_sl_range, atr_tp_range,
         Real(atr_tp_range[0], atr_tp_range[1], name="atr_tp_multiplier")
     ]
     
-    # Bayesian Optimization durchführen
-    result = gp_minimize(
-        lambda params: objective(params, config, platform, symbol, df_hourly, df_higher),
-        space,
-        n_calls=20,  # Anzahl der Iterationen
-        random_state=42,
-        verbose=False
-    )
+    # Bayesian Optimization mit ask/tell: pro Runde werden batch_size Punkte vorgeschlagen und gemeinsam in einem
+    # Kernel-Durchlauf bewertet; die Signale hängen nicht von SL/TP ab und werden nur einmal berechnet
+    if context is None:
+        context = CompositeStrategy(config, symbol=symbol).prepare_signal_context(df_hourly, df_higher)
+    batch_size = tuning_config.get("batch_size", 4)
+    optimizer = Optimizer(space, base_estimator="GP", n_initial_points=min(10, n_calls), random_state=42)
+    evaluated = 0
+    while evaluated < n_calls:
+        points = optimizer.ask(n_points=min(batch_size, n_calls - evaluated))
+        values = batch_objective(points, config, platform, symbol, df_hourly, df_higher, context)
+        result = optimizer.tell(points, values)
+        evaluated += len(points)
     
     # Beste Parameter und Ergebnis
     best_params = {"atr_sl_multiplier": float(result.x[0]), "atr_tp_multiplier": float(result.x[1])}
-    temp_config = config.copy()
-    temp_config["strategy"]["atr_sl_multiplier"] = best_params["atr_sl_multiplier"]
-    temp_config["strategy"]["atr_tp_multiplier"] = best_params["atr_tp_multiplier"]
-    temp_config["trading"][platform]["symbols"][symbol]["atr_sl_multiplier"] = best_params["atr_sl_multiplier"]
-    temp_config["trading"][platform]["symbols"][symbol]["atr_tp_multiplier"] = best_params["atr_tp_multiplier"]
-    strategy = CompositeStrategy(temp_config, symbol=symbol)
-    df_sim, trades = run_backtest(df_hourly, strategy, temp_config, df_higher=df_higher, symbol=symbol, platform=platform)
-    best_result = calculate_performance(df_sim, trades)
+    best_result = _evaluate_best(config, platform, symbol, best_params, df_hourly, df_higher, context, artifacts)
     
     # Logging-Level zurücksetzen
     logger.setLevel(original_level)
@@ -68,34 +119,69 @@ def bayesian_optimization(config, platform, symbol, atr_sl_range, atr_tp_range,
     
     return best_params, best_result
 
+def tune_symbol(config, platform, symbol, atr_sl_range, atr_tp_range, market_spec):
+    """Worker-Funktion für den Prozess-Pool: optimiert ein einzelnes Symbol auf den Daten der MarketDataPlane."""
+    timeframe, higher_tf = timeframes(config, platform)
+    market = MarketDataView.attach(market_spec)
+    try:
+        best_params, result = optimize(config, platform, symbol, atr_sl_range, atr_tp_range,
+                                       market.frame(symbol, timeframe), market.frame(symbol, higher_tf))
+    finally:
+        market.close()
+    return platform, symbol, best_params, result
+
 def tune_all_symbols(config):
     atr_sl_range = config["tuning"]["atr_sl_multiplier_range"]
     atr_tp_range = config["tuning"]["atr_tp_multiplier_range"]
     output_path = config["tuning"]["output_path"]
     
-    best_params_dict = {"binance": {}, "metatrader": {}}
     platforms = []
     if config["platforms"]["binance"]:
         platforms.append("binance")
     if config["platforms"]["metatrader"]:
         platforms.append("metatrader")
+    tasks = [(platform, symbol) for platform in platforms for symbol in config["trading"][platform]["symbols"].keys()]
     
-    for platform in platforms:
-        symbols = config["trading"][platform]["symbols"].keys()
-        for symbol in symbols:
+    # Ein Worker pro Symbol; Daten werden im Hauptprozess geladen und die Studie sofort gestartet,
+    # sodass das Laden der nächsten Symbole parallel zum Tuning der vorherigen läuft. Die Kursdaten liegen in einer
+    # MarketDataPlane, an die Worker geht nur deren spec statt gepickelter DataFrames.
+    max_workers = config["tuning"].get("max_workers") or min(len(tasks), os.cpu_count() or 1) or 1
+    results = {}
+    with MarketDataPlane() as market, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for platform, symbol in tasks:
             logger.info(f"Optimiere {platform}/{symbol}...")
             df_hourly, df_higher = load_data(platform, symbol, config)
             if df_hourly is None or df_higher is None:
                 logger.error(f"Daten für {platform}/{symbol} fehlen, überspringe.")
                 continue
-            best_params, result = bayesian_optimization(config, platform, symbol, atr_sl_range, atr_tp_range, df_hourly, df_higher)
-            best_params_dict[platform][symbol] = best_params
+            timeframe, higher_tf = timeframes(config, platform)
+            market.add(symbol, timeframe, df_hourly)
+            market.add(symbol, higher_tf, df_higher)
+            spec = {key: market.spec[key] for key in [(symbol, timeframe), (symbol, higher_tf)]}
+            future = executor.submit(tune_symbol, config, platform, symbol, atr_sl_range, atr_tp_range, spec)
+            futures[future] = (platform, symbol)
+        for future in as_completed(futures):
+            platform, symbol = futures[future]
+            try:
+                _, _, best_params, result = future.result()
+            except Exception as e:
+                logger.error(f"Tuning für {platform}/{symbol} fehlgeschlagen: {e}")
+                continue
+            results[(platform, symbol)] = best_params
             logger.info(f"{platform}/{symbol}: Beste Parameter: {best_params}, Profit: {result['total_profit']:.2f}")
     
+    # Deterministische Reihenfolge (wie in der Config), unabhängig davon, welcher Worker zuerst fertig ist
+    best_params_dict = {"binance": {}, "metatrader": {}}
+    for platform, symbol in tasks:
+        if (platform, symbol) in results:
+            best_params_dict[platform][symbol] = results[(platform, symbol)]
+    
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, "w") as file:
         yaml.dump(best_params_dict, file, default_flow_style=False, sort_keys=False)
     logger.info(f"Ergebnisse gespeichert in {output_path}")
+    return best_params_dict
 
 if __name__ == "__main__":
     config = load_config()
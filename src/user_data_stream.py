@@ -0,0 +1,215 @@
+# src/user_data_stream.py
+import json
+import time
+import threading
+import collections
+import websocket
+from src.kline_stream import FUTURES_WS_URL, TESTNET_WS_URL
+from src.utils import logger
+
+
+class PositionBook:
+    """
+    Positionen und Guthaben eines Futures-Kontos, fortgeschrieben aus den Events des User-Data-Streams.
+
+    seed() übernimmt einen REST-Snapshot (AccountSnapshot) als Ausgangszustand, apply() jedes Event:
+
+    - ACCOUNT_UPDATE: absolute Positionsgrößen/Einstiegskurse (je positionSide) und Wallet-Guthaben
+    - ORDER_TRADE_UPDATE mit Ausführung (x = TRADE): die Teilmenge wird sofort auf die Position gebucht, damit Fills
+      ohne Warten auf das folgende ACCOUNT_UPDATE sichtbar sind. Fills, die ein ACCOUNT_UPDATE bzw. der Snapshot
+      schon enthält (Transaktionszeit T nicht neuer), werden übersprungen.
+
+    Lesen (position, position_amount, entry_price, balance) ist thread-sicher und ohne Netzwerkzugriff.
+    """
+
+    def __init__(self, history: int = 1000):
+        self.legs = {}  # (symbol, positionSide) -> [amount, entry_price]
+        self.balances = {}
+        self.events = collections.deque(maxlen=history)  # zuletzt angewandte Events (Typ, Symbol, Zeit)
+        self.version = 0
+        self._updated_at = {}  # symbol -> Transaktionszeit (ms) des letzten absoluten Stands
+        self._seeded_at = 0
+        self._lock = threading.Lock()
+
+    def seed(self, snapshot, seeded_at: int = None):
+        """Setzt den Zustand auf einen AccountSnapshot (z. B. nach (Re-)Connect); seeded_at in ms (Standard: jetzt)."""
+        with self._lock:
+            # Je positionSide ein Eintrag, damit ACCOUNT_UPDATE/Fills im Hedge-Modus dieselben Einträge fortschreiben
+            self.legs = {leg: [amount, entry_price] for leg, (amount, entry_price) in snapshot.legs.items() if amount}
+            self.balances = dict(snapshot.balances)
+            self._updated_at = {}
+            self._seeded_at = seeded_at if seeded_at is not None else int(time.time() * 1000)
+            self.version += 1
+
+    def apply(self, event: dict) -> bool:
+        """Wendet ein Event an; True, wenn sich Positionen oder Guthaben geändert haben."""
+        event_type = event.get("e")
+        if event_type == "ACCOUNT_UPDATE":
+            return self._apply_account_update(event)
+        if event_type == "ORDER_TRADE_UPDATE":
+            return self._apply_fill(event)
+        return False
+
+    def _apply_account_update(self, event: dict) -> bool:
+        update = event["a"]
+        transaction_time = event.get("T", event.get("E", 0))
+        with self._lock:
+            for balance in update.get("B", []):
+                self.balances[balance["a"]] = float(balance["wb"])
+            for position in update.get("P", []):
+                symbol = position["s"]
+                self.legs[(symbol, position.get("ps", "BOTH"))] = [float(position["pa"]), float(position["ep"])]
+                self._updated_at[symbol] = max(self._updated_at.get(symbol, 0), transaction_time)
+            self.events.append(("ACCOUNT_UPDATE", update.get("m"), transaction_time))
+            self.version += 1
+        return True
+
+    def _apply_fill(self, event: dict) -> bool:
+        order = event["o"]
+        if order.get("x") != "TRADE":
+            return False
+        symbol = order["s"]
+        transaction_time = order.get("T", event.get("T", 0))
+        with self._lock:
+            if transaction_time <= max(self._updated_at.get(symbol, 0), self._seeded_at):
+                return False  # schon im absoluten Stand enthalten
+            quantity = float(order["l"]) * (1 if order["S"] == "BUY" else -1)
+            leg = self.legs.setdefault((symbol, order.get("ps", "BOTH")), [0.0, 0.0])
+            amount = leg[0] + quantity
+            if amount and (not leg[0] or (leg[0] > 0) == (quantity > 0)):
+                # Aufstocken bzw. Eröffnen: gewichteter Einstiegskurs; Reduzieren lässt ihn unverändert
+                leg[1] = (leg[0] * leg[1] + quantity * float(order["L"])) / amount
+            elif (leg[0] > 0) != (amount > 0) and amount:
+                leg[1] = float(order["L"])  # Positionswechsel über null
+            leg[0] = amount
+            self.events.append(("FILL", symbol, transaction_time))
+            self.version += 1
+        return True
+
+    def position_amount(self, symbol: str) -> float:
+        with self._lock:
+            return sum(leg[0] for (leg_symbol, _), leg in self.legs.items() if leg_symbol == symbol)
+
+    def position(self, symbol: str) -> str:
+        amount = self.position_amount(symbol)
+        return "LONG" if amount > 0 else "SHORT" if amount < 0 else "NONE"
+
+    def entry_price(self, symbol: str):
+        """Einstiegskurs der offenen Position (None ohne Position)."""
+        with self._lock:
+            legs = [leg for (leg_symbol, _), leg in self.legs.items() if leg_symbol == symbol and leg[0]]
+        return legs[0][1] if legs else None
+
+    def balance(self, asset: str = "USDT") -> float:
+        with self._lock:
+            if asset not in self.balances:
+                raise Exception(f"Kein Futures-Guthaben für {asset} gefunden!")
+            return self.balances[asset]
+
+
+class UserDataStream:
+    """
+    Listen-Key-basierter User-Data-Stream (Binance Futures), der ein PositionBook aktuell hält.
+
+    Beim Verbinden wird ein Listen-Key angelegt und das Buch aus dem REST-Konto-Snapshot (connector.account)
+    initialisiert – auch nach jedem Reconnect, damit verpasste Events keine Lücke hinterlassen. Der Listen-Key wird
+    alle keepalive_interval Sekunden verlängert; bei listenKeyExpired wird mit neuem Key neu verbunden.
+    on_update(event) wird nach jeder Änderung des Buchs im Thread des WebSockets aufgerufen.
+    """
+
+    def __init__(self, connector, book: PositionBook = None, base_url: str = None, on_update=None,
+                 keepalive_interval: float = 1800, reconnect_delay: float = 5.0):
+        self.connector = connector
+        self.book = book or PositionBook()
+        self.base_url = base_url or (TESTNET_WS_URL if "testnet" in connector.base_url else FUTURES_WS_URL)
+        self.on_update = on_update
+        self.keepalive_interval = keepalive_interval
+        self.reconnect_delay = reconnect_delay
+        self.running = False
+        self.connected = threading.Event()
+        self.listen_key = None
+        self._ws = None
+        self._thread = None
+        self._keepalive_thread = None
+        self._stopped = threading.Event()
+
+    def handle_message(self, message: str):
+        event = json.loads(message)
+        event = event.get("data", event)
+        if event.get("e") == "listenKeyExpired":
+            logger.warning("User-Data-Stream: Listen-Key abgelaufen – neuer Verbindungsaufbau")
+            self.listen_key = None
+            if self._ws is not None:
+                self._ws.close()
+            return
+        if self.book.apply(event):
+            if event.get("e") == "ORDER_TRADE_UPDATE":
+                self.connector.account.invalidate("Fill im User-Data-Stream")
+            if self.on_update is not None:
+                try:
+                    self.on_update(event)
+                except Exception as e:
+                    logger.error(f"Fehler bei der Verarbeitung von {event.get('e')}: {e}")
+
+    def _on_open(self, ws):
+        try:
+            self.connector.account.invalidate()
+            self.book.seed(self.connector.account.snapshot())
+        except Exception as e:
+            # Ohne Ausgangszustand wäre das Buch leer (alle Symbole "NONE") – trennen und neu verbinden
+            logger.error(f"User-Data-Stream: Konto-Snapshot konnte nicht geladen werden: {e}")
+            ws.close()
+            return
+        self.connected.set()
+        logger.info("User-Data-Stream verbunden")
+
+    def _keepalive(self):
+        while not self._stopped.wait(self.keepalive_interval):
+            if self.listen_key is None:
+                continue
+            try:
+                self.connector.keepalive_listen_key()
+            except Exception as e:
+                logger.error(f"User-Data-Stream: Listen-Key konnte nicht verlängert werden: {e}")
+
+    def _run(self):
+        while self.running:
+            try:
+                self.listen_key = self.connector.create_listen_key()
+            except Exception as e:
+                logger.error(f"User-Data-Stream: Listen-Key konnte nicht angelegt werden: {e}")
+            else:
+                self._ws = websocket.WebSocketApp(
+                    f"{self.base_url}/ws/{self.listen_key}",
+                    on_open=self._on_open,
+                    on_message=lambda ws, message: self.handle_message(message),
+                    on_error=lambda ws, error: logger.error(f"User-Data-Stream Fehler: {error}"),
+                )
+                self._ws.run_forever(ping_interval=180, ping_timeout=10)
+            self.connected.clear()
+            if self.running:
+                logger.warning(f"User-Data-Stream getrennt – neuer Verbindungsversuch in {self.reconnect_delay}s")
+                self._stopped.wait(self.reconnect_delay)
+
+    def start(self):
+        self.running = True
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="UserDataStream", daemon=True)
+        self._thread.start()
+        self._keepalive_thread = threading.Thread(target=self._keepalive, name="UserDataKeepalive", daemon=True)
+        self._keepalive_thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stopped.set()
+        if self._ws is not None:
+            self._ws.close()
+        for thread in [self._thread, self._keepalive_thread]:
+            if thread is not None:
+                thread.join(timeout=5)
+        if self.listen_key is not None:
+            try:
+                self.connector.close_listen_key()
+            except Exception as e:
+                logger.error(f"User-Data-Stream: Listen-Key konnte nicht geschlossen werden: {e}")
+            self.listen_key = None
@@ -0,0 +1,225 @@
+# src/walk_forward.py
+import os
+import yaml
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.backtesting_improved import run_backtest, calculate_performance, risk_atr
+from src.backtest_kernel import POSITION_LABELS, POSITION_LONG
+from src.metrics import compute_metrics, SIDE_LONG, SIDE_SHORT
+from src.market_data import MarketDataPlane, MarketDataView, timeframes
+from src.shared_arrays import SharedArrays
+from src.strategy import CompositeStrategy
+from src.tuning import apply_params, optimize, load_config
+from src.multi_backtesting import load_data
+from src.utils import logger
+
+
+def walk_forward_windows(n_bars: int, train_bars: int, test_bars: int, step_bars: int = None) -> list:
+    """
+    Rollierende Fenster als Liste von ((train_start, train_end), (test_start, test_end)) – Enden exklusiv.
+
+    Das Testfenster schließt direkt an das Trainingsfenster an; step_bars (Standard: test_bars) verschiebt beide.
+    Mit step_bars == test_bars ergeben die Testfenster eine lückenlose Out-of-Sample-Strecke.
+    """
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("train_bars und test_bars müssen positiv sein")
+    step_bars = step_bars or test_bars
+    windows = []
+    start = 0
+    while start + train_bars + test_bars <= n_bars:
+        train = (start, start + train_bars)
+        windows.append((train, (train[1], train[1] + test_bars)))
+        start += step_bars
+    return windows
+
+
+def build_context(config, symbol, df_hourly, df_higher) -> dict:
+    """
+    Signal-Kontext (prepare_signal_context) plus Risiko-ATR einmalig über die gesamte Historie.
+
+    Alle Indikatoren sind kausal, ein Ausschnitt davon ist daher für jedes Fenster gültig – und hat anders als eine
+    Neuberechnung auf dem Fenster keine Warm-up-Lücke am Fensteranfang.
+    """
+    context = CompositeStrategy(config, symbol=symbol).prepare_signal_context(df_hourly, df_higher)
+    context["risk_atr"] = risk_atr(df_hourly, config["risk_management"].get("atr_period", 14)).to_numpy()
+    return context
+
+
+def share_context(context: dict) -> SharedArrays:
+    """Legt die Kontext-Arrays in Shared Memory ab (der DatetimeIndex als int64-Nanosekunden)."""
+    arrays = {name: values for name, values in context.items() if name != "index"}
+    arrays["index"] = context["index"].asi8
+    return SharedArrays(arrays)
+
+
+def slice_context(shared, start: int, stop: int) -> dict:
+    """Kontext für die Bars [start, stop) – Views auf die geteilten Arrays; nur der (kleine) Index wird kopiert."""
+    context = {name: shared[name][start:stop] for name in shared.keys() if name != "index"}
+    context["index"] = pd.DatetimeIndex(shared["index"][start:stop].copy().view("M8[ns]"))
+    return context
+
+
+def run_fold(config, platform, symbol, fold, market_spec, context_spec, train_window, test_window):
+    """
+    Worker-Funktion für den Prozess-Pool: optimiert SL/TP auf dem Trainingsfenster und bewertet die besten Parameter
+    auf dem anschließenden Testfenster (beides rein im Speicher).
+
+    Kursdaten und Indikatoren kommen als Views aus der MarketDataPlane bzw. dem geteilten Kontext, gepickelt werden
+    nur die specs und die Fenstergrenzen.
+    """
+    market = MarketDataView.attach(market_spec)
+    shared = SharedArrays.attach(context_spec)
+    try:
+        return _evaluate_fold(config, platform, symbol, fold, market, shared, train_window, test_window)
+    finally:
+        shared.close()
+        market.close()
+
+
+def _evaluate_fold(config, platform, symbol, fold, market, shared, train_window, test_window):
+    timeframe, higher_tf = timeframes(config, platform)
+    df_train = market.frame(symbol, timeframe, *train_window)
+    df_test = market.frame(symbol, timeframe, *test_window)
+    df_higher = market.frame(symbol, higher_tf)
+    tuning_config = config["tuning"]
+    best_params, train_result = optimize(
+        config, platform, symbol, tuning_config["atr_sl_multiplier_range"], tuning_config["atr_tp_multiplier_range"],
+        df_train, df_higher, context=slice_context(shared, *train_window), artifacts=False)
+
+    temp_config = apply_params(config, platform, symbol, best_params["atr_sl_multiplier"], best_params["atr_tp_multiplier"])
+    strategy = CompositeStrategy(temp_config, symbol=symbol)
+    df_sim, trades = run_backtest(df_test, strategy, temp_config, df_higher=df_higher, symbol=symbol, platform=platform,
+                                  artifacts=False, context=slice_context(shared, *test_window))
+    return {
+        "fold": fold,
+        "train_start": df_train.index[0],
+        "train_end": df_train.index[-1],
+        "test_start": df_test.index[0],
+        "test_end": df_test.index[-1],
+        "params": best_params,
+        "train": train_result,
+        "test": calculate_performance(df_sim, trades),
+        "equity": df_sim["equity"],
+        "trades": trades.to_frame(symbol),
+    }
+
+
+def stitch_equity(equities: list, initial_balance: float) -> pd.Series:
+    """
+    Verkettet die Test-Equity-Kurven der Folds: jeder Fold startet mit initial_balance, sein Gewinn/Verlust wird an
+    den Endstand des vorherigen Folds angehängt.
+    """
+    stitched = []
+    offset = initial_balance
+    for equity in equities:
+        equity = equity.dropna()
+        if equity.empty:
+            continue
+        shifted = equity - initial_balance + offset
+        stitched.append(shifted)
+        offset = shifted.iloc[-1]
+    if not stitched:
+        return pd.Series(dtype=float, name="equity")
+    return pd.concat(stitched).rename("equity")
+
+
+def walk_forward(config, platform, symbol, df_hourly, df_higher, executor=None):
+    """
+    Walk-Forward-Optimierung eines Symbols: rollierende Trainings-/Testfenster, jedes Fold parallel in einem eigenen
+    Prozess getuned (optimize, tuning.method) und auf dem Testfenster mit den besten Parametern bewertet.
+
+    Kursdaten (MarketDataPlane) und die einmal über die gesamte Historie berechneten Indikatoren werden den Workern
+    per Shared Memory bereitgestellt.
+
+    :return: dict mit folds (Parameter und Kennzahlen je Fold), equity (verkettete Out-of-Sample-Equity),
+             trades (alle Out-of-Sample-Trades) und performance (Kennzahlen der verketteten Strecke)
+    """
+    wf_config = config.get("walk_forward", {})
+    windows = walk_forward_windows(len(df_hourly), wf_config.get("train_bars", 2160), wf_config.get("test_bars", 720),
+                                   wf_config.get("step_bars"))
+    if not windows:
+        raise ValueError(f"{platform}/{symbol}: zu wenige Bars ({len(df_hourly)}) für ein Walk-Forward-Fenster")
+
+    own_executor = executor is None
+    if own_executor:
+        max_workers = wf_config.get("max_workers") or min(len(windows), os.cpu_count() or 1)
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    timeframe, higher_tf = timeframes(config, platform)
+    market = MarketDataPlane()
+    shared = share_context(build_context(config, symbol, df_hourly, df_higher))
+    try:
+        market.add(symbol, timeframe, df_hourly)
+        market.add(symbol, higher_tf, df_higher)
+        futures = [executor.submit(run_fold, config, platform, symbol, fold, market.spec, shared.spec, train, test)
+                   for fold, (train, test) in enumerate(windows)]
+        folds = [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+        shared.close()
+        market.close()
+
+    for fold in folds:
+        logger.info(f"{platform}/{symbol} Fold {fold['fold']}: {fold['params']}, "
+                    f"Train-Profit: {fold['train']['total_profit']:.2f}, Test-Profit: {fold['test']['total_profit']:.2f}")
+
+    initial_balance = config["risk_management"].get("initial_balance", 16000)
+    equity = stitch_equity([fold["equity"] for fold in folds], initial_balance)
+    trades = pd.concat([fold["trades"] for fold in folds], ignore_index=True)
+    # Kennzahlen direkt aus den Spalten der verketteten Trades, Bar-Positionen bezogen auf die verkettete Equity
+    performance = compute_metrics(equity.to_numpy(dtype=float), trades["profit"].to_numpy(dtype=float),
+                                  np.where(trades["type"] == POSITION_LABELS[POSITION_LONG], SIDE_LONG, SIDE_SHORT),
+                                  equity.index.get_indexer(trades["entry_time"]),
+                                  equity.index.get_indexer(trades["exit_time"]))
+    logger.info(f"{platform}/{symbol}: Out-of-Sample-Profit {performance['total_profit']:.2f} über {len(folds)} Folds")
+    return {"folds": folds, "equity": equity, "trades": trades, "performance": performance}
+
+
+def fold_summary(folds: list) -> pd.DataFrame:
+    """Eine Zeile je Fold: Zeiträume, beste Parameter sowie Train- und Test-Kennzahlen."""
+    rows = []
+    for fold in folds:
+        row = {key: fold[key] for key in ["fold", "train_start", "train_end", "test_start", "test_end"]}
+        row.update(fold["params"])
+        for key in ["total_profit", "num_trades", "win_rate", "max_drawdown", "sharpe"]:
+            row[f"train_{key}"] = fold["train"][key]
+            row[f"test_{key}"] = fold["test"][key]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def walk_forward_all_symbols(config):
+    """Walk-Forward für alle aktiven Symbole; die Folds aller Symbole teilen sich einen Prozess-Pool."""
+    output_dir = config.get("walk_forward", {}).get("output_dir", "results/walk_forward")
+    platforms = [platform for platform in ["binance", "metatrader"] if config["platforms"][platform]]
+    max_workers = config.get("walk_forward", {}).get("max_workers") or os.cpu_count() or 1
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for platform in platforms:
+            for symbol in config["trading"][platform]["symbols"].keys():
+                df_hourly, df_higher = load_data(platform, symbol, config)
+                if df_hourly is None or df_higher is None:
+                    logger.error(f"Daten für {platform}/{symbol} fehlen, überspringe.")
+                    continue
+                try:
+                    results[(platform, symbol)] = walk_forward(config, platform, symbol, df_hourly, df_higher, executor)
+                except Exception as e:
+                    logger.error(f"Walk-Forward für {platform}/{symbol} fehlgeschlagen: {e}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary = {}
+    for (platform, symbol), result in results.items():
+        fold_summary(result["folds"]).to_csv(os.path.join(output_dir, f"folds_{symbol}.csv"), index=False)
+        result["equity"].to_csv(os.path.join(output_dir, f"equity_{symbol}.csv"))
+        result["trades"].to_csv(os.path.join(output_dir, f"trades_{symbol}.csv"), index=False)
+        summary.setdefault(platform, {})[symbol] = {key: float(value) for key, value in result["performance"].items()}
+    with open(os.path.join(output_dir, "summary.yaml"), "w") as file:
+        yaml.dump(summary, file, default_flow_style=False, sort_keys=False)
+    logger.info(f"Walk-Forward-Ergebnisse gespeichert in {output_dir}")
+    return results
+
+
+if __name__ == "__main__":
+    walk_forward_all_symbols(load_config())
@@ -0,0 +1,40 @@
+import os
+import sys
+import types
+import pandas as pd
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'historical')
+
+try:
+    import MetaTrader5  # noqa: F401
+except ImportError:
+    # Das MetaTrader5-Paket gibt es nur unter Windows; src.bot und src.multi_backtesting importieren es auf Modulebene.
+    # Für die Tests reichen die Konstanten – Aufrufe der Terminal-API schlagen wie ohne Terminal fehl.
+    MetaTrader5 = types.ModuleType("MetaTrader5")
+    for value, name in enumerate(["TIMEFRAME_M1", "TIMEFRAME_M5", "TIMEFRAME_M15", "TIMEFRAME_M30", "TIMEFRAME_H1",
+                                  "TIMEFRAME_H4", "TIMEFRAME_D1", "TIMEFRAME_W1", "TIMEFRAME_MN1"], start=1):
+        setattr(MetaTrader5, name, value)
+    MetaTrader5.ORDER_TYPE_BUY, MetaTrader5.ORDER_TYPE_SELL = 0, 1
+    MetaTrader5.TRADE_ACTION_DEAL, MetaTrader5.ORDER_TIME_GTC, MetaTrader5.ORDER_FILLING_FOK = 1, 0, 0
+    MetaTrader5.initialize = lambda *args, **kwargs: False
+    MetaTrader5.shutdown = lambda: None
+    for name in ["account_info", "copy_rates_from_pos", "positions_get", "order_send", "last_error"]:
+        setattr(MetaTrader5, name, lambda *args, **kwargs: None)
+    sys.modules["MetaTrader5"] = MetaTrader5
+
+
+def read_historical(symbol, interval, rows=None):
+    """Gebündelte Kursdaten aus data/historical (<symbol>_<interval>_2024_data.csv), optional nur die ersten rows Bars."""
+    df = pd.read_csv(os.path.join(DATA_DIR, f"{symbol}_{interval}_2024_data.csv"), index_col="timestamp", parse_dates=True)
+    return df.iloc[:rows] if rows else df
+
+
+@pytest.fixture
+def data_dir():
+    return DATA_DIR
+
+
+@pytest.fixture
+def load_csv():
+    return read_historical
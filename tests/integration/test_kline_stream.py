@@ -0,0 +1,120 @@
+import json
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pytest
+from aiohttp import web
+from src.kline_stream import KlineBuffer, KlineStream
+
+HOUR_MS = 3_600_000
+FIRST_OPEN = int(pd.Timestamp("2024-01-01").timestamp() * 1000)
+
+
+def kline_message(symbol, interval, open_time, close, closed):
+    kline = {"t": open_time, "T": open_time + HOUR_MS - 1, "s": symbol, "i": interval, "o": str(close - 1),
+             "h": str(close + 1), "l": str(close - 2), "c": str(close), "v": "10.0", "x": closed}
+    return json.dumps({"stream": f"{symbol.lower()}@kline_{interval}",
+                       "data": {"e": "kline", "E": open_time, "s": symbol, "k": kline}})
+
+
+class FakeKlineServer:
+    """Lokaler Ersatz für den kombinierten Binance-Stream: spielt die Nachrichten ab und hält die Verbindung offen."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.paths = []
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    async def _handler(self, request):
+        self.paths.append(request.path_qs)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for message in self.messages:
+            await ws.send_str(message)
+        async for _ in ws:
+            pass
+        return ws
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get("/stream", self._handler)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait(5)
+        return f"ws://127.0.0.1:{self.port}"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def test_buffer_rolls_over_and_updates_running_candle():
+    buffer = KlineBuffer(maxlen=3)
+    for i in range(5):
+        buffer.update(FIRST_OPEN + i * HOUR_MS, [i, i, i, i, i])
+    buffer.update(FIRST_OPEN + 4 * HOUR_MS, [9, 9, 9, 9, 9])  # laufende Kerze
+    buffer.update(FIRST_OPEN, [0, 0, 0, 0, 0])  # veraltet
+    df = buffer.to_frame()
+    assert list(df.index) == list(pd.date_range("2024-01-01 02:00", periods=3, freq="h"))
+    assert df["close"].tolist() == [2.0, 3.0, 9.0]
+
+
+def test_stream_fires_once_per_closed_candle():
+    seed_index = pd.date_range("2024-01-01", periods=3, freq="h", name="timestamp")
+    seed_df = pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 1.0}, index=seed_index)
+    t3, t4 = FIRST_OPEN + 3 * HOUR_MS, FIRST_OPEN + 4 * HOUR_MS
+    server = FakeKlineServer([
+        kline_message("BTCUSDT", "1h", t3, 100.0, False),
+        kline_message("BTCUSDT", "1h", t3, 101.0, False),
+        kline_message("BTCUSDT", "1h", t3, 102.0, True),
+        kline_message("BTCUSDT", "1h", t3, 102.0, True),  # Duplikat nach Reconnect
+        kline_message("ETHUSDT", "1h", t3, 50.0, True),
+        kline_message("BTCUSDT", "1h", t4, 103.0, False),
+    ])
+    url = server.start()
+
+    closed = []
+    done = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    stream = KlineStream(["BTCUSDT", "ETHUSDT"], ["1h"], seed=lambda symbol, interval: seed_df, base_url=url)
+
+    def evaluate(symbol, interval, df):
+        # Wie im Bot läuft die Auswertung im Thread-Pool – hier erst, wenn die nächste Kerze schon im Puffer steht
+        deadline = time.monotonic() + 5
+        while stream.frame("BTCUSDT", "1h").index[-1] != pd.Timestamp(t4, unit="ms") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        closed.append((symbol, interval, df))
+        if len(closed) == 2:
+            done.set()
+
+    def on_candle_close(symbol, interval):
+        executor.submit(evaluate, symbol, interval, stream.frame(symbol, interval))
+
+    stream.on_candle_close = on_candle_close
+    stream.start()
+    try:
+        assert done.wait(10)
+    finally:
+        stream.stop()
+        server.stop()
+        executor.shutdown()
+
+    assert server.paths == ["/stream?streams=btcusdt@kline_1h/ethusdt@kline_1h"]
+    assert [(symbol, interval) for symbol, interval, _ in closed] == [("BTCUSDT", "1h"), ("ETHUSDT", "1h")]
+    btc_at_close = closed[0][2]
+    assert btc_at_close.index[-1] == pd.Timestamp(t3, unit="ms")  # ausgewertet wird die gerade geschlossene Kerze
+    assert btc_at_close["close"].iloc[-1] == pytest.approx(102.0)
+    assert len(btc_at_close) == 4  # 3 Kerzen aus seed + neue Kerze
@@ -0,0 +1,96 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+import src.historical_data as historical_data
+from src.binance_connector import BinanceConnector
+from src.ohlcv_store import OHLCVStore
+
+HOUR_MS = 3_600_000
+FIRST_OPEN = int(pd.Timestamp("2024-01-01").timestamp() * 1000)
+NOW = int(pd.Timestamp("2024-01-10 10:30").timestamp() * 1000)
+
+
+def make_kline(open_time):
+    price = 100 + (open_time - FIRST_OPEN) / HOUR_MS
+    return [open_time, str(price), str(price + 1), str(price - 1), str(price + 0.5), "10.0",
+            open_time + HOUR_MS - 1, "1000.0", 5, "5.0", "500.0", "0"]
+
+
+class FakeKlineHandler(BaseHTTPRequestHandler):
+    """Lokaler Ersatz für /fapi/v1/klines (1h-Kerzen von FIRST_OPEN bis zur laufenden Kerze bei NOW)."""
+    requests = []
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        FakeKlineHandler.requests.append(params)
+        start = max(int(params.get("startTime", FIRST_OPEN)), FIRST_OPEN)
+        end = min(int(params.get("endTime", NOW)), NOW)
+        first = FIRST_OPEN + -(-(start - FIRST_OPEN) // HOUR_MS) * HOUR_MS
+        klines = [make_kline(t) for t in range(first, end + 1, HOUR_MS)][:int(params.get("limit", 500))]
+        body = json.dumps(klines).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-MBX-USED-WEIGHT-1M", str(2 * len(FakeKlineHandler.requests)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    monkeypatch.setenv("BINANCE_TESTNET_API_KEY", "test-key")
+    monkeypatch.setenv("BINANCE_TESTNET_SECRET_KEY", "test-secret")
+    monkeypatch.setattr(historical_data.time, "sleep", lambda seconds: None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeKlineHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeKlineHandler.requests = []
+    connector = BinanceConnector(testnet=True)
+    connector.base_url = f"http://127.0.0.1:{server.server_port}"
+    yield connector
+    server.shutdown()
+
+
+def test_second_sync_serves_from_disk_without_network(connector, tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    df = historical_data.sync_historical_data(store, connector, "BTCUSDT", "1h", "2024-01-02", limit=100, now=NOW)
+    assert len(FakeKlineHandler.requests) > 1  # mehrere Seiten
+    assert df.index[0] == pd.Timestamp("2024-01-02")
+    assert df.index[-1] == pd.Timestamp("2024-01-10 09:00")  # laufende 10:00-Kerze wird nicht gespeichert
+    assert df.index.is_unique and df.index.is_monotonic_increasing
+
+    FakeKlineHandler.requests = []
+    df_again = historical_data.sync_historical_data(store, connector, "BTCUSDT", "1h", "2024-01-02", limit=100, now=NOW + 10 * 60_000)
+    assert FakeKlineHandler.requests == []
+    pd.testing.assert_frame_equal(df_again, df)
+
+
+def test_sync_fetches_only_missing_tail_and_head(connector, tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    historical_data.sync_historical_data(store, connector, "BTCUSDT", "1h", "2024-01-05", now=NOW)
+
+    FakeKlineHandler.requests = []
+    later = NOW + 3 * HOUR_MS
+    df = historical_data.sync_historical_data(store, connector, "BTCUSDT", "1h", "2024-01-03", now=later)
+    starts = sorted(int(r["startTime"]) for r in FakeKlineHandler.requests)
+    assert starts == [int(pd.Timestamp("2024-01-03").timestamp() * 1000), int(pd.Timestamp("2024-01-10 10:00").timestamp() * 1000)]
+    assert df.index[0] == pd.Timestamp("2024-01-03")
+    # die 10:00-Kerze ist inzwischen abgeschlossen und wurde nachgeladen
+    assert df.index.equals(pd.date_range("2024-01-03", "2024-01-10 10:00", freq="h", name="timestamp"))
+    assert sorted(p.rsplit("/", 1)[-1] for p in store.partitions("BTCUSDT", "1h")) == ["2024-01.parquet"]
+
+
+def test_concurrent_download_matches_serial(connector, tmp_path):
+    serial = historical_data.sync_historical_data(OHLCVStore(str(tmp_path / "serial")), connector, "BTCUSDT", "1h",
+                                                  "2024-01-01", limit=50, now=NOW)
+    FakeKlineHandler.requests = []
+    concurrent = historical_data.sync_historical_data(OHLCVStore(str(tmp_path / "concurrent")), connector, "BTCUSDT", "1h",
+                                                      "2024-01-01", limit=50, now=NOW, concurrent=True)
+    assert len(FakeKlineHandler.requests) == -(-(NOW - FIRST_OPEN + 1) // (50 * HOUR_MS))  # ein Request pro Fenster
+    pd.testing.assert_frame_equal(concurrent, serial)
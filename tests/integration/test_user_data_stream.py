@@ -0,0 +1,185 @@
+import json
+import asyncio
+import threading
+import pytest
+from aiohttp import web
+from src.account_state import AccountSnapshot, AccountStateCache
+from src.user_data_stream import PositionBook, UserDataStream
+
+
+def fill_event(symbol, side, quantity, price, transaction_time, position_side="BOTH"):
+    return {"e": "ORDER_TRADE_UPDATE", "E": transaction_time, "T": transaction_time,
+            "o": {"s": symbol, "S": side, "x": "TRADE", "X": "FILLED", "l": str(quantity), "L": str(price),
+                  "ps": position_side, "T": transaction_time}}
+
+
+def account_event(positions, balance, transaction_time):
+    return {"e": "ACCOUNT_UPDATE", "E": transaction_time, "T": transaction_time,
+            "a": {"m": "ORDER", "B": [{"a": "USDT", "wb": str(balance), "cw": str(balance)}],
+                  "P": [{"s": symbol, "pa": str(amount), "ep": str(price), "ps": "BOTH"}
+                        for symbol, amount, price in positions]}}
+
+
+class FakeUserDataServer:
+    """Lokaler Ersatz für den Binance-User-Data-Stream: je Verbindung (Listen-Key) eine Liste von Events."""
+
+    def __init__(self, sessions):
+        self.sessions = {key: [json.dumps(event) for event in events] for key, events in sessions.items()}
+        self.paths = []
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    async def _handler(self, request):
+        self.paths.append(request.path)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for message in self.sessions.get(request.match_info["key"], []):
+            await ws.send_str(message)
+        async for _ in ws:
+            pass
+        return ws
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get("/ws/{key}", self._handler)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait(5)
+        return f"ws://127.0.0.1:{self.port}"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class FakeConnector:
+    base_url = "https://testnet.binancefuture.com"
+
+    def __init__(self, keys, positions=None, failures=0):
+        self.keys = list(keys)
+        self.positions = positions or {}
+        self.failures = failures
+        self.closed_keys = 0
+        self.account = AccountStateCache(self, max_age=60)
+
+    def create_listen_key(self):
+        return self.keys.pop(0)
+
+    def keepalive_listen_key(self):
+        pass
+
+    def close_listen_key(self):
+        self.closed_keys += 1
+
+    def get_account_info(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("REST nicht erreichbar")
+        return {"assets": [{"asset": "USDT", "walletBalance": "1000"}],
+                "positions": [{"symbol": symbol, "positionAmt": str(amount), "entryPrice": "100"}
+                              for symbol, amount in self.positions.items()]}
+
+
+def test_book_applies_fills_and_absolute_updates():
+    book = PositionBook()
+    book.seed(AccountSnapshot({"assets": [{"asset": "USDT", "walletBalance": "1000"}], "positions": []}, 0), seeded_at=0)
+    assert book.apply(fill_event("BTCUSDT", "BUY", 0.1, 100.0, 10))
+    assert book.apply(fill_event("BTCUSDT", "BUY", 0.1, 110.0, 11))
+    assert book.position("BTCUSDT") == "LONG"
+    assert book.entry_price("BTCUSDT") == pytest.approx(105.0)
+    # ACCOUNT_UPDATE zu denselben Fills setzt den absoluten Stand; ein verspätetes Fill-Event zählt nicht doppelt
+    book.apply(account_event([("BTCUSDT", 0.2, 105.0)], 990.0, 11))
+    assert not book.apply(fill_event("BTCUSDT", "BUY", 0.1, 110.0, 11))
+    assert book.position_amount("BTCUSDT") == pytest.approx(0.2)
+    assert book.balance("USDT") == 990.0
+    book.apply(fill_event("BTCUSDT", "SELL", 0.5, 120.0, 20))  # Wechsel über null
+    assert book.position("BTCUSDT") == "SHORT"
+    assert book.entry_price("BTCUSDT") == 120.0
+    assert not book.apply({"e": "MARGIN_CALL"})
+
+
+def test_book_keeps_hedge_mode_legs_separate():
+    book = PositionBook()
+    book.seed(AccountSnapshot({"assets": [], "positions": [
+        {"symbol": "BTCUSDT", "positionSide": "LONG", "positionAmt": "1", "entryPrice": "100"},
+        {"symbol": "BTCUSDT", "positionSide": "SHORT", "positionAmt": "0", "entryPrice": "0"},
+    ]}, 0), seeded_at=0)
+    assert book.position_amount("BTCUSDT") == 1.0
+    update = account_event([], 1000.0, 5)
+    update["a"]["P"] = [{"s": "BTCUSDT", "pa": "2", "ep": "105", "ps": "LONG"}]
+    book.apply(update)
+    assert book.position_amount("BTCUSDT") == 2.0
+    book.apply(fill_event("BTCUSDT", "SELL", 0.5, 110.0, 6, position_side="SHORT"))
+    assert book.position_amount("BTCUSDT") == 1.5
+    assert book.legs[("BTCUSDT", "LONG")] == [2.0, 105.0]
+
+
+def test_stream_updates_book_and_reconnects_after_listen_key_expiry():
+    server = FakeUserDataServer({
+        "key1": [fill_event("ETHUSDT", "SELL", 2, 2000.0, 2**62),
+                 account_event([("ETHUSDT", -2, 2000.0)], 950.0, 2**62),
+                 {"e": "listenKeyExpired", "E": 2**62}],
+        "key2": [],
+    })
+    url = server.start()
+    connector = FakeConnector(["key1", "key2"], positions={"BTCUSDT": 0.5})
+    updates = []
+    reconnected = threading.Event()
+    stream = UserDataStream(connector, base_url=url, reconnect_delay=0.05,
+                            on_update=lambda event: updates.append(event["e"]))
+    original_open = stream._on_open
+
+    def on_open(ws):
+        original_open(ws)
+        if len(server.paths) == 2:
+            reconnected.set()
+
+    stream._on_open = on_open
+    stream.start()
+    try:
+        assert reconnected.wait(5)
+    finally:
+        stream.stop()
+        server.stop()
+
+    assert server.paths == ["/ws/key1", "/ws/key2"]
+    assert updates == ["ORDER_TRADE_UPDATE", "ACCOUNT_UPDATE"]
+    # Nach dem Reconnect wird das Buch aus dem REST-Snapshot neu aufgebaut
+    assert stream.book.position("BTCUSDT") == "LONG"
+    assert stream.book.balance("USDT") == 1000.0
+    assert connector.closed_keys == 1
+
+
+def test_stream_is_not_connected_until_snapshot_loaded():
+    server = FakeUserDataServer({"key1": [], "key2": []})
+    url = server.start()
+    connector = FakeConnector(["key1", "key2"], positions={"BTCUSDT": 0.5}, failures=1)
+    stream = UserDataStream(connector, base_url=url, reconnect_delay=0.05)
+    states = []
+    original_open = stream._on_open
+
+    def on_open(ws):
+        original_open(ws)
+        states.append(stream.connected.is_set())
+
+    stream._on_open = on_open
+    stream.start()
+    try:
+        assert stream.connected.wait(5)
+    finally:
+        stream.stop()
+        server.stop()
+
+    assert states == [False, True]
+    assert server.paths == ["/ws/key1", "/ws/key2"]
+    assert stream.book.position("BTCUSDT") == "LONG"
@@ -0,0 +1,173 @@
+"""
+Benchmarks für Backtest, Signalberechnung, Kennzahlen und Datenladen.
+
+Jeder Lauf hängt Bars/Sekunde und Spitzen-Speicher an eine JSON-Historie an (BENCHMARK_HISTORY, Standard:
+tests/performance/benchmark_history.json) und schlägt fehl, wenn der Durchsatz um mehr als
+BENCHMARK_REGRESSION_THRESHOLD (Standard 0.25) unter dem Median der letzten Läufe auf derselben Maschine liegt.
+Der synthetische 10-Jahres-1m-Datensatz läuft nur mit RUN_LONG_BENCHMARKS=1.
+"""
+import os
+import copy
+import json
+import time
+import platform
+import datetime
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+from src.strategy import CompositeStrategy, config
+from src.backtesting_improved import run_backtest, calculate_performance
+from src.ohlcv_store import OHLCVStore
+from src.ohlcv_binary import write_ohlcv, read_ohlcv
+
+HISTORY_PATH = os.environ.get("BENCHMARK_HISTORY", os.path.join(os.path.dirname(__file__), "benchmark_history.json"))
+REGRESSION_THRESHOLD = float(os.environ.get("BENCHMARK_REGRESSION_THRESHOLD", "0.25"))
+BASELINE_RUNS = 5
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
+long_benchmark = pytest.mark.skipif(os.environ.get("RUN_LONG_BENCHMARKS") != "1",
+                                    reason="10-Jahres-1m-Benchmark nur mit RUN_LONG_BENCHMARKS=1")
+
+
+def synthetic_ohlcv(years=10, freq="1min", seed=42):
+    """Geometrische Irrfahrt als 1m-OHLCV plus daraus abgeleitete Tageskerzen."""
+    index = pd.date_range("2015-01-01", periods=int(years * 365 * 24 * 60), freq=freq, name="timestamp")
+    rng = np.random.default_rng(seed)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(index))))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0005, len(index))) * close
+    df = pd.DataFrame({"open": open_, "high": np.maximum(open_, close) + spread, "low": np.minimum(open_, close) - spread,
+                       "close": close, "volume": rng.uniform(1, 100, len(index))}, index=index)
+    daily = df.resample("1D").agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+    return df, daily
+
+
+@pytest.fixture
+def bench_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cfg = copy.deepcopy(config)
+    cfg["strategy"]["extended_debug"] = False
+    cfg["tracing"] = {"enabled": False}
+    return cfg
+
+
+def load_history():
+    if not os.path.exists(HISTORY_PATH):
+        return []
+    with open(HISTORY_PATH, "r") as file:
+        return json.load(file)
+
+
+def measure(name, func, bars, repeat=3):
+    """Bester Lauf aus repeat Messungen plus ein Lauf unter tracemalloc für den Spitzen-Speicher."""
+    func()  # Warm-up (numba-Cache, Dateisystem-Cache)
+    seconds = min(_timed(func) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "name": name,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "bars": bars,
+        "seconds": seconds,
+        "bars_per_sec": bars / seconds,
+        "peak_mb": peak / 1024 ** 2,
+    }
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def record_and_check(entry):
+    """Hängt entry an die Historie an und prüft den Durchsatz gegen den Median der letzten Läufe."""
+    history = load_history()
+    previous = [h["bars_per_sec"] for h in history if h["name"] == entry["name"] and h["machine"] == entry["machine"]]
+    history.append(entry)
+    os.makedirs(os.path.dirname(os.path.abspath(HISTORY_PATH)), exist_ok=True)
+    with open(HISTORY_PATH, "w") as file:
+        json.dump(history, file, indent=2)
+    if previous:
+        baseline = float(np.median(previous[-BASELINE_RUNS:]))
+        assert entry["bars_per_sec"] >= baseline * (1 - REGRESSION_THRESHOLD), (
+            f"{entry['name']}: {entry['bars_per_sec']:.0f} Bars/s liegt mehr als {REGRESSION_THRESHOLD:.0%} "
+            f"unter dem Median der letzten Läufe ({baseline:.0f} Bars/s)")
+
+
+@pytest.mark.parametrize("symbol", SYMBOLS)
+def test_benchmark_run_backtest(bench_config, symbol, load_csv):
+    df_hourly, df_higher = load_csv(symbol, "1h"), load_csv(symbol, "1d")
+
+    def run():
+        strategy = CompositeStrategy(bench_config, symbol=symbol)
+        run_backtest(df_hourly.copy(), strategy, bench_config, df_higher=df_higher, symbol=symbol, platform="binance",
+                     artifacts=False)
+
+    record_and_check(measure(f"run_backtest[{symbol}]", run, len(df_hourly)))
+
+
+@pytest.mark.parametrize("symbol", SYMBOLS)
+def test_benchmark_generate_signal(bench_config, symbol, load_csv):
+    """Live-Pfad: generate_signal auf einem gleitenden 500-Bar-Fenster, wie es der Bot pro Kerze aufruft."""
+    df_hourly, df_higher = load_csv(symbol, "1h"), load_csv(symbol, "1d")
+    strategy = CompositeStrategy(bench_config, symbol=symbol)
+    ends = range(500, min(len(df_hourly), 1500))
+
+    def run():
+        for end in ends:
+            window = df_hourly.iloc[end - 500:end]
+            strategy.generate_signal(window, df_higher[df_higher.index <= window.index[-1]])
+
+    record_and_check(measure(f"generate_signal[{symbol}]", run, len(ends)))
+
+
+@pytest.mark.parametrize("symbol", SYMBOLS)
+def test_benchmark_calculate_performance(bench_config, symbol, load_csv):
+    df_hourly, df_higher = load_csv(symbol, "1h"), load_csv(symbol, "1d")
+    strategy = CompositeStrategy(bench_config, symbol=symbol)
+    df_sim, trades = run_backtest(df_hourly.copy(), strategy, bench_config, df_higher=df_higher, symbol=symbol,
+                                  platform="binance", artifacts=False)
+    record_and_check(measure(f"calculate_performance[{symbol}]", lambda: calculate_performance(df_sim, trades), len(df_sim)))
+
+
+@pytest.mark.parametrize("symbol", SYMBOLS)
+def test_benchmark_load_data(tmp_path, symbol, load_csv):
+    """Datenladen aus den gebündelten CSVs, dem lokalen Parquet-Store und dem Binärformat (load_data(source="local"))."""
+    df_hourly = load_csv(symbol, "1h")
+    store = OHLCVStore(str(tmp_path / "store"))
+    store.write(symbol, "1h", df_hourly[["open", "high", "low", "close", "volume"]])
+    binary = str(tmp_path / f"{symbol}_1h.ohlcv")
+    write_ohlcv(binary, df_hourly)
+
+    record_and_check(measure(f"load_csv[{symbol}]", lambda: load_csv(symbol, "1h"), len(df_hourly)))
+    record_and_check(measure(f"ohlcv_store_read[{symbol}]", lambda: store.read(symbol, "1h"), len(df_hourly)))
+    record_and_check(measure(f"ohlcv_binary_read[{symbol}]", lambda: read_ohlcv(binary), len(df_hourly)))
+
+
+@long_benchmark
+def test_benchmark_run_backtest_10y_1m(bench_config):
+    df_minute, df_daily = synthetic_ohlcv()
+
+    def run():
+        strategy = CompositeStrategy(bench_config, symbol="BTCUSDT")
+        run_backtest(df_minute.copy(), strategy, bench_config, df_higher=df_daily, symbol="BTCUSDT", platform="binance",
+                     artifacts=False)
+
+    record_and_check(measure("run_backtest[synthetic_10y_1m]", run, len(df_minute), repeat=1))
+
+
+@long_benchmark
+def test_benchmark_calculate_performance_10y_1m(bench_config):
+    df_minute, df_daily = synthetic_ohlcv()
+    strategy = CompositeStrategy(bench_config, symbol="BTCUSDT")
+    df_sim, trades = run_backtest(df_minute, strategy, bench_config, df_higher=df_daily, symbol="BTCUSDT",
+                                  platform="binance", artifacts=False)
+    record_and_check(measure("calculate_performance[synthetic_10y_1m]", lambda: calculate_performance(df_sim, trades),
+                             len(df_sim), repeat=1))
@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.account_state import AccountStateCache
+from src.order_execution import execute_order
+
+
+class FakeAccountConnector:
+    """Liefert /fapi/v2/account-Antworten und zählt die Requests."""
+
+    def __init__(self, positions=None, balance=1000.0):
+        self.positions = positions or {}
+        self.balance = balance
+        self.calls = 0
+        self.orders = []
+        self._lock = threading.Lock()
+        self.account = AccountStateCache(self, max_age=60)
+
+    def get_account_info(self):
+        with self._lock:
+            self.calls += 1
+        return {"assets": [{"asset": "USDT", "walletBalance": str(self.balance)}],
+                "positions": [{"symbol": symbol, "positionAmt": str(amount), "entryPrice": "100"}
+                              for symbol, amount in self.positions.items()]}
+
+    def signed_request(self, method, endpoint, params):
+        self.orders.append(params)
+        if params["type"] == "MARKET":
+            self.positions[params["symbol"]] = params["quantity"] * (1 if params["side"] == "BUY" else -1)
+
+        class Response:
+            status_code = 200
+
+            def json(self):
+                return {"orderId": 1}
+
+        return Response()
+
+
+def test_all_symbols_share_one_account_request():
+    symbols = [f"SYM{i}USDT" for i in range(30)]
+    connector = FakeAccountConnector({"SYM1USDT": 0.5, "SYM2USDT": -0.2})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        positions = list(executor.map(connector.account.position, symbols))
+    assert connector.calls == 1
+    assert positions[1:3] == ["LONG", "SHORT"] and positions.count("NONE") == 28
+    assert connector.account.balance("USDT") == 1000.0
+    assert [p["symbol"] for p in connector.account.snapshot().open_positions(symbols[:2])] == ["SYM1USDT"]
+
+
+def test_snapshot_expires_and_is_invalidated():
+    now = [0.0]
+    connector = FakeAccountConnector()
+    cache = AccountStateCache(connector, max_age=5, clock=lambda: now[0])
+    cache.position("BTCUSDT")
+    now[0] = 4.0
+    cache.position("BTCUSDT")
+    assert connector.calls == 1
+    now[0] = 10.0
+    cache.position("BTCUSDT")
+    cache.invalidate()
+    cache.position("BTCUSDT")
+    assert connector.calls == 3
+    with pytest.raises(Exception):
+        cache.balance("BNB")
+
+
+def test_fill_invalidates_snapshot():
+    connector = FakeAccountConnector()
+    assert connector.account.position("BTCUSDT") == "NONE"
+    execute_order(connector, "BTCUSDT", "BUY", entry_price=100.0, stop_loss_price=95.0)
+    assert [order["type"] for order in connector.orders] == ["MARKET", "STOP_MARKET"]
+    assert connector.account.position("BTCUSDT") == "LONG"
+    assert connector.calls == 2
@@ -0,0 +1,51 @@
+import copy
+import logging
+import pytest
+import numpy as np
+import pandas as pd
+from src.strategy import CompositeStrategy, config
+from src.backtesting_improved import run_backtest
+
+
+@pytest.fixture
+def backtest_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # run_backtest schreibt nach results/
+    cfg = copy.deepcopy(config)
+    cfg["strategy"]["extended_debug"] = False
+    return cfg
+
+
+@pytest.mark.parametrize("symbol", ["BTCUSDT", "ETHUSDT", "BNBUSDT"])
+def test_incremental_engine_matches_loop(backtest_config, symbol, load_csv):
+    df_hourly = load_csv(symbol, "1h", rows=1500)
+    df_higher = load_csv(symbol, "1d")
+
+    results = {}
+    for engine in ["loop", "incremental"]:
+        strategy = CompositeStrategy(backtest_config, symbol=symbol)
+        results[engine] = run_backtest(df_hourly.copy(), strategy, backtest_config, df_higher=df_higher,
+                                       symbol=symbol, platform="binance", engine=engine)
+
+    df_loop, trades_loop = results["loop"]
+    df_inc, trades_inc = results["incremental"]
+    assert len(trades_loop)
+    np.testing.assert_array_equal(trades_inc.trades, trades_loop.trades)
+    pd.testing.assert_frame_equal(trades_inc.to_frame(), trades_loop.to_frame())
+    pd.testing.assert_frame_equal(df_inc[["balance", "equity", "position"]], df_loop[["balance", "equity", "position"]])
+
+
+def test_in_memory_mode_touches_no_files(backtest_config, tmp_path, load_csv):
+    df_hourly = load_csv("BTCUSDT", "1h", rows=1500)
+    df_higher = load_csv("BTCUSDT", "1d")
+    runs = {}
+    for artifacts in [False, True]:
+        strategy = CompositeStrategy(backtest_config, symbol="BTCUSDT")
+        runs[artifacts] = run_backtest(df_hourly.copy(), strategy, backtest_config, df_higher=df_higher, symbol="BTCUSDT",
+                                       platform="binance", artifacts=artifacts)
+        if not artifacts:
+            assert list(tmp_path.iterdir()) == []
+    assert sorted(p.name for p in (tmp_path / "results").iterdir()) == [
+        "debug_detailed_BTCUSDT.log", "debug_log_BTCUSDT.csv", "trades_BTCUSDT.csv"]
+    assert logging.getLogger("detailed_BTCUSDT").handlers == []  # FileHandler nach dem Lauf geschlossen
+    pd.testing.assert_frame_equal(runs[False][0], runs[True][0])
+    np.testing.assert_array_equal(runs[False][1].trades, runs[True][1].trades)
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from src.backtest_kernel import simulate_positions, simulate_batch, simulate_portfolio, pip_arrays, POSITION_LONG, POSITION_NONE
+from src.metrics import compute_metrics
+
+
+def run_kernel(close, signal, trend=None, friday_close=None, atr=1.0, **kwargs):
+    n = len(close)
+    close = np.asarray(close, dtype=float)
+    pip_size, pip_value = pip_arrays(close, "metatrader", "EURUSD")
+    return simulate_positions(
+        close, np.full(n, atr), np.full(n, atr), np.asarray(signal, dtype=np.int8),
+        np.asarray(trend if trend is not None else [1] * n, dtype=np.int8),
+        np.asarray(friday_close if friday_close is not None else [False] * n), np.ones(n, dtype=bool),
+        pip_size, pip_value, 10000, **kwargs
+    )
+
+
+def test_long_trade_hits_stop_loss():
+    # Einstieg bei 100, SL = 100 - 1.5 * ATR(1.0) = 98.5
+    result = run_kernel([100, 100, 99, 98, 97], [0, 1, 0, 0, 0], atr_sl_multiplier=1.5, atr_tp_multiplier=6.0)
+    trades = result["trades"]
+    assert len(trades) == 1
+    trade = trades[0]
+    assert (trade["entry_index"], trade["exit_index"], trade["type"]) == (1, 3, POSITION_LONG)
+    assert trade["exit_price"] == 98
+    assert trade["profit"] == pytest.approx((98 - 100) / 0.0001 * trade["units"] * 10)
+    assert result["balance"][4] == pytest.approx(10000 + trade["profit"])
+    assert result["position"].tolist() == [POSITION_NONE, POSITION_LONG, POSITION_LONG, POSITION_NONE, POSITION_NONE]
+    assert result["open_position"] is None
+
+
+def test_trailing_take_profit_follows_highest_close():
+    # Höchster Schlusskurs 110 -> Trailing TP = 110 - 2 * ATR(1.0) = 108
+    result = run_kernel([100, 100, 105, 110, 109, 108, 107], [0, 1, 0, 0, 0, 0, 0], atr_sl_multiplier=1.5, atr_tp_multiplier=2.0)
+    assert result["trades"]["exit_index"].tolist() == [5]
+
+
+def test_friday_close_and_open_position_at_end():
+    result = run_kernel([100, 100, 101, 102, 103], [0, 1, 0, 1, 0], friday_close=[False, False, True, False, False])
+    assert result["trades"]["exit_index"].tolist() == [2]
+    assert result["open_position"]["entry_index"] == 3
+    assert np.isnan(result["balance"][0])
+
+
+def test_batch_matches_single_runs():
+    rng = np.random.default_rng(3)
+    n = 3000
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, n))
+    atr = np.abs(rng.normal(0.002, 0.0005, n))
+    signal = rng.choice([0, 0, 0, 0, 0, 0, 1, -1], n).astype(np.int8)
+    trend = rng.choice([1, -1, 0], n, p=[0.45, 0.45, 0.1]).astype(np.int8)
+    friday_close = rng.random(n) < 0.01
+    ready = np.arange(n) >= 20
+    pip_size, pip_value = pip_arrays(close, "metatrader", "EURUSD")
+    sl = np.array([0.5, 1.0, 1.5, 2.0, 0.5, 3.0])
+    tp = np.array([2.0, 4.0, 6.0, 8.0, 1.0, 3.0])
+
+    # Hebel 30: einzelne Paare laufen in eine negative Balance (Abbruch wie in simulate_positions)
+    batch = simulate_batch(close, atr, atr, signal, trend, friday_close, ready, pip_size, pip_value, 10000, 30, sl, tp)
+    for k in range(len(sl)):
+        single = simulate_positions(close, atr, atr, signal, trend, friday_close, ready, pip_size, pip_value, 10000, 30,
+                                    sl[k], tp[k])
+        trades = single["trades"]
+        perf = compute_metrics(single["equity"], trades["profit"], trades["type"], trades["entry_index"], trades["exit_index"])
+        assert batch["num_trades"][k] == perf["num_trades"] > 0
+        assert batch["final_balance"][k] == pytest.approx(10000 + trades["profit"].sum())
+        for key in ["total_profit", "win_rate", "profit_factor", "max_drawdown", "sharpe", "sortino"]:
+            assert batch[key][k] == pytest.approx(perf[key], rel=1e-9, abs=1e-12), key
+
+
+def random_inputs(rng, n):
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, n))
+    atr = np.abs(rng.normal(0.002, 0.0005, n))
+    signal = rng.choice([0, 0, 0, 0, 0, 0, 1, -1], n).astype(np.int8)
+    trend = rng.choice([1, -1, 0], n, p=[0.45, 0.45, 0.1]).astype(np.int8)
+    friday_close = rng.random(n) < 0.01
+    return close, atr, signal, trend, friday_close
+
+
+def test_portfolio_with_one_symbol_matches_single_run():
+    n = 2000
+    close, atr, signal, trend, friday_close = random_inputs(np.random.default_rng(5), n)
+    ready = np.arange(n) >= 20
+    pip_size, pip_value = pip_arrays(close, "metatrader", "EURUSD")
+    single = simulate_positions(close, atr, atr, signal, trend, friday_close, ready, pip_size, pip_value, 10000, 1, 1.5, 4.0)
+    column = lambda values: np.asarray(values)[:, None]
+    portfolio = simulate_portfolio(column(close), column(atr), column(atr), column(signal), column(trend),
+                                   column(friday_close), column(ready), column(pip_size), column(pip_value), 10000, 1,
+                                   [1.5], [4.0], max_open_positions=3)
+    assert len(portfolio["trades"]) == len(single["trades"]) > 0
+    for name in ["entry_index", "exit_index", "type", "units", "profit"]:
+        np.testing.assert_allclose(portfolio["trades"][name], single["trades"][name], rtol=1e-12)
+    np.testing.assert_allclose(portfolio["equity"], single["equity"], rtol=1e-12)
+    assert portfolio["position"][:, 0].tolist() == single["position"].tolist()
+
+
+def test_portfolio_enforces_max_open_positions_and_shares_balance():
+    rng = np.random.default_rng(8)
+    n, m = 1500, 4
+    columns = [random_inputs(rng, n) for _ in range(m)]
+    close, atr, signal, trend, friday_close = (np.column_stack(values) for values in zip(*columns))
+    # Symbol 3 hat nur jede zweite Kerze (z. B. anderer Handelskalender)
+    ready = np.tile(np.arange(n)[:, None] >= 20, (1, m))
+    ready[1::2, 3] = False
+    pip_size, pip_value = pip_arrays(close.ravel(), "metatrader", "EURUSD")
+    result = simulate_portfolio(close, atr, atr, signal, trend, friday_close, ready, pip_size.reshape(n, m),
+                                pip_value.reshape(n, m), 10000, 1, np.full(m, 1.5), np.full(m, 4.0), max_open_positions=2)
+    trades = result["trades"]
+    assert result["open_count"].max() == 2
+    assert (np.count_nonzero(result["position"], axis=1) <= 2).all()
+    assert set(trades["symbol"]) == set(range(m))
+    assert not np.isin(trades["entry_index"][trades["symbol"] == 3] % 2, 1).any()
+    # Eine gemeinsame Balance: Endstand = Start + Summe aller realisierten Gewinne
+    last = result["bars"] - 1
+    closed_before_last = trades["exit_index"] < last
+    assert result["balance"][last] == pytest.approx(10000 + trades["profit"][closed_before_last].sum())
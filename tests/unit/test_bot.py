@@ -0,0 +1,62 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pytest
+
+from src.bot import TradingBot
+
+
+class SlowConnector:
+    """Antwortet wie die REST-API mit fester Latenz."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_ohlcv(self, symbol, timeframe):
+        time.sleep(self.delay)
+        index = pd.date_range("2024-01-01", periods=50, freq="h")
+        return pd.DataFrame({"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1.0}, index=index)
+
+
+class HoldStrategy:
+    highest_price = None
+    lowest_price = None
+
+    def generate_signal(self, df, df_higher, current_position, symbol):
+        return "HOLD"
+
+
+def make_bot(symbols, delay):
+    bot = TradingBot.__new__(TradingBot)
+    bot.config = {
+        "trading": {"binance": {"symbols": {s: {} for s in symbols}, "timeframe": "1h", "higher_timeframe": "1d",
+                                "leverage": 1}}
+    }
+    bot.platforms = ["binance"]
+    bot.connectors = {"binance": SlowConnector(delay)}
+    bot.strategies = {s: HoldStrategy() for s in symbols}
+    bot.poll_interval = 60
+    bot.bar_close_delay = 1.0
+    bot.last_cycle_stats = {}
+    bot._mt5_lock = threading.Lock()
+    bot.get_current_position = lambda platform, symbol: (time.sleep(delay), "NONE")[1]
+    return bot
+
+
+def test_run_cycle_fetches_symbols_concurrently():
+    symbols = [f"SYM{i}USDT" for i in range(8)]
+    bot = make_bot(symbols, delay=0.2)
+    with ThreadPoolExecutor(max_workers=len(symbols) * 3) as executor:
+        stats = bot.run_cycle(executor)
+    # seriell wären es 8 Symbole * 3 Requests * 0.2s = 4.8s
+    assert stats["symbols"] == len(symbols)
+    assert stats["total_ms"] < 1500
+    assert stats["fetch_ms"] <= stats["total_ms"]
+
+
+def test_next_cycle_starts_after_bar_close():
+    bot = make_bot(["BTCUSDT"], delay=0)
+    bar_close = pd.Timestamp("2024-01-01 10:00").timestamp()
+    assert bot.seconds_until_next_cycle(now=bar_close - 0.5) == pytest.approx(1.5)
+    assert bot.seconds_until_next_cycle(now=bar_close + 1.0) == pytest.approx(60.0)
@@ -0,0 +1,89 @@
+import hmac
+import hashlib
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.binance_connector import BinanceConnector
+from src.http_transport import HttpTransport
+
+
+class FakeRestServer:
+    """Lokaler HTTP/1.1-Server: liefert die vorgegebenen Statuscodes der Reihe nach und merkt sich Requests."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []
+        self.client_ports = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                server.requests.append((self.command, self.path))
+                server.client_ports.add(self.client_address[1])
+                status = server.statuses.pop(0) if server.statuses else 200
+                body = b'{"ok": true}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = FakeRestServer()
+    yield server
+    server.close()
+
+
+def test_connections_are_reused_and_latency_is_recorded(server):
+    transport = HttpTransport(server.url)
+    for _ in range(20):
+        assert transport.request("GET", "/fapi/v1/time").status_code == 200
+    assert len(server.client_ports) == 1  # Keep-Alive: eine TCP-Verbindung für alle Requests
+    stats = transport.stats.summary()["GET /fapi/v1/time"]
+    assert stats["count"] == 20 and stats["errors"] == 0
+    assert 0 < stats["p50_ms"] <= stats["p90_ms"] <= stats["p99_ms"]
+
+
+def test_get_is_retried_but_order_post_is_not(server):
+    delays = []
+    transport = HttpTransport(server.url, retries=3, backoff=0.1, sleep=delays.append)
+    server.statuses = [503, 429]
+    assert transport.request("GET", "/fapi/v2/account").status_code == 200
+    assert delays == [0.1, 0.2]
+    server.statuses = [503]
+    assert transport.request("POST", "/fapi/v1/order").status_code == 503
+    assert [method for method, _ in server.requests] == ["GET", "GET", "GET", "POST"]
+    assert transport.stats.summary()["GET /fapi/v2/account"]["errors"] == 2
+
+
+def test_signed_request_signs_each_attempt(server, monkeypatch):
+    monkeypatch.setenv("BINANCE_TESTNET_API_KEY", "key")
+    monkeypatch.setenv("BINANCE_TESTNET_SECRET_KEY", "secret")
+    connector = BinanceConnector(testnet=True, http_config={"backoff": 0})
+    connector.transport.base_url = server.url
+    server.statuses = [502]
+    connector.signed_request("GET", "/fapi/v2/positionRisk", {"symbol": "BTCUSDT"})
+    assert len(server.requests) == 2
+    for _, path in server.requests:
+        query = urllib.parse.urlsplit(path).query
+        payload, signature = query.rsplit("&signature=", 1)
+        assert signature == hmac.new(b"secret", payload.encode(), hashlib.sha256).hexdigest()
+        assert urllib.parse.parse_qs(payload)["symbol"] == ["BTCUSDT"]
@@ -0,0 +1,57 @@
+import copy
+import numpy as np
+import pytest
+import talib
+import src.strategy as strategy_module
+from src.indicators import RSI, ATR, GradientTrend, SymbolIndicators
+
+
+@pytest.mark.parametrize("period", [2, 5, 14])
+def test_rsi_and_atr_match_talib(period, load_csv):
+    df = load_csv("ETHUSDT", "1h", rows=2000)
+    high, low, close = (df[c].to_numpy(dtype=float) for c in ("high", "low", "close"))
+    rsi, atr = RSI(period), ATR(period)
+    rsi_values = [rsi.update(c) for c in close]
+    atr_values = [atr.update(h, l, c) for h, l, c in zip(high, low, close)]
+    np.testing.assert_allclose(rsi_values, talib.RSI(close, timeperiod=period), rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(atr_values, talib.ATR(high, low, close, timeperiod=period), rtol=1e-10, equal_nan=True)
+
+
+def test_gradient_trend_matches_get_higher_trend_with_gradient(load_csv):
+    df_higher = load_csv("BNBUSDT", "1d")
+    trend = GradientTrend(lookback=5)
+    values = [trend.update(c) for c in df_higher["close"]]
+    expected = [strategy_module.get_higher_trend_with_gradient(df_higher.iloc[:k + 1], 5) for k in range(len(df_higher))]
+    assert values == expected
+
+
+def test_sync_follows_rolling_live_window_with_running_candle(load_csv):
+    df = load_csv("BTCUSDT", "1h", rows=800)
+    indicators = SymbolIndicators(rsi_period=5, atr_period=14)
+    for end in range(500, 800):
+        window = df.iloc[end - 500:end + 1].copy()
+        window.iloc[-1, window.columns.get_loc("close")] *= 1.001  # laufende Kerze weicht noch vom Schlusskurs ab
+        assert indicators.rsi.sync(window) == pytest.approx(talib.RSI(window["close"], 5).iloc[-1], rel=1e-9)
+        assert indicators.rsi.value == pytest.approx(talib.RSI(window["close"], 5).iloc[-2], rel=1e-9)
+        expected_atr = talib.ATR(window["high"], window["low"], window["close"], 14).iloc[-1]
+        assert indicators.atr.sync(window) == pytest.approx(expected_atr, rel=1e-9)
+    assert indicators.rsi.count == 799  # jede abgeschlossene Bar genau einmal übernommen, kein Neuaufbau
+
+
+def test_strategy_with_shared_indicators_matches_talib_path(load_csv):
+    cfg = copy.deepcopy(strategy_module.config)
+    cfg["strategy"]["extended_debug"] = False
+    df_hourly = load_csv("BTCUSDT", "1h", rows=900)
+    df_higher = load_csv("BTCUSDT", "1d")
+    reference = strategy_module.CompositeStrategy(cfg, symbol="BTCUSDT")
+    incremental = strategy_module.CompositeStrategy(cfg, symbol="BTCUSDT")
+    incremental.indicators = SymbolIndicators.for_strategy(incremental)
+
+    signals, expected = [], []
+    for end in range(300, 900):
+        window = df_hourly.iloc[end - 300:end + 1]
+        higher = df_higher[df_higher.index <= window.index[-1]]
+        expected.append(reference.generate_signal(window, higher))
+        signals.append(incremental.generate_signal(window, higher))
+    assert signals == expected
+    assert {"BUY", "SELL"} & set(expected)
@@ -0,0 +1,35 @@
+import asyncio
+from src.kline_downloader import WeightRateLimiter, split_windows, kline_request_weight
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_split_windows_covers_range_without_overlap():
+    windows = split_windows(0, 2499, interval_ms=1, limit=1000)
+    assert windows == [(0, 999), (1000, 1999), (2000, 2499)]
+
+
+def test_limiter_waits_for_next_minute_when_budget_is_used():
+    clock = FakeClock(now=120.0)
+    limiter = WeightRateLimiter(max_weight=20, safety_margin=1.0, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        for _ in range(4):
+            await limiter.acquire(kline_request_weight(500))  # Gewicht 5
+        limiter.update({"X-MBX-USED-WEIGHT-1M": "20"})
+        await limiter.acquire(5)
+
+    asyncio.run(run())
+    assert clock.sleeps == [60.0]
+    assert limiter.used == 5
@@ -0,0 +1,45 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from src.market_data import MarketDataPlane, MarketDataView
+
+
+def make_ohlcv(bars):
+    index = pd.date_range("2024-01-01", periods=bars, freq="h", name="timestamp")
+    close = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, bars))
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                         "volume": np.arange(bars, dtype=float)}, index=index)
+
+
+def close_sum(spec, start, stop):
+    with MarketDataView.attach(spec) as market:
+        return float(market.frame("BTCUSDT", "1h", start, stop)["close"].sum())
+
+
+@pytest.mark.parametrize("backend", ["shm", "npy"])
+def test_frame_round_trip(backend):
+    df = make_ohlcv(500)
+    with MarketDataPlane(backend) as plane:
+        plane.add("BTCUSDT", "1h", df)
+        with MarketDataView.attach(plane.spec) as market:
+            frame = market.frame("BTCUSDT", "1h")
+            pd.testing.assert_frame_equal(frame, df, check_freq=False)
+            pd.testing.assert_frame_equal(market.frame("BTCUSDT", "1h", 100, 200), df.iloc[100:200], check_freq=False)
+            with pytest.raises(ValueError):
+                market.arrays("BTCUSDT", "1h")["close"][0] = 0.0
+            del frame
+
+
+@pytest.mark.parametrize("backend", ["shm", "npy"])
+def test_workers_read_without_pickling_data(backend):
+    small, large = make_ohlcv(100), make_ohlcv(100_000)
+    with MarketDataPlane(backend) as plane_small, MarketDataPlane(backend) as plane_large:
+        plane_small.add("BTCUSDT", "1h", small)
+        plane_large.add("BTCUSDT", "1h", large)
+        # Die spec ist unabhängig von der Länge der Historie
+        assert abs(len(pickle.dumps(plane_large.spec)) - len(pickle.dumps(plane_small.spec))) < 64
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = executor.submit(close_sum, plane_large.spec, 1000, 5000).result()
+    assert result == pytest.approx(large["close"].iloc[1000:5000].sum())
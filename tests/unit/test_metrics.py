@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.backtest_kernel import TRADE_DTYPE
+from src.backtesting_improved import calculate_performance
+from src.metrics import compute_metrics, drawdown_stats, SIDE_LONG, SIDE_SHORT
+
+
+def make_result(seed=7, bars=2000, n_trades=60):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=bars, freq="h")
+    equity = 16000 + np.cumsum(rng.normal(0, 40, bars))
+    equity[0] = np.nan  # wie df_sim aus run_backtest
+    df_sim = pd.DataFrame({"equity": equity}, index=index)
+    entries = np.sort(rng.choice(np.arange(1, bars - 10, 30), n_trades, replace=False))
+    trades = np.zeros(n_trades, dtype=TRADE_DTYPE)
+    trades["entry_index"] = entries
+    trades["exit_index"] = entries + rng.integers(1, 10, n_trades)
+    trades["type"] = rng.choice([SIDE_LONG, SIDE_SHORT], n_trades)
+    trades["profit"] = rng.normal(5, 50, n_trades)
+    return df_sim, trades
+
+
+def test_drawdown_matches_loop():
+    df_sim, _ = make_result()
+    equity = df_sim["equity"].to_numpy()
+    peak, max_dd, start, max_duration = equity[1], 0.0, 1, 0
+    for i in range(1, len(equity)):
+        if equity[i] >= peak:
+            peak, start = equity[i], i
+        max_dd = max(max_dd, (peak - equity[i]) / peak)
+        max_duration = max(max_duration, i - start)
+    assert drawdown_stats(equity) == (pytest.approx(max_dd), max_duration)
+    assert max_dd > 0  # führendes NaN blockiert das laufende Hoch nicht mehr
+
+
+def test_legacy_metrics_unchanged():
+    df_sim, trades = make_result()
+    perf = compute_metrics(df_sim["equity"], trades["profit"], trades["type"], trades["entry_index"], trades["exit_index"])
+    profit = trades["profit"]
+    returns = df_sim["equity"].pct_change().dropna()
+    assert perf["total_profit"] == pytest.approx(profit.sum())
+    assert perf["win_rate"] == pytest.approx((profit > 0).mean())
+    assert perf["profit_factor"] == pytest.approx(profit[profit > 0].sum() / -profit[profit < 0].sum())
+    assert perf["sharpe"] == pytest.approx(returns.mean() / returns.std() * np.sqrt(252 * 24))
+    assert perf["expectancy"] == pytest.approx(profit.mean())
+    assert perf["exposure"] == pytest.approx((trades["exit_index"] - trades["entry_index"]).sum() / len(df_sim))
+    assert perf["long_num_trades"] + perf["short_num_trades"] == len(trades)
+    assert perf["long_profit"] + perf["short_profit"] == pytest.approx(perf["total_profit"])
+
+
+def test_calculate_performance_accepts_trade_dicts_and_arrays():
+    df_sim, trades = make_result()
+    index = df_sim.index
+    trade_dicts = [{"entry_time": index[t["entry_index"]], "exit_time": index[t["exit_index"]], "profit": t["profit"],
+                    "type": "LONG" if t["type"] == SIDE_LONG else "SHORT"} for t in trades]
+    assert calculate_performance(df_sim, trade_dicts) == calculate_performance(df_sim, trades)
+
+
+def test_no_trades():
+    df_sim, _ = make_result()
+    perf = calculate_performance(df_sim, [])
+    assert perf["num_trades"] == 0 and perf["total_profit"] == 0 and perf["profit_factor"] == 0
+    assert perf["exposure"] == 0
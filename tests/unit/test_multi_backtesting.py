@@ -0,0 +1,49 @@
+import copy
+import numpy as np
+import pandas as pd
+from src.multi_backtesting import run_backtests, apply_best_params
+from src.strategy import CompositeStrategy, config
+from src.ohlcv_binary import write_ohlcv, binary_path
+
+
+def write_symbol(root, symbol, seed):
+    rng = np.random.default_rng(seed)
+    for interval, freq, n in [("1h", "h", 1500), ("4h", "4h", 375)]:
+        index = pd.date_range("2024-01-01", periods=n, freq=freq, name="timestamp")
+        close = 100 + np.cumsum(rng.normal(0, 1, n))
+        df = pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                           "volume": rng.uniform(1, 10, n)}, index=index)
+        write_ohlcv(binary_path(root, symbol, interval), df)
+
+
+def test_run_backtests_streams_one_summary_per_symbol(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    symbols = ["AAAUSDT", "BBBUSDT", "CCCUSDT"]
+    for seed, symbol in enumerate(symbols):
+        write_symbol(tmp_path / "binary", symbol, seed)
+    config = {
+        "platforms": {"binance": True, "metatrader": False},
+        "strategy": {"rsi_period": 2, "rsi_overbought": 80, "rsi_oversold": 20, "atr_period": 14, "lookback": 3},
+        "risk_management": {"initial_balance": 16000, "base_risk": 0.01, "dynamic_risk_factor": 0.001, "atr_period": 14},
+        "data": {"source": "local", "binary_path": str(tmp_path / "binary")},
+        "backtest": {"artifacts": False, "max_workers": 2},
+        "trading": {"binance": {"symbols": {symbol: {} for symbol in symbols}, "timeframe": "1h",
+                                "higher_timeframe": "4h", "leverage": 1}},
+    }
+    results = list(run_backtests(config, ["binance"], {}, charts=True))
+    assert sorted(summary["symbol"] for summary, _ in results) == symbols
+    for summary, chart in results:
+        assert summary["num_trades"] > 0
+        assert chart.done() and chart.exception() is None
+        assert (tmp_path / "results" / f"Backtest_ binance_{summary['symbol']}.png").exists()
+
+
+def test_best_params_override_the_symbol_section():
+    cfg = copy.deepcopy(config)  # beide Plattformen aktiv, BTCUSDT mit eigenem Abschnitt
+    best_params = {"binance": {"BTCUSDT": {"atr_sl_multiplier": 0.9, "atr_tp_multiplier": 7.5}}}
+    assert apply_best_params(cfg, "binance", "BTCUSDT", best_params)
+    assert not apply_best_params(cfg, "binance", "ETHUSDT", best_params)
+    strategy = CompositeStrategy(cfg, symbol="BTCUSDT")
+    assert (strategy.atr_sl_multiplier, strategy.atr_tp_multiplier) == (0.9, 7.5)
+    assert cfg["strategy"]["atr_sl_multiplier"] == config["strategy"]["atr_sl_multiplier"]
+    assert CompositeStrategy(cfg, symbol="ETHUSDT").atr_sl_multiplier == 2.5
@@ -0,0 +1,62 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.ohlcv_binary import OHLCVFile, write_ohlcv, read_ohlcv, convert_to_binary, convert_store
+from src.ohlcv_store import OHLCVStore
+
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def test_convert_csv_round_trip(tmp_path, load_csv, data_dir):
+    path = convert_to_binary(os.path.join(data_dir, "BTCUSDT_1h_2024_data.csv"), str(tmp_path))
+    assert os.path.basename(path) == "BTCUSDT_1h.ohlcv"
+    pd.testing.assert_frame_equal(read_ohlcv(path), load_csv("BTCUSDT", "1h")[COLUMNS], check_freq=False)
+
+
+def test_time_range_uses_chunk_index(tmp_path, load_csv):
+    df = load_csv("ETHUSDT", "1h")[COLUMNS]
+    path = str(tmp_path / "ETHUSDT_1h.ohlcv")
+    write_ohlcv(path, df, chunk_rows=100)
+    ohlcv = OHLCVFile(path)
+    assert len(ohlcv.index) == -(-len(df) // 100)
+    assert ohlcv.bounds() == (df.index[0], df.index[-1])
+    timestamps = df.index.asi8
+    for start, end in [("2024-03-05 07:00", "2024-03-09"), ("2023-01-01", "2024-01-01 05:00"), (df.index[99], df.index[100]),
+                       ("2024-06-01 00:30", "2024-06-01 00:45"), ("2025-06-01", None)]:
+        # Grenzen als Zeitpunkte (wie OHLCVStore.read), nicht als Teilstring-Bereich
+        mask = df.index >= pd.Timestamp(start)
+        if end is not None:
+            mask &= df.index <= pd.Timestamp(end)
+        expected = df[mask]
+        pd.testing.assert_frame_equal(ohlcv.frame(start, end), expected, check_freq=False)
+    for value in [timestamps[0] - 1, timestamps[250], timestamps[-1], timestamps[-1] + 1]:
+        for side in ["left", "right"]:
+            assert ohlcv.locate(pd.Timestamp(value), side) == np.searchsorted(timestamps, value, side=side)
+
+
+def test_duplicates_unsorted_and_empty(tmp_path, load_csv):
+    df = load_csv("BNBUSDT", "1d")[COLUMNS]
+    shuffled = pd.concat([df.iloc[10:], df.iloc[:12]])
+    shuffled.iloc[-1, 0] = -1.0  # Duplikat mit neuerem Wert gewinnt
+    write_ohlcv(str(tmp_path / "a.ohlcv"), shuffled)
+    loaded = read_ohlcv(str(tmp_path / "a.ohlcv"))
+    assert loaded.index.is_monotonic_increasing and len(loaded) == len(df)
+    assert loaded["open"].iloc[11] == -1.0
+
+    write_ohlcv(str(tmp_path / "empty.ohlcv"), df.iloc[:0])
+    assert read_ohlcv(str(tmp_path / "empty.ohlcv")).empty
+    assert OHLCVFile(str(tmp_path / "empty.ohlcv")).bounds() == (None, None)
+
+
+def test_convert_parquet_store(tmp_path, load_csv):
+    df = load_csv("BTCUSDT", "1d")[COLUMNS]
+    store = OHLCVStore(str(tmp_path / "store"))
+    store.write("BTCUSDT", "1d", df)
+    path = convert_store(store, "BTCUSDT", "1d", str(tmp_path / "binary"))
+    pd.testing.assert_frame_equal(read_ohlcv(path), df, check_freq=False)
+
+    with open(tmp_path / "invalid.ohlcv", "wb") as file:
+        file.write(b"\x00" * 64)
+    with pytest.raises(ValueError):
+        OHLCVFile(str(tmp_path / "invalid.ohlcv"))
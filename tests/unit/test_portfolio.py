@@ -0,0 +1,61 @@
+import copy
+import numpy as np
+import pytest
+from src.strategy import config
+from src.portfolio import portfolio_inputs, run_portfolio_backtest
+
+
+@pytest.fixture
+def two_calendars(load_csv):
+    """BTCUSDT rund um die Uhr, ETHUSDT erst ab Bar 300 und nur werktags (anderer Handelskalender)."""
+    btc = load_csv("BTCUSDT", "1h").iloc[:3000]
+    eth = load_csv("ETHUSDT", "1h").iloc[300:3000]
+    eth = eth[eth.index.dayofweek < 5]
+    return {"BTCUSDT": (btc, load_csv("BTCUSDT", "1d")), "ETHUSDT": (eth, load_csv("ETHUSDT", "1d"))}
+
+
+@pytest.fixture
+def portfolio_config():
+    cfg = copy.deepcopy(config)
+    cfg["strategy"]["extended_debug"] = False
+    cfg["trading"]["binance"]["symbols"] = {"BTCUSDT": {}, "ETHUSDT": {}}
+    cfg["trading"]["max_open_positions"] = 2
+    return cfg
+
+
+def test_inputs_on_union_axis(portfolio_config, two_calendars):
+    inputs = portfolio_inputs(portfolio_config, "binance", two_calendars)
+    btc, eth = two_calendars["BTCUSDT"][0], two_calendars["ETHUSDT"][0]
+    assert inputs["index"].equals(btc.index.union(eth.index))
+    close, pip_size = inputs["close"][:, 1], inputs["pip_size"][:, 1]
+    first = inputs["index"].get_loc(eth.index[0])
+    # Vor der ersten Kerze: kein Kurs, keine Pip-Größe, kein Signal
+    assert np.isnan(close[:first]).all() and np.isnan(pip_size[:first]).all()
+    assert not inputs["ready"][:first, 1].any() and not inputs["signal"][:first, 1].any()
+    # Danach (auch am Wochenende) der letzte Schlusskurs
+    expected = eth["close"].reindex(inputs["index"]).ffill().to_numpy()
+    np.testing.assert_array_equal(close[first:], expected[first:])
+    np.testing.assert_allclose(pip_size[first:], close[first:] * 0.0001)
+    weekend = inputs["index"].dayofweek >= 5
+    assert not inputs["ready"][weekend, 1].any()
+
+
+def test_portfolio_backtest_with_two_calendars(portfolio_config, two_calendars):
+    result = run_portfolio_backtest(portfolio_config, "binance", two_calendars)
+    btc, eth = two_calendars["BTCUSDT"][0], two_calendars["ETHUSDT"][0]
+    equity, trades, symbols = result["equity"], result["trades"], result["symbols"]
+    assert equity.index.equals(btc.index.union(eth.index))
+    # Wie im Einzel-Backtest ist nur die erste Bar leer; der NaN-Anfang von ETHUSDT darf die Equity nicht verfälschen
+    assert np.isfinite(equity["equity"].iloc[1:]).all()
+    assert equity["open_positions"].max() <= 2
+
+    eth_trades = trades[trades["symbol"] == "ETHUSDT"]
+    assert len(eth_trades) > 0 and (trades["symbol"] == "BTCUSDT").any()
+    assert eth_trades["entry_time"].isin(eth.index).all()
+
+    assert list(symbols.index) == ["BTCUSDT", "ETHUSDT"]
+    by_symbol = trades.groupby("symbol")["profit"]
+    np.testing.assert_allclose(symbols["total_profit"], by_symbol.sum().reindex(symbols.index))
+    assert symbols["num_trades"].tolist() == by_symbol.size().reindex(symbols.index).tolist()
+    assert symbols["num_trades"].sum() == len(trades)
+    assert ((symbols["win_rate"] >= 0) & (symbols["win_rate"] <= 1)).all()
@@ -1,7 +1,9 @@
 # src/strategy.py
+import copy
 import talib
 import pandas as pd
 import pytest
+import src.strategy as strategy_module
 
 
 class CompositeStrategy:
@@ -40,4 +42,31 @@ class CompositeStrategy:
             return "HOLD"
 
 
+def test_higher_trend_codes_match_gradient_trend(load_csv):
+    df_higher = load_csv("ETHUSDT", "1d")
+    lookback = 3
+    codes = strategy_module.higher_trend_codes(df_higher, lookback)
+    expected = [strategy_module.get_higher_trend_with_gradient(df_higher.iloc[:k + 1], lookback) for k in range(len(df_higher))]
+    assert [strategy_module.TREND_LABELS[c] for c in codes] == expected
 
+
+def test_weekend_masks_match_detect_friday_close_or_monday_pause():
+    index = pd.date_range("2024-03-01", periods=24 * 10, freq="h")
+    friday_close, monday_block = strategy_module.weekend_masks(index, block_hours=4)
+    actions = [strategy_module.detect_friday_close_or_monday_pause(t, None, 4) for t in index]
+    assert friday_close.tolist() == [a == "CLOSE_ALL" for a in actions]
+    assert monday_block.tolist() == [a == "BLOCK" for a in actions]
+
+
+def test_generate_signals_matches_generate_signal_when_flat(load_csv):
+    cfg = copy.deepcopy(strategy_module.config)
+    cfg["strategy"]["extended_debug"] = False
+    df_hourly = load_csv("BTCUSDT", "1h", rows=600)
+    df_higher = load_csv("BTCUSDT", "1d")
+    strategy = strategy_module.CompositeStrategy(cfg, symbol="BTCUSDT")
+
+    signals = strategy.generate_signals(df_hourly, df_higher)
+    expected = [strategy.generate_signal(df_hourly.iloc[:i + 1], df_higher[df_higher.index <= t])
+                for i, t in enumerate(df_hourly.index)]
+    assert [strategy_module.SIGNAL_LABELS[s] for s in signals] == expected
+    assert {"BUY", "SELL"} & set(expected)
@@ -0,0 +1,56 @@
+import os
+import copy
+import pytest
+import numpy as np
+from src.strategy import CompositeStrategy, IndicatorCache, config
+from src.backtesting_improved import run_backtest, calculate_performance
+from src.sweep import expand_grid, group_by_signal, run_sweep, apply_sweep_params, SUMMARY_METRICS
+
+
+@pytest.fixture
+def sweep_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cfg = copy.deepcopy(config)
+    cfg["strategy"]["extended_debug"] = False
+    return cfg
+
+
+def test_grid_groups_by_signal_parameters():
+    params_list = expand_grid({"rsi_period": [3, 5], "rsi_oversold": 30, "atr_sl_multiplier": [1.0, 1.5],
+                               "atr_tp_multiplier": [4.0, 6.0]})
+    assert len(params_list) == 8 and params_list[0]["name"] == "grid_00000"
+    groups = group_by_signal(params_list)
+    assert len(groups) == 2
+    assert [len(group) for group in groups.values()] == [4, 4]
+
+
+def test_cache_computes_each_series_once(sweep_config, load_csv):
+    df_hourly, df_higher = load_csv("BTCUSDT", "1h"), load_csv("BTCUSDT", "1d")
+
+    def context(overbought, cache=None):
+        temp_config = apply_sweep_params(sweep_config, "binance", "BTCUSDT", {"rsi_overbought": overbought})
+        return CompositeStrategy(temp_config, "BTCUSDT").prepare_signal_context(df_hourly, df_higher, cache=cache)
+
+    cache = IndicatorCache(df_hourly, df_higher)
+    cached = [context(80, cache), context(90, cache)]
+    assert cached[0]["rsi"] is cached[1]["rsi"] and cached[0]["atr"] is cached[1]["atr"]
+    for overbought, result in zip([80, 90], cached):
+        for key in ["signal", "rsi", "atr", "trend", "ready"]:
+            np.testing.assert_array_equal(result[key], context(overbought)[key])
+
+
+def test_sweep_matches_single_backtests(sweep_config, load_csv):
+    df_hourly, df_higher = load_csv("ETHUSDT", "1h"), load_csv("ETHUSDT", "1d")
+    params_list = expand_grid({"rsi_period": [3, 5], "rsi_overbought": [85, 90], "atr_sl_multiplier": [1.0, 1.8],
+                               "atr_tp_multiplier": [4.0]})
+    result = run_sweep(sweep_config, "binance", "ETHUSDT", df_hourly, df_higher, params_list, max_workers=2)
+    assert list(result["name"]) == [params["name"] for params in params_list]
+
+    for i in [0, 5]:
+        temp_config = apply_sweep_params(sweep_config, "binance", "ETHUSDT", params_list[i])
+        df_sim, trades = run_backtest(df_hourly.copy(), CompositeStrategy(temp_config, "ETHUSDT"), temp_config,
+                                      df_higher=df_higher, symbol="ETHUSDT", platform="binance", artifacts=False)
+        perf = calculate_performance(df_sim, trades)
+        for key in SUMMARY_METRICS:
+            assert result.loc[i, key] == pytest.approx(perf[key])
+    assert not os.path.exists("results")
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from src.timeframe_alignment import align_higher_timeframe, infer_bar_duration
+
+
+def test_infer_bar_duration_ignores_weekend_gaps():
+    index = pd.DatetimeIndex(["2024-03-07", "2024-03-08", "2024-03-11", "2024-03-12", "2024-03-13"])
+    assert infer_bar_duration(index) == pd.Timedelta("1D")
+    assert infer_bar_duration(index[:1]) is None
+
+
+def test_align_higher_timeframe_skips_forming_candle():
+    lower = pd.date_range("2024-01-01 00:00", periods=10, freq="h")
+    higher = pd.date_range("2024-01-01 00:00", periods=3, freq="4h")
+
+    # Bisheriges Verhalten: Kerze zählt ab ihrer Eröffnung
+    assert align_higher_timeframe(lower, higher, closed_only=False).tolist() == [0, 0, 0, 0, 1, 1, 1, 1, 2, 2]
+    # Die 00:00-H4-Kerze ist erst mit Schluss der 03:00-Stundenkerze abgeschlossen
+    assert align_higher_timeframe(lower, higher).tolist() == [-1, -1, -1, 0, 0, 0, 0, 1, 1, 1]
+
+
+def test_align_higher_timeframe_matches_boolean_mask():
+    lower = pd.date_range("2024-01-01", periods=200, freq="h")
+    higher = pd.date_range("2023-12-30", periods=12, freq="D")
+    positions = align_higher_timeframe(lower, higher, closed_only=False)
+    expected = np.array([(higher <= t).sum() - 1 for t in lower])
+    assert np.array_equal(positions, expected)
@@ -0,0 +1,41 @@
+import copy
+import pandas as pd
+from src.tracing import Tracer
+from src.strategy import CompositeStrategy, config
+from src.backtesting_improved import run_backtest
+
+
+def test_ring_buffer_keeps_latest_sampled_records():
+    tracer = Tracer("test", enabled=True, capacity=3, sample_every=2)
+    for i in range(10):
+        tracer.record("bar", i=i)
+    assert [r["i"] for r in tracer.records()] == [4, 6, 8]
+    assert list(tracer.dump().columns) == ["event", "i"]
+
+
+def test_extended_debug_traces_instead_of_printing(capsys, load_csv):
+    cfg = copy.deepcopy(config)
+    cfg["strategy"]["extended_debug"] = True
+    strategy = CompositeStrategy(cfg, symbol="BTCUSDT")
+    df_hourly = load_csv("BTCUSDT", "1h", rows=100)
+    strategy.generate_signal(df_hourly, load_csv("BTCUSDT", "1d", rows=20))
+    assert capsys.readouterr().out == ""
+    record = strategy.tracer.records()[-1]
+    assert record["event"] == "signal" and record["time"] == df_hourly.index[-1]
+
+
+def test_engines_trace_the_same_bars(tmp_path, monkeypatch, load_csv):
+    monkeypatch.chdir(tmp_path)
+    cfg = copy.deepcopy(config)
+    cfg["strategy"]["extended_debug"] = False
+    cfg["tracing"] = {"enabled": True, "capacity": 100000, "sample_every": 1}
+    df_hourly = load_csv("ETHUSDT", "1h", rows=800)
+    df_higher = load_csv("ETHUSDT", "1d")
+    traces = {}
+    for engine in ["loop", "incremental"]:
+        run_backtest(df_hourly.copy(), CompositeStrategy(cfg, symbol="ETHUSDT"), cfg, df_higher=df_higher,
+                     symbol="ETHUSDT", platform="binance", engine=engine)
+        trace = pd.read_csv(tmp_path / "results" / "trace_backtest_ETHUSDT.csv")
+        traces[engine] = trace[trace["event"] == "bar"][["time", "close", "balance", "equity", "position"]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(traces["incremental"], traces["loop"])
+    assert len(traces["loop"]) == len(df_hourly) - 1
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from src.backtest_kernel import POSITION_LONG, POSITION_SHORT
+from src.trade_ledger import TradeLedger, TRADE_COLUMNS
+
+
+def test_append_grows_and_converts_to_frame():
+    index = pd.date_range("2024-01-01", periods=100, freq="h")
+    ledger = TradeLedger(index, capacity=2)
+    for k in range(5):
+        side = POSITION_LONG if k % 2 == 0 else POSITION_SHORT
+        ledger.append(10 * k, 10 * k + 3, side, 100.0 + k, 101.0 + k, 0.5, 10.0, float(k), 1.0)
+
+    assert len(ledger) == 5
+    assert ledger["profit"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert list(ledger["exit_time"]) == list(index[[3, 13, 23, 33, 43]])
+    assert ledger.sides(POSITION_SHORT).sum() == 2
+
+    df = ledger.to_frame("BTCUSDT")
+    assert list(df.columns) == ["symbol"] + TRADE_COLUMNS
+    assert df["type"].tolist() == ["LONG", "SHORT", "LONG", "SHORT", "LONG"]
+    assert df["entry_time"].iloc[1] == index[10]
+
+
+def test_from_array_shares_memory():
+    index = pd.date_range("2024-01-01", periods=10, freq="h")
+    ledger = TradeLedger(index)
+    ledger.append(1, 2, POSITION_LONG, 1.0, 2.0, 1.0, 1.0, 1.0)
+    shared = TradeLedger.from_array(index, ledger.trades)
+    assert np.shares_memory(shared.trades, ledger.trades)
+    assert len(TradeLedger(index)) == 0 and TradeLedger(index).to_frame().empty
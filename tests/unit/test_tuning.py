@@ -0,0 +1,91 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import yaml
+import src.tuning as tuning
+from src.strategy import config
+
+
+@pytest.fixture
+def load_data(load_csv):
+    """Ersatz für multi_backtesting.load_data: gebündelte Kursdaten statt Download."""
+    return lambda platform, symbol, config: (load_csv(symbol, "1h", rows=1500), load_csv(symbol, "1d"))
+
+
+def test_tune_all_symbols_merges_in_config_order(tmp_path, monkeypatch, load_data):
+    monkeypatch.chdir(tmp_path)
+    cfg = copy.deepcopy(config)
+    cfg["platforms"] = {"binance": True, "metatrader": False}
+    cfg["strategy"]["extended_debug"] = False
+    cfg["backtest"]["artifacts"] = False
+    cfg["trading"]["binance"]["symbols"] = {"BTCUSDT": {"atr_sl_multiplier": 1.2, "atr_tp_multiplier": 6.5},
+                                            "ETHUSDT": {"atr_sl_multiplier": 2.5, "atr_tp_multiplier": 6.0}}
+    cfg["trading"]["binance"]["higher_timeframe"] = "1d"
+    cfg["tuning"].update({"method": "bayesian", "n_calls": 4, "batch_size": 2,
+                          "output_path": str(tmp_path / "tuning" / "best_params.yaml")})
+    original = copy.deepcopy(cfg)
+
+    batches = []
+    batch_objective = tuning.batch_objective
+    tune_symbol = tuning.tune_symbol
+
+    def counting_batch_objective(points, config, platform, symbol, *args):
+        batches.append((symbol, len(points)))
+        return batch_objective(points, config, platform, symbol, *args)
+
+    def slow_first_symbol(config, platform, symbol, *args):
+        if symbol == "BTCUSDT":
+            time.sleep(0.5)  # BTCUSDT wird zuletzt fertig, steht im Ergebnis aber trotzdem vorn
+        return tune_symbol(config, platform, symbol, *args)
+
+    # Threads statt Prozesse, damit die Ersatzfunktionen im Worker greifen
+    monkeypatch.setattr(tuning, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(tuning, "load_data", load_data)
+    monkeypatch.setattr(tuning, "batch_objective", counting_batch_objective)
+    monkeypatch.setattr(tuning, "tune_symbol", slow_first_symbol)
+
+    result = tuning.tune_all_symbols(cfg)
+
+    assert list(result["binance"]) == ["BTCUSDT", "ETHUSDT"]
+    assert result["metatrader"] == {}
+    for params in result["binance"].values():
+        assert 0.5 <= params["atr_sl_multiplier"] <= 2.0
+        assert 4.0 <= params["atr_tp_multiplier"] <= 8.0
+    # n_calls=4 bei batch_size=2: zwei ask/tell-Runden je Symbol
+    assert sorted(batches) == [("BTCUSDT", 2), ("BTCUSDT", 2), ("ETHUSDT", 2), ("ETHUSDT", 2)]
+    with open(cfg["tuning"]["output_path"]) as file:
+        assert list(yaml.safe_load(file)["binance"]) == ["BTCUSDT", "ETHUSDT"]
+    assert cfg == original  # Parameter werden nur in Kopien der Konfiguration gesetzt
+
+
+def test_bayesian_optimization_rejects_non_positive_n_calls(load_data):
+    cfg = copy.deepcopy(config)
+    cfg["tuning"]["n_calls"] = 0
+    df_hourly, df_higher = load_data("binance", "BTCUSDT", cfg)
+    with pytest.raises(ValueError, match="tuning.n_calls"):
+        tuning.bayesian_optimization(cfg, "binance", "BTCUSDT", [0.5, 2.0], [4.0, 8.0], df_hourly, df_higher)
+
+
+def test_failed_worker_is_logged_with_its_symbol(tmp_path, monkeypatch, load_data):
+    monkeypatch.chdir(tmp_path)
+    cfg = copy.deepcopy(config)
+    cfg["platforms"] = {"binance": True, "metatrader": False}
+    cfg["trading"]["binance"]["symbols"] = {"BTCUSDT": {}, "ETHUSDT": {}}
+    cfg["trading"]["binance"]["higher_timeframe"] = "1d"
+    cfg["tuning"]["output_path"] = str(tmp_path / "best_params.yaml")
+
+    def tune_symbol(config, platform, symbol, *args):
+        if symbol == "ETHUSDT":
+            raise RuntimeError("Worker abgestürzt")
+        return platform, symbol, {"atr_sl_multiplier": 1.0, "atr_tp_multiplier": 5.0}, {"total_profit": 0.0}
+
+    errors = []
+    monkeypatch.setattr(tuning, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(tuning, "load_data", load_data)
+    monkeypatch.setattr(tuning, "tune_symbol", tune_symbol)
+    monkeypatch.setattr(tuning.logger, "error", errors.append)
+
+    result = tuning.tune_all_symbols(cfg)
+    assert list(result["binance"]) == ["BTCUSDT"]
+    assert errors == ["Tuning für binance/ETHUSDT fehlgeschlagen: Worker abgestürzt"]
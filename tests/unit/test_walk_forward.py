@@ -0,0 +1,75 @@
+import os
+import copy
+import pytest
+import numpy as np
+import pandas as pd
+from src.shared_arrays import SharedArrays
+from src.strategy import CompositeStrategy, config
+from src.backtesting_improved import run_backtest
+from src.walk_forward import walk_forward, walk_forward_windows, build_context, share_context, slice_context
+
+
+@pytest.fixture
+def wf_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cfg = copy.deepcopy(config)
+    cfg["strategy"]["extended_debug"] = False
+    cfg["tuning"].update({"n_calls": 4, "batch_size": 2})
+    cfg["walk_forward"] = {"train_bars": 1500, "test_bars": 500, "max_workers": 2}
+    return cfg
+
+
+def test_windows_are_contiguous():
+    windows = walk_forward_windows(3200, train_bars=1000, test_bars=500)
+    assert windows == [((0, 1000), (1000, 1500)), ((500, 1500), (1500, 2000)), ((1000, 2000), (2000, 2500)),
+                       ((1500, 2500), (2500, 3000))]
+    assert walk_forward_windows(1000, 1000, 500) == []
+    assert walk_forward_windows(2000, 1000, 500, step_bars=1000) == [((0, 1000), (1000, 1500))]
+
+
+def test_shared_arrays_round_trip():
+    values = {"close": np.arange(10, dtype=float), "signal": np.array([1, -1, 0], dtype=np.int8)}
+    with SharedArrays(values) as shared:
+        attached = SharedArrays.attach(shared.spec)
+        np.testing.assert_array_equal(attached["close"], values["close"])
+        assert attached["signal"].dtype == np.int8
+        with pytest.raises(ValueError):
+            attached["close"][0] = 1.0  # Worker sehen die Daten nur lesend
+        attached.close()
+
+
+def test_shared_context_matches_recomputation(wf_config, load_csv):
+    df_hourly, df_higher = load_csv("BTCUSDT", "1h").iloc[:3000], load_csv("BTCUSDT", "1d")
+    expected = run_backtest(df_hourly.copy(), CompositeStrategy(wf_config, "BTCUSDT"), wf_config, df_higher=df_higher,
+                            symbol="BTCUSDT", platform="binance", artifacts=False)[1]
+
+    shared = share_context(build_context(wf_config, "BTCUSDT", df_hourly, df_higher))
+    try:
+        context = slice_context(shared, 0, len(df_hourly))
+        pd.testing.assert_index_equal(context["index"], df_hourly.index, check_names=False)
+        trades = run_backtest(df_hourly.copy(), CompositeStrategy(wf_config, "BTCUSDT"), wf_config, df_higher=df_higher,
+                              symbol="BTCUSDT", platform="binance", artifacts=False, context=context)[1]
+        np.testing.assert_array_equal(slice_context(shared, 1000, 2000)["rsi"], context["rsi"][1000:2000])
+        del context
+    finally:
+        shared.close()
+    assert len(expected)
+    np.testing.assert_array_equal(trades.trades, expected.trades)
+
+
+def test_walk_forward_stitches_out_of_sample_equity(wf_config, load_csv):
+    df_hourly, df_higher = load_csv("ETHUSDT", "1h").iloc[:3000], load_csv("ETHUSDT", "1d")
+    result = walk_forward(wf_config, "binance", "ETHUSDT", df_hourly, df_higher)
+
+    folds = result["folds"]
+    assert [fold["fold"] for fold in folds] == [0, 1, 2]
+    assert [fold["test_start"] for fold in folds] == list(df_hourly.index[[1500, 2000, 2500]])
+    # Out-of-Sample-Strecke: nur Testfenster, Gewinne der Folds addieren sich
+    assert result["equity"].index.min() > df_hourly.index[1500]
+    initial_balance = wf_config["risk_management"]["initial_balance"]
+    assert result["equity"].iloc[-1] - initial_balance == pytest.approx(
+        sum(fold["equity"].dropna().iloc[-1] - initial_balance for fold in folds))
+    assert (result["trades"]["entry_time"] >= df_hourly.index[1500]).all()
+    assert result["performance"]["num_trades"] == len(result["trades"])
+    assert result["performance"]["total_profit"] == pytest.approx(sum(fold["test"]["total_profit"] for fold in folds))
+    assert not os.path.exists("results")
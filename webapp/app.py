@@ -149,7 +149,7 @@ def run_backtest_route():
             platform=selected_platform
         )
         os.makedirs(os.path.join('..', 'results'), exist_ok=True)
-        trades_df = pd.DataFrame(trades) if isinstance(trades, list) else trades
+        trades_df = trades.to_frame(selected_symbol)
         # Berechne Performance-Metriken
         from src.backtesting_improved import calculate_performance
         perf = calculate_performance(df_sim, trades)
@@ -219,12 +219,21 @@ def live_data():
     trade_conf = config['trading'][selected_platform]
     if bot_instance and BOT_RUNNING:
         try:
-            balance = bot_instance.connectors[selected_platform].get_balance() if selected_platform in bot_instance.connectors else 0
-            positions = []
-            for symbol in trade_conf['symbols'].keys():
-                pos = bot_instance.get_current_position(selected_platform, symbol)
-                if pos != "NONE":
-                    positions.append({"symbol": symbol, "position": pos})
+            connector = bot_instance.connectors.get(selected_platform)
+            account = getattr(connector, "account", None)
+            if account is not None:
+                # Derselbe Konto-Snapshot wie im Bot-Zyklus – kein zusätzlicher Request je Symbol
+                snapshot = account.snapshot()
+                balance = snapshot.balances.get("USDT", 0)
+                positions = [{"symbol": p["symbol"], "position": p["position"]}
+                             for p in snapshot.open_positions(trade_conf['symbols'].keys())]
+            else:
+                balance = connector.get_balance() if connector is not None else 0
+                positions = []
+                for symbol in trade_conf['symbols'].keys():
+                    pos = bot_instance.get_current_position(selected_platform, symbol)
+                    if pos != "NONE":
+                        positions.append({"symbol": symbol, "position": pos})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     else: